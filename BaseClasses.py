@@ -1,5 +1,6 @@
 from __future__ import annotations
 from argparse import Namespace
+from array import array
 
 import copy
 from enum import unique, IntEnum, IntFlag
@@ -7,10 +8,11 @@ import logging
 import json
 import functools
 from collections import OrderedDict, Counter, deque
-from typing import List, Dict, Optional, Set, Iterable, Union, Any, Tuple, TypedDict, Callable, NamedTuple
+from typing import List, Dict, Optional, Set, Iterable, Iterator, Union, Any, Tuple, TypedDict, Callable, NamedTuple
 import typing  # this can go away when Python 3.8 support is dropped
 import secrets
 import random
+import time
 
 import Options
 import Utils
@@ -29,6 +31,17 @@ class Group(TypedDict, total=False):
     link_replacement: bool
 
 
+class _LocationIndex(NamedTuple):
+    """Indexes of a MultiWorld's locations. They're built together and only assigned once complete, so a thread reading
+    them never sees a partial index, see MultiWorld._get_location_index."""
+    positions: Dict[Location, int]
+    """the position of each location in MultiWorld.get_locations()"""
+    by_player: Dict[int, List[Location]]
+    unfilled: Dict[int, Set[Location]]
+    by_item: Dict[Tuple[str, int], Set[Location]]
+    """the locations holding each (item name, player)"""
+
+
 class MultiWorld():
     debug_types = False
     player_name: Dict[int, str]
@@ -47,6 +60,7 @@ class MultiWorld():
     is_race: bool = False
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
+    generation_profile: Utils.GenerationProfile
 
     accessibility: Dict[int, Options.Accessibility]
     early_items: Dict[int, Dict[str, int]]
@@ -83,8 +97,11 @@ class MultiWorld():
         self.precollected_items = {player: [] for player in self.player_ids}
         self._cached_entrances = None
         self._cached_locations = None
+        self._location_index: Optional[_LocationIndex] = None
         self._entrance_cache = {}
         self._location_cache: Dict[Tuple[str, int], Location] = {}
+        self._cached_spheres: Optional[Tuple[List[Optional[Item]], List[Set[Location]]]] = None
+        self._cached_sphere_record: Optional[Tuple[List[Optional[Item]], SphereRecord]] = None
         self.required_locations = []
         self.light_world_light_cone = False
         self.dark_world_light_cone = False
@@ -99,6 +116,7 @@ class MultiWorld():
         self.early_items = {player: {} for player in self.player_ids}
         self.local_early_items = {player: {} for player in self.player_ids}
         self.indirect_connections = {}
+        self.generation_profile = Utils.GenerationProfile()
         self.fix_trock_doors = self.AttributeProxy(
             lambda player: self.shuffle[player] != 'vanilla' or self.mode[player] == 'inverted')
         self.fix_skullwoods_exit = self.AttributeProxy(
@@ -329,7 +347,7 @@ class MultiWorld():
 
     def _recache(self):
         """Rebuild world cache"""
-        self._cached_locations = None
+        self.clear_location_cache()
         for region in self.regions:
             player = region.player
             self._region_cache[player][region.name] = region
@@ -392,16 +410,20 @@ class MultiWorld():
         return [loc.item for loc in self.get_filled_locations()] + self.itempool
 
     def find_item_locations(self, item, player: int) -> List[Location]:
-        return [location for location in self.get_locations() if
-                location.item and location.item.name == item and location.item.player == player]
+        index = self._get_location_index()
+        return self._sorted_locations(index, index.by_item.get((item, player), ()))
 
     def find_item(self, item, player: int) -> Location:
-        return next(location for location in self.get_locations() if
-                    location.item and location.item.name == item and location.item.player == player)
+        index = self._get_location_index()
+        locations = index.by_item.get((item, player), None)
+        if not locations:
+            raise StopIteration(f"{item} of player {player} is not placed in any location.")
+        return min(locations, key=index.positions.__getitem__)
 
     def find_items_in_locations(self, items: Set[str], player: int) -> List[Location]:
-        return [location for location in self.get_locations() if
-                location.item and location.item.name in items and location.item.player == player]
+        index = self._get_location_index()
+        return self._sorted_locations(index, [location for item in items
+                                              for location in index.by_item.get((item, player), ())])
 
     def create_item(self, item_name: str, player: int) -> Item:
         return self.worlds[player].create_item(item_name)
@@ -436,17 +458,62 @@ class MultiWorld():
         if self._cached_locations is None:
             self._cached_locations = [location for region in self.regions for location in region.locations]
         if player is not None:
-            return [location for location in self._cached_locations if location.player == player]
+            return list(self._get_location_index().by_player.get(player, ()))
         return self._cached_locations
 
     def clear_location_cache(self):
         self._cached_locations = None
+        self._location_index = None
+
+    def _get_location_index(self) -> _LocationIndex:
+        """The indexes of the locations in get_locations(), building them if needed."""
+        index = self._location_index
+        if index is None:
+            locations = self.get_locations()
+            by_player: Dict[int, List[Location]] = {}
+            unfilled: Dict[int, Set[Location]] = {}
+            by_item: Dict[Tuple[str, int], Set[Location]] = {}
+            for location in locations:
+                by_player.setdefault(location.player, []).append(location)
+                unfilled.setdefault(location.player, set())
+                if location.item is None:
+                    unfilled[location.player].add(location)
+                else:
+                    by_item.setdefault((location.item.name, location.item.player), set()).add(location)
+            index = _LocationIndex({location: position for position, location in enumerate(locations)},
+                                   by_player, unfilled, by_item)
+            self._location_index = index
+        return index
+
+    def _update_location_index(self, location: Location, old_item: Optional[Item], new_item: Optional[Item]):
+        """Called by Location when its item changes."""
+        index = self._location_index
+        if index is None or location not in index.positions:
+            return
+        if old_item is None:
+            index.unfilled[location.player].discard(location)
+        else:
+            index.by_item.get((old_item.name, old_item.player), set()).discard(location)
+        if new_item is None:
+            index.unfilled[location.player].add(location)
+        else:
+            index.by_item.setdefault((new_item.name, new_item.player), set()).add(location)
+
+    @staticmethod
+    def _sorted_locations(index: _LocationIndex, locations: Iterable[Location]) -> List[Location]:
+        return sorted(locations, key=index.positions.__getitem__)
 
     def get_unfilled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is None]
+        if player is not None:
+            index = self._get_location_index()
+            return self._sorted_locations(index, index.unfilled.get(player, ()))
+        return [location for location in self.get_locations() if location.item is None]
 
     def get_filled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is not None]
+        if player is not None:
+            return [location for location in self._get_location_index().by_player.get(player, ())
+                    if location.item is not None]
+        return [location for location in self.get_locations() if location.item is not None]
 
     def get_reachable_locations(self, state: Optional[CollectionState] = None, player: Optional[int] = None) -> List[Location]:
         state: CollectionState = state if state else self.state
@@ -492,14 +559,12 @@ class MultiWorld():
             state = CollectionState(self)
         prog_locations = {location for location in self.get_locations() if location.item
                           and location.item.advancement and location not in state.locations_checked}
+        search = SphereSearch(state, prog_locations)
 
         while prog_locations:
-            sphere = set()
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-            for location in prog_locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            sphere = search.find_reachable()
 
             if not sphere:
                 # ran out of places and did not finish yet, quit
@@ -514,16 +579,31 @@ class MultiWorld():
 
         return False
 
-    def get_spheres(self):
+    def _get_placement(self, cached: Optional[Tuple[List[Optional[Item]], Any]]) -> Optional[List[Optional[Item]]]:
+        """The current placement if it is not the one something got cached for."""
+        placement = [location.item for location in self.get_locations()]
+        placement.extend(item for items in self.precollected_items.values() for item in items)
+        # compared by identity, items of the same name may be different in other regards
+        if cached is None or len(cached[0]) != len(placement) \
+                or any(old is not new for old, new in zip(cached[0], placement)):
+            return placement
+        return None
+
+    def get_spheres(self) -> Iterator[Set[Location]]:
+        """Yields the spheres of all filled locations, followed by the unreachable locations if there are any.
+        The spheres are cached until items get placed, moved or precollected, so they must not be modified."""
+        placement = self._get_placement(self._cached_spheres)
+        if placement is not None:
+            self._cached_spheres = placement, list(self._search_spheres())
+        yield from self._cached_spheres[1]
+
+    def _search_spheres(self) -> Iterator[Set[Location]]:
         state = CollectionState(self)
         locations = set(self.get_filled_locations())
+        search = SphereSearch(state, locations)
 
         while locations:
-            sphere = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            sphere = search.find_reachable()
             yield sphere
             if not sphere:
                 if locations:
@@ -534,10 +614,60 @@ class MultiWorld():
                 state.collect(location.item, True, location)
             locations -= sphere
 
+    def get_sphere_record(self) -> SphereRecord:
+        """The spheres of the current placement as the output stage needs them, from a single search for all of
+        can_beat_game, fulfills_accessibility and the spoiler playthrough. Cached like get_spheres, so the record must
+        not be modified either."""
+        placement = self._get_placement(self._cached_sphere_record)
+        if placement is not None:
+            self._cached_sphere_record = placement, self._search_sphere_record()
+        return self._cached_sphere_record[1]
+
+    def _search_sphere_record(self) -> SphereRecord:
+        state = CollectionState(self)
+        locations = set(self.get_filled_locations())
+        search = SphereSearch(state, locations)
+        spheres: List[Set[Location]] = []
+        sphere_numbers: Dict[Location, int] = {}
+        progression_spheres: Optional[int] = None
+        beaten_sphere = 0 if self.has_beaten_game(state) else None
+        # items that only count once progression items run out, the ones fulfills_accessibility collects as well
+        held_back: List[Location] = []
+
+        def counts_for_accessibility(location: Location) -> bool:
+            return location.progress_type != LocationProgressType.EXCLUDED \
+                and (location.event or self.accessibility[location.player].current_key == "locations")
+
+        while True:
+            sphere = search.find_reachable()
+            if not sphere:
+                if progression_spheres is not None or not held_back:
+                    break
+                # what can_beat_game and the playthrough look at ends here
+                progression_spheres = len(spheres)
+                for location in held_back:
+                    state.collect(location.item, True, location)
+                continue
+
+            spheres.append(sphere)
+            for location in sphere:
+                sphere_numbers[location] = len(spheres)
+                if location.item.advancement or progression_spheres is not None and counts_for_accessibility(location):
+                    state.collect(location.item, True, location)
+                elif counts_for_accessibility(location):
+                    held_back.append(location)
+            locations -= sphere
+            if beaten_sphere is None and self.has_beaten_game(state):
+                beaten_sphere = len(spheres)
+
+        if progression_spheres is None:
+            progression_spheres = len(spheres)
+        return SphereRecord(spheres, sphere_numbers, progression_spheres, beaten_sphere, state)
+
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
-        """Check if accessibility rules are fulfilled with current or supplied state."""
-        if not state:
-            state = CollectionState(self)
+        """Check if accessibility rules are fulfilled with current or supplied state.
+        Without a state, the answer comes from the sphere record of the current placement, unless there are advancement
+        items at excluded locations."""
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -570,13 +700,27 @@ class MultiWorld():
                 return False  # still locations required to be collected
             return True
 
-        locations = [location for location in self.get_locations() if location_relevant(location)]
+        # the sphere record also collects advancement items at excluded locations, which this check doesn't
+        if not state and any(location.progress_type == LocationProgressType.EXCLUDED and location.item.advancement
+                             for location in self.get_filled_locations()):
+            state = CollectionState(self)
+        if not state:
+            record = self.get_sphere_record()
+            missing = {location for location in self.get_locations()
+                       if location_relevant(location) and location_condition(location)
+                       and location not in record.sphere_numbers
+                       and not (location.item is None and location.can_reach(record.state))}
+            if missing:
+                logging.warning(f"Could not access required locations for accessibility check."
+                                f" Missing: {missing}")
+            return not missing and record.beaten_sphere is not None
+
+        locations = {location for location in self.get_locations() if location_relevant(location)}
+        search = SphereSearch(state, locations)
 
         while locations:
-            sphere: List[Location] = []
-            for n in range(len(locations) - 1, -1, -1):
-                if locations[n].can_reach(state):
-                    sphere.append(locations.pop(n))
+            sphere = search.find_reachable()
+            locations -= sphere
 
             if not sphere:
                 # ran out of places and did not finish yet, quit
@@ -598,13 +742,213 @@ class MultiWorld():
 
 
 PathValue = Tuple[str, Optional["PathValue"]]
+ConnectionDependency = Tuple[Callable[["CollectionState"], bool], Optional[typing.FrozenSet[str]]]
+_no_changes: typing.FrozenSet[str] = frozenset()
+_no_compact_items: Dict[int, Tuple[Dict[str, int], array]] = {}
+
+
+class ItemCounter(Counter):
+    """Counter of (item name, player) that remembers which item names went up or down per player since they were
+    last popped, so CollectionState only has to re-check access rules that read those items."""
+    added: Dict[int, Set[str]]
+    removed: Dict[int, Set[str]]
+    compact: Dict[int, Tuple[Dict[str, int], array]]
+    """per compact player, the index of each item name and the array holding the counts at those indices,
+    always empty unless this is a CompactItemCounter"""
+
+    def __init__(self, *args, **kwargs):
+        self.added = {}
+        self.removed = {}
+        self.compact = {}
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key: Tuple[str, int], value: int):
+        changes = self.removed if value < self.get(key, 0) else self.added
+        super().__setitem__(key, value)
+        changes.setdefault(key[1], set()).add(key[0])
+
+    def __delitem__(self, key: Tuple[str, int]):
+        if key in self:
+            super().__delitem__(key)
+            self.removed.setdefault(key[1], set()).add(key[0])
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),), self.__dict__
+
+    def copy(self) -> ItemCounter:
+        ret = super().copy()
+        ret.added = {player: names.copy() for player, names in self.added.items()}
+        ret.removed = {player: names.copy() for player, names in self.removed.items()}
+        return ret
+
+    def pop_changes(self, player: int) -> Tuple[typing.AbstractSet[str], typing.AbstractSet[str]]:
+        """Returns the item names of player that were added and removed since the last call, then forgets them."""
+        return self.added.pop(player, _no_changes), self.removed.pop(player, _no_changes)
+
+
+class CompactItemCounter(ItemCounter):
+    """ItemCounter where the counts of the items of players set up with make_compact live in an array instead of the
+    dict. Only used if any world has compact item counts, as every lookup has to check for them."""
+
+    def __missing__(self, key: Tuple[str, int]) -> int:
+        compact = self.compact.get(key[1])
+        if compact:
+            index = compact[0].get(key[0])
+            if index is not None:
+                return compact[1][index]
+        return 0
+
+    def __contains__(self, key: Tuple[str, int]) -> bool:
+        compact = self.compact.get(key[1])
+        if compact:
+            index = compact[0].get(key[0])
+            if index is not None:
+                return compact[1][index] != 0
+        return super().__contains__(key)
+
+    def get(self, key: Tuple[str, int], default=None):
+        compact = self.compact.get(key[1])
+        if compact:
+            index = compact[0].get(key[0])
+            if index is not None:
+                return compact[1][index] or default
+        return super().get(key, default)
+
+    def __setitem__(self, key: Tuple[str, int], value: int):
+        name, player = key
+        compact = self.compact.get(player)
+        if compact and name in compact[0]:
+            index, counts = compact[0][name], compact[1]
+            old = counts[index]
+            counts[index] = value
+        else:
+            old = dict.get(self, key, 0)
+            dict.__setitem__(self, key, value)
+        (self.removed if value < old else self.added).setdefault(player, set()).add(name)
+
+    def __delitem__(self, key: Tuple[str, int]):
+        compact = self.compact.get(key[1])
+        if compact and key[0] in compact[0]:
+            if compact[1][compact[0][key[0]]]:
+                self[key] = 0
+        elif dict.__contains__(self, key):
+            dict.__delitem__(self, key)
+            self.removed.setdefault(key[1], set()).add(key[0])
+
+    def copy(self) -> CompactItemCounter:
+        ret = super().copy()
+        ret.compact = {player: (indices, copy.copy(counts)) for player, (indices, counts) in self.compact.items()}
+        return ret
+
+    def make_compact(self, player: int, indices: Dict[str, int]) -> None:
+        """Keeps the counts of player's item names in indices in an array at those indices from now on.
+        Iterating over the Counter does not include them."""
+        counts = array("i", [0]) * len(indices)
+        for name, index in indices.items():
+            counts[index] = dict.pop(self, (name, player), 0)
+        self.compact[player] = indices, counts
+
+
+class _DependencyRecorder:
+    """Stands in for a CollectionState mapping while an access rule is evaluated and records what the rule reads.
+    Anything but a plain key lookup marks the read as opaque, as it can not be attributed to specific keys."""
+    __slots__ = ("mapping", "read", "opaque")
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+        self.read = set()
+        self.opaque = False
+
+    def __getitem__(self, key):
+        self.read.add(key)
+        return self.mapping[key]
+
+    def get(self, key, default=None):
+        self.read.add(key)
+        return self.mapping.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        self.read.add(key)
+        return key in self.mapping
+
+    def __setitem__(self, key, value):
+        self.mapping[key] = value
+
+    def __delitem__(self, key):
+        del self.mapping[key]
+
+    def __iter__(self):
+        self.opaque = True
+        return iter(self.mapping)
+
+    def __len__(self) -> int:
+        self.opaque = True
+        return len(self.mapping)
+
+    def __eq__(self, other) -> bool:
+        self.opaque = True
+        return self.mapping == other
+
+    __hash__ = None
+
+    def __getattr__(self, name: str):
+        self.opaque = True
+        return getattr(self.mapping, name)
+
+
+class _ReadDetector:
+    """Stands in for a CollectionState mapping while an access rule is evaluated and only notes whether it was read
+    at all, for mappings whose reads make the rule's dependencies unknown anyway."""
+    __slots__ = ("mapping", "read")
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+        self.read = False
+
+    def __getitem__(self, key):
+        self.read = True
+        return self.mapping[key]
+
+    def __setitem__(self, key, value):
+        self.mapping[key] = value
+
+    def __getattr__(self, name: str):
+        self.read = True
+        return getattr(self.mapping, name)
+
+    def __iter__(self):
+        self.read = True
+        return iter(self.mapping)
+
+    def __contains__(self, key) -> bool:
+        self.read = True
+        return key in self.mapping
+
+    def __len__(self) -> int:
+        self.read = True
+        return len(self.mapping)
+
+    def __eq__(self, other) -> bool:
+        self.read = True
+        return self.mapping == other
+
+    __hash__ = None
 
 
 class CollectionState():
-    prog_items: typing.Counter[Tuple[str, int]]
+    prog_items: ItemCounter
+    compact_items: Dict[int, Tuple[Dict[str, int], array]]
+    """prog_items.compact, for the item count methods to skip building a key for worlds with compact item counts.
+    It's checked for being empty first, so multiworlds without those don't pay for a lookup on every item count."""
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
+    connection_dependencies: Dict[int, Dict[Entrance, ConnectionDependency]]
+    """per player, the access rule each traversed or blocked Entrance was last evaluated with and the item names
+    it read, None if it read anything else"""
+    shared_players: Set[int]
+    """players whose reachable_regions, blocked_connections and connection_dependencies entries may be shared with
+    copies of this state, so they have to be copied before they get changed"""
     events: Set[Location]
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
@@ -613,10 +957,16 @@ class CollectionState():
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld):
-        self.prog_items = Counter()
+        compact_players = [player for player, world in parent.worlds.items() if world.compact_item_counts]
+        self.prog_items = CompactItemCounter() if compact_players else ItemCounter()
+        for player in compact_players:
+            self.prog_items.make_compact(player, parent.worlds[player].item_name_to_index)
+        self.compact_items = self.prog_items.compact
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.connection_dependencies = {player: {} for player in parent.get_all_ids()}
+        self.shared_players = set()
         self.events = set()
         self.path = {}
         self.locations_checked = set()
@@ -629,16 +979,44 @@ class CollectionState():
 
     def update_reachable_regions(self, player: int):
         self.stale[player] = False
+        added, removed = self.prog_items.pop_changes(player)
+        start = self.multiworld.get_region('Menu', player)
+        track = self.multiworld.worlds[player].incremental_reachability
+
+        queue: Optional[typing.Deque[Entrance]] = None
+        if track and not removed and start in self.reachable_regions[player]:
+            queue = self._get_changed_connections(player, added, set())
+            if not queue:
+                # nothing can have changed, which also keeps structures shared with copies of this state shared
+                return
+        if player in self.shared_players:
+            self.reachable_regions[player] = self.reachable_regions[player].copy()
+            self.blocked_connections[player] = self.blocked_connections[player].copy()
+            self.connection_dependencies[player] = self.connection_dependencies[player].copy()
+            self.shared_players.remove(player)
         rrp = self.reachable_regions[player]
         bc = self.blocked_connections[player]
-        queue = deque(self.blocked_connections[player])
-        start = self.multiworld.get_region('Menu', player)
-
-        # init on first call - this can't be done on construction since the regions don't exist yet
-        if start not in rrp:
-            rrp.add(start)
-            bc.update(start.exits)
-            queue.extend(start.exits)
+        dependencies = self.connection_dependencies[player]
+
+        if queue is None:
+            retry: Optional[Set[Entrance]] = set()
+            if removed and start in rrp:
+                retry = self._retract_reachable_regions(player, removed) if track else None
+                if retry is None:
+                    # some region might depend on what was removed in a way that can't be traced, start over
+                    rrp.clear()
+                    bc.clear()
+
+            # init on first call - this can't be done on construction since the regions don't exist yet
+            if start not in rrp:
+                queue = deque(bc)
+                rrp.add(start)
+                bc.update(start.exits)
+                queue.extend(start.exits)
+            elif track:
+                queue = self._get_changed_connections(player, added | removed, retry)
+            else:
+                queue = deque(bc)
 
         # run BFS on all connections, and keep track of those blocked by missing items
         while queue:
@@ -646,7 +1024,7 @@ class CollectionState():
             new_region = connection.connected_region
             if new_region in rrp:
                 bc.remove(connection)
-            elif connection.can_reach(self):
+            elif self._can_traverse(connection, dependencies, track):
                 assert new_region, f"tried to search through an Entrance \"{connection}\" with no Region"
                 rrp.add(new_region)
                 bc.remove(connection)
@@ -659,16 +1037,119 @@ class CollectionState():
                     if new_entrance in bc and new_entrance not in queue:
                         queue.append(new_entrance)
 
+    def _get_changed_connections(self, player: int, changed: Set[str],
+                                 retry: Set[Entrance]) -> typing.Deque[Entrance]:
+        """Blocked connections that need to be searched again after the item names in changed went up or down.
+        Only connections whose rule read something that changed can have a different outcome now, the ones leading
+        to regions that got reached some other way are just cleaned up."""
+        rrp = self.reachable_regions[player]
+        dependencies = self.connection_dependencies[player]
+        queue = deque()
+        for connection in self.blocked_connections[player]:
+            rule, read = dependencies.get(connection, (None, None))
+            if read is None or rule is not connection.access_rule or not read.isdisjoint(changed) \
+                    or connection in retry or connection.connected_region in rrp:
+                queue.append(connection)
+        return queue
+
+    def _can_traverse(self, connection: Entrance, dependencies: Dict[Entrance, ConnectionDependency],
+                      track: bool) -> bool:
+        """Entrance.can_reach, which also records which of its player's items the access rule read when tracked."""
+        if not track:
+            return connection.can_reach(self)
+        if not connection.parent_region.can_reach(self):
+            return False
+        rule = connection.access_rule
+        read = None
+        previous = dependencies.get(connection)
+        if previous and previous[0] is rule and previous[1] is None:
+            # it read something that can't be tracked the last time, recording it again would most likely be wasted
+            access = rule(self)
+        else:
+            access, items_read = self._evaluate_recorded(rule)
+            if items_read is not None:
+                player = connection.player
+                names = set()
+                for item_name, item_player in items_read:
+                    if item_player != player:
+                        break
+                    names.add(item_name)
+                else:
+                    read = frozenset(names)
+            dependencies[connection] = (rule, read)
+        if access and not connection.hide_path and connection not in self.path:
+            self.path[connection] = (connection.name,
+                                     self.path.get(connection.parent_region, (connection.parent_region.name, None)))
+        return access
+
+    def _evaluate_recorded(self, rule: Callable[[CollectionState], bool]) \
+            -> Tuple[bool, Optional[typing.AbstractSet[Tuple[str, int]]]]:
+        """Evaluates an access rule and returns which prog_items keys it read, or None if it read anything else."""
+        # rules from worlds.generic.Rules know what they read without having to be recorded
+        dependencies = getattr(rule, "item_dependencies", False)
+        if dependencies is not False:
+            return rule(self), dependencies
+        prog_items, compact_items, reachable_regions = self.prog_items, self.compact_items, self.reachable_regions
+        items_read = self.prog_items = _DependencyRecorder(prog_items)
+        # have compact item counts read through prog_items as well
+        self.compact_items = _no_compact_items
+        # a rule looking at any region can change without an item changing, so those always get re-checked
+        regions_read = self.reachable_regions = _ReadDetector(reachable_regions)
+        try:
+            access = rule(self)
+        finally:
+            self.prog_items, self.compact_items, self.reachable_regions = prog_items, compact_items, reachable_regions
+        if regions_read.read or items_read.opaque:
+            return access, None
+        return access, items_read.read
+
+    def _retract_reachable_regions(self, player: int, removed: Set[str]) -> Optional[Set[Entrance]]:
+        """Un-reach the regions behind every traversed connection that read a removed item, so the following
+        search can find them again if they still are reachable. Returns the connections that lead back into them,
+        or None if what depends on the removed items can not be determined."""
+        rrp = self.reachable_regions[player]
+        bc = self.blocked_connections[player]
+        dependencies = self.connection_dependencies[player]
+        start = self.multiworld.get_region('Menu', player)
+        queue = deque()
+        for connection, (rule, read) in dependencies.items():
+            if connection not in bc and connection.parent_region in rrp and connection.connected_region in rrp:
+                if read is None or rule is not connection.access_rule:
+                    return None
+                if not read.isdisjoint(removed):
+                    queue.append(connection.connected_region)
+        retracted: Set[Region] = set()
+        while queue:
+            region = queue.popleft()
+            if region is not start and region in rrp and region not in retracted:
+                retracted.add(region)
+                queue.extend(exit_.connected_region for exit_ in region.exits)
+        if not retracted:
+            return set()
+        rrp -= retracted
+        bc.difference_update([connection for connection in bc if connection.parent_region in retracted])
+        retry = {exit_ for region in rrp for exit_ in region.exits if exit_.connected_region in retracted}
+        bc |= retry
+        return retry
+
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
+        # skip __init__, collecting the precollected items again would only be thrown away
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
         ret.prog_items = self.prog_items.copy()
-        ret.reachable_regions = {player: copy.copy(self.reachable_regions[player]) for player in
-                                 self.reachable_regions}
-        ret.blocked_connections = {player: copy.copy(self.blocked_connections[player]) for player in
-                                   self.blocked_connections}
+        ret.compact_items = ret.prog_items.compact
+        # both states share each player's structures until one of them updates that player's reachability
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
+        ret.connection_dependencies = self.connection_dependencies.copy()
+        self.shared_players.update(self.reachable_regions)
+        ret.shared_players = self.shared_players.copy()
         ret.events = copy.copy(self.events)
         ret.path = copy.copy(self.path)
         ret.locations_checked = copy.copy(self.locations_checked)
+        ret.stale = {player: True for player in self.stale}
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
@@ -705,21 +1186,39 @@ class CollectionState():
                 self.collect(event.item, True, event)
 
     def has(self, item: str, player: int, count: int = 1) -> bool:
+        compact = self.compact_items and self.compact_items.get(player)
+        if compact:
+            index = compact[0].get(item)
+            if index is not None:
+                return compact[1][index] >= count
         return self.prog_items[item, player] >= count
 
     def has_all(self, items: Set[str], player: int) -> bool:
+        compact = self.compact_items and self.compact_items.get(player)
+        if compact:
+            indices, counts = compact
+            return all(counts[indices[item]] if item in indices else self.prog_items[item, player] for item in items)
         return all(self.prog_items[item, player] for item in items)
 
     def has_any(self, items: Set[str], player: int) -> bool:
+        compact = self.compact_items and self.compact_items.get(player)
+        if compact:
+            indices, counts = compact
+            return any(counts[indices[item]] if item in indices else self.prog_items[item, player] for item in items)
         return any(self.prog_items[item, player] for item in items)
 
     def count(self, item: str, player: int) -> int:
+        compact = self.compact_items and self.compact_items.get(player)
+        if compact:
+            index = compact[0].get(item)
+            if index is not None:
+                return compact[1][index]
         return self.prog_items[item, player]
 
     def has_group(self, item_name_group: str, player: int, count: int = 1) -> bool:
         found: int = 0
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
-            found += self.prog_items[item_name, player]
+            found += self.count(item_name, player)
             if found >= count:
                 return True
         return False
@@ -727,7 +1226,7 @@ class CollectionState():
     def count_group(self, item_name_group: str, player: int) -> int:
         found: int = 0
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
-            found += self.prog_items[item_name, player]
+            found += self.count(item_name, player)
         return found
 
     def can_buy_unlimited(self, item: str, player: int) -> bool:
@@ -913,12 +1412,114 @@ class CollectionState():
     def remove(self, item: Item):
         changed = self.multiworld.worlds[item.player].remove(self, item)
         if changed:
-            # invalidate caches, nothing can be trusted anymore now
-            self.reachable_regions[item.player] = set()
-            self.blocked_connections[item.player] = set()
+            if not self.multiworld.worlds[item.player].incremental_reachability:
+                # invalidate caches, nothing can be trusted anymore now
+                self.reachable_regions[item.player] = set()
+                self.blocked_connections[item.player] = set()
+            # otherwise the next update retracts what depended on the removed items
             self.stale[item.player] = True
 
 
+class SphereSearch:
+    """Finds which of a set of locations are reachable with a state, round after round, while items get collected into
+    the state in between, like when building up spheres. Instead of checking every location each round, only those
+    that could have become reachable are checked again: locations whose region got reached and locations whose
+    access rule read an item count that changed since. Rules that read anything else are always checked again.
+    The set of locations is owned by the caller, who removes reachable locations from it as each one is only returned
+    once."""
+    state: CollectionState
+    locations: Set[Location]
+    pending: Set[Location]
+    """locations to check in the next round no matter what"""
+    by_region: Dict[Region, Set[Location]]
+    """locations that were not reachable because of their region"""
+    by_item: Dict[Tuple[str, int], Set[Location]]
+    """locations that were not reachable because of their access rule, by prog_items keys that rule read"""
+    item_counts: Dict[Tuple[str, int], int]
+    untracked_players: Set[int]
+
+    def __init__(self, state: CollectionState, locations: Set[Location]):
+        self.state = state
+        self.locations = locations
+        self.pending = set(locations)
+        self.by_region = {}
+        self.by_item = {}
+        self.item_counts = {}
+        worlds = state.multiworld.worlds
+        # logic state of these worlds is kept outside of prog_items, so their rules can't be tracked
+        self.untracked_players = {player for player, world in worlds.items() if not world.incremental_reachability}
+
+    def copy(self, state: CollectionState, locations: Set[Location]) -> SphereSearch:
+        """A search that continues from where this one is with a copy of its state and of its set of locations."""
+        ret = SphereSearch.__new__(SphereSearch)
+        ret.state = state
+        ret.locations = locations
+        ret.pending = self.pending.copy()
+        ret.by_region = {region: waiting.copy() for region, waiting in self.by_region.items()}
+        ret.by_item = {key: waiting.copy() for key, waiting in self.by_item.items()}
+        ret.item_counts = self.item_counts.copy()
+        ret.untracked_players = self.untracked_players
+        return ret
+
+    def find_reachable(self) -> Set[Location]:
+        """Returns the locations of the set that are reachable with the current state."""
+        state = self.state
+        check, self.pending = self.pending, set()
+        for region in [region for region in self.by_region if region.can_reach(state)]:
+            check |= self.by_region.pop(region)
+        prog_items = state.prog_items
+        for key in [key for key, count in self.item_counts.items() if prog_items[key] != count]:
+            check |= self.by_item.pop(key)
+            del self.item_counts[key]
+
+        reachable = set()
+        locations = self.locations
+        for location in check:
+            if location in locations and self._can_reach(location):
+                reachable.add(location)
+        return reachable
+
+    def _can_reach(self, location: Location) -> bool:
+        region = location.parent_region
+        if not region.can_reach(self.state):
+            self.by_region.setdefault(region, set()).add(location)
+            return False
+        if location.player in self.untracked_players or type(location).can_reach is not Location.can_reach:
+            self.pending.add(location)
+            return location.can_reach(self.state)
+        access, read = self.state._evaluate_recorded(location.access_rule)
+        if access:
+            return True
+        if read is None or not self.untracked_players.isdisjoint(player for _, player in read):
+            self.pending.add(location)
+        else:
+            prog_items = self.state.prog_items
+            for key in read:
+                self.by_item.setdefault(key, set()).add(location)
+                self.item_counts[key] = prog_items[key]
+        return False
+
+
+class SphereRecord(NamedTuple):
+    """What a sphere search over all filled locations found, see MultiWorld.get_sphere_record."""
+    spheres: List[Set[Location]]
+    """the spheres of the reachable filled locations, first collecting only progression items,
+    then also the other items fulfills_accessibility collects"""
+    sphere_numbers: Dict[Location, int]
+    """the sphere each reachable filled location is in, counting from 1"""
+    progression_spheres: int
+    """how many of the spheres were found with only progression items collected"""
+    beaten_sphere: Optional[int]
+    """after how many spheres every player has beaten their game, None if they can't"""
+    state: CollectionState
+    """the state with everything reachable collected"""
+
+    @property
+    def beatable(self) -> bool:
+        """If the game can be beaten with progression items only, like MultiWorld.can_beat_game finds out."""
+        return self.beaten_sphere is not None and self.beaten_sphere <= self.progression_spheres
+
+
 @unique
 class RegionType(IntEnum):
     Generic = 0
@@ -1101,7 +1702,7 @@ class Location:
     always_allow = staticmethod(lambda item, state: False)
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
     item_rule = staticmethod(lambda item: True)
-    item: Optional[Item] = None
+    _item: Optional[Item] = None
 
     def __init__(self, player: int, name: str = '', address: Optional[int] = None, parent: Optional[Region] = None):
         self.player = player
@@ -1109,6 +1710,18 @@ class Location:
         self.address = address
         self.parent_region = parent
 
+    @property
+    def item(self) -> Optional[Item]:
+        return self._item
+
+    @item.setter
+    def item(self, item: Optional[Item]):
+        # keep the location indexes of the MultiWorld up to date, however the item gets placed
+        region = getattr(self, "parent_region", None)
+        if region and region.multiworld:
+            region.multiworld._update_location_index(self, self._item, item)
+        self._item = item
+
     def can_fill(self, state: CollectionState, item: Item, check_access=True) -> bool:
         return (self.always_allow(state, item)
                 or ((self.progress_type != LocationProgressType.EXCLUDED or not (item.advancement or item.useful))
@@ -1374,23 +1987,27 @@ class Spoiler():
         from itertools import chain
         # get locations containing progress items
         multiworld = self.multiworld
+        phase_start = time.perf_counter()
         prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
         state_cache = [None]
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
+        # the spheres come from the sphere record of this placement, only the states in between are built up here
+        record = multiworld.get_sphere_record()
+        sphere_candidates = prog_locations.copy()
+        prog_spheres: List[Set[Location]] = []
+        for sphere in record.spheres[:record.progression_spheres]:
+            sphere = prog_locations.intersection(sphere)
+            if sphere:
+                prog_spheres.append(sphere)
+                sphere_candidates -= sphere
+        if sphere_candidates:
+            prog_spheres.append(set())
         logging.debug('Building up collection spheres.')
-        while sphere_candidates:
-
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
-
+        for sphere in prog_spheres:
             for location in sphere:
                 state.collect(location.item, True, location)
 
-            sphere_candidates -= sphere
             collection_spheres.append(sphere)
             state_cache.append(state.copy())
 
@@ -1408,26 +2025,66 @@ class Spoiler():
                     self.unreachables = sphere_candidates
                     break
 
+        logging.debug('Built collection spheres in %.2f seconds.', time.perf_counter() - phase_start)
+        phase_start = time.perf_counter()
+
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
         restore_later = {}
-        for num, sphere in reversed(tuple(enumerate(collection_spheres))):
-            to_delete = set()
-            for location in sphere:
-                # we remove the item at location and check if game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
-                old_item = location.item
+        beatable_checks = 0
+
+        def remove_items(locations: List[Location], starting_state: Optional[CollectionState]) -> bool:
+            """Removes the items at locations if the game is still beatable without them, returns if they were."""
+            nonlocal beatable_checks
+            beatable_checks += 1
+            logging.debug('Checking if %s are required to beat the game.',
+                          ", ".join(f"{location.item.name} (Player {location.item.player})" for location in locations))
+            old_items = [location.item for location in locations]
+            for location in locations:
                 location.item = None
-                if multiworld.can_beat_game(state_cache[num]):
-                    to_delete.add(location)
-                    restore_later[location] = old_item
+            if multiworld.can_beat_game(starting_state):
+                restore_later.update(zip(locations, old_items))
+                return True
+            # still required, got to keep them around
+            for location, old_item in zip(locations, old_items):
+                location.item = old_item
+            return False
+
+        def remove_from_unremovable(locations: List[Location], starting_state: Optional[CollectionState]) -> None:
+            """Removes what isn't required from locations, which together are known to be required."""
+            if len(locations) == 1:
+                return
+            first, second = locations[:len(locations) // 2], locations[len(locations) // 2:]
+            if remove_items(first, starting_state):
+                # as everything together is required, the rest is still required without the first half
+                remove_from_unremovable(second, starting_state)
+            else:
+                remove_from_unremovable(first, starting_state)
+                if not remove_items(second, starting_state):
+                    remove_from_unremovable(second, starting_state)
+
+        for num, sphere in reversed(tuple(enumerate(collection_spheres))):
+            # Removing items one after the other in this order decides what ends up in the playthrough.
+            # Logic only gets harder with fewer items, so once a group can be removed, so could each of its items
+            # one after the other. Removing growing groups and splitting up the ones that can't be removed leads to
+            # the same result, with far fewer checks when most items are not required.
+            locations = list(sphere)
+            group_size = 1
+            index = 0
+            while index < len(locations):
+                group = locations[index:index + group_size]
+                index += len(group)
+                if remove_items(group, state_cache[num]):
+                    group_size *= 2
                 else:
-                    # still required, got to keep it around
-                    location.item = old_item
+                    remove_from_unremovable(group, state_cache[num])
+                    group_size = 1
 
             # cull entries in spheres for spoiler walkthrough at end
-            sphere -= to_delete
+            sphere.difference_update(restore_later)
+        logging.debug('Culled collection spheres with %i beatable checks in %.2f seconds.', beatable_checks,
+                      time.perf_counter() - phase_start)
+        phase_start = time.perf_counter()
 
         # second phase, sphere 0
         removed_precollected = []
@@ -1439,6 +2096,8 @@ class Spoiler():
                 multiworld.push_precollected(item)
             else:
                 removed_precollected.append(item)
+        logging.debug('Culled precollected items in %.2f seconds.', time.perf_counter() - phase_start)
+        phase_start = time.perf_counter()
 
         # we are now down to just the required progress items in collection_spheres. Unfortunately
         # the previous pruning stage could potentially have made certain items dependant on others
@@ -1448,11 +2107,12 @@ class Spoiler():
 
         required_locations = {item for sphere in collection_spheres for item in sphere}
         state = CollectionState(multiworld)
+        search = SphereSearch(state, required_locations)
         collection_spheres = []
         while required_locations:
             state.sweep_for_events(key_only=True)
 
-            sphere = set(filter(state.can_reach, required_locations))
+            sphere = search.find_reachable()
 
             for location in sphere:
                 state.collect(location.item, True, location)
@@ -1466,6 +2126,9 @@ class Spoiler():
             if not sphere:
                 raise RuntimeError(f'Not all required items reachable. Unreachable locations: {required_locations}')
 
+        logging.debug('Built final collection spheres in %.2f seconds.', time.perf_counter() - phase_start)
+        phase_start = time.perf_counter()
+
         # we can finally output our playthrough
         self.playthrough = {"0": sorted([str(item) for item in
                                          chain.from_iterable(multiworld.precollected_items.values())
@@ -1476,6 +2139,7 @@ class Spoiler():
                 str(location): str(location.item) for location in sorted(sphere)}
         if create_paths:
             self.create_paths(state, collection_spheres)
+            logging.debug('Created paths in %.2f seconds.', time.perf_counter() - phase_start)
 
         # repair the multiworld again
         for location, item in restore_later.items():
@@ -1686,4 +2350,6 @@ def get_seed(seed=None) -> int:
 
 from worlds import AutoWorld
 
-auto_world = AutoWorld.World
+if typing.TYPE_CHECKING:
+    # only annotations use it, so AutoWorld doesn't have to be done importing when it imports this module
+    from worlds.AutoWorld import World as auto_world
@@ -395,17 +395,29 @@ class CommonContext:
 
     # DataPackage
     async def prepare_datapackage(self, relevant_games: typing.Set[str],
-                                  remote_datepackage_versions: typing.Dict[str, int]):
+                                  remote_datepackage_versions: typing.Dict[str, int],
+                                  remote_datapackage_checksums: typing.Optional[typing.Dict[str, str]] = None):
         """Validate that all data is present for the current multiworld.
         Download, assimilate and cache missing data from the server."""
         # by documentation any game can use Archipelago locations/items -> always relevant
         relevant_games.add("Archipelago")
+        if remote_datapackage_checksums is None:
+            remote_datapackage_checksums = {}
 
         cache_package = Utils.persistent_load().get("datapackage", {}).get("games", {})
         needed_updates: typing.Set[str] = set()
         for game in relevant_games:
             if game not in remote_datepackage_versions:
                 continue
+            remote_checksum: typing.Optional[str] = remote_datapackage_checksums.get(game)
+            if remote_checksum:  # also valid for custom datapackages, as it's based on the contents
+                if network_data_package["games"].get(game, {}).get("checksum") == remote_checksum:
+                    continue
+                if cache_package.get(game, {}).get("checksum") == remote_checksum:
+                    self.update_game(cache_package[game])
+                else:
+                    needed_updates.add(game)
+                continue
             remote_version: int = remote_datepackage_versions[game]
 
             if remote_version == 0:  # custom datapackage for this game
@@ -649,7 +661,8 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
                         logger.info('    %s (Player %d)' % (network_player.alias, network_player.slot))
 
             # update datapackage
-            await ctx.prepare_datapackage(set(args["games"]), args["datapackage_versions"])
+            await ctx.prepare_datapackage(set(args["games"]), args["datapackage_versions"],
+                                          args.get("datapackage_checksums", {}))
 
             await ctx.server_auth(args['password'])
 
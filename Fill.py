@@ -4,7 +4,8 @@ import collections
 import itertools
 from collections import Counter, deque
 
-from BaseClasses import CollectionState, Location, LocationProgressType, MultiWorld, Item, ItemClassification
+from BaseClasses import CollectionState, Location, LocationProgressType, MultiWorld, Item, ItemClassification, \
+    SphereSearch
 
 from worlds.AutoWorld import call_all
 from worlds.generic.Rules import add_item_rule
@@ -74,50 +75,21 @@ def fill_restrictive(world: MultiWorld, base_state: CollectionState, locations:
                 # we filled all reachable spots.
                 if swap:
                     # try swapping this item with previously placed items
-                    for (i, location) in enumerate(placements):
-                        placed_item = location.item
-                        # Unplaceable items can sometimes be swapped infinitely. Limit the
-                        # number of times we will swap an individual item to prevent this
-                        swap_count = swapped_items[placed_item.player,
-                                                   placed_item.name]
-                        if swap_count > 1:
-                            continue
-
-                        location.item = None
+                    i = find_swap(world, base_state, placements, item_to_place, swapped_items,
+                                  single_player_placement, perform_access_check)
+                    if i is not None:
+                        # Add this item to the existing placement, and
+                        # add the old item to the back of the queue
+                        spot_to_fill = placements.pop(i)
+                        placed_item = spot_to_fill.item
+                        spot_to_fill.item = None
                         placed_item.location = None
-                        swap_state = sweep_from_pool(base_state, [placed_item])
-                        # swap_state assumes we can collect placed item before item_to_place
-                        if (not single_player_placement or location.player == item_to_place.player) \
-                                and location.can_fill(swap_state, item_to_place, perform_access_check):
-
-                            # Verify that placing this item won't reduce available locations, which could happen with rules
-                            # that want to not have both items. Left in until removal is proven useful.
-                            prev_state = swap_state.copy()
-                            prev_loc_count = len(
-                                world.get_reachable_locations(prev_state))
-
-                            swap_state.collect(item_to_place, True)
-                            new_loc_count = len(
-                                world.get_reachable_locations(swap_state))
-
-                            if new_loc_count >= prev_loc_count:
-                                # Add this item to the existing placement, and
-                                # add the old item to the back of the queue
-                                spot_to_fill = placements.pop(i)
-
-                                swap_count += 1
-                                swapped_items[placed_item.player,
-                                              placed_item.name] = swap_count
-
-                                reachable_items[placed_item.player].appendleft(
-                                    placed_item)
-                                itempool.append(placed_item)
 
-                                break
+                        swapped_items[placed_item.player, placed_item.name] += 1
 
-                        # Item can't be placed here, restore original item
-                        location.item = placed_item
-                        placed_item.location = location
+                        reachable_items[placed_item.player].appendleft(
+                            placed_item)
+                        itempool.append(placed_item)
 
                     if spot_to_fill is None:
                         # Can't place this item, move on to the next
@@ -145,6 +117,77 @@ def fill_restrictive(world: MultiWorld, base_state: CollectionState, locations:
     itempool.extend(unplaced_items)
 
 
+def find_swap(world: MultiWorld, base_state: CollectionState, placements: typing.List[Location], item_to_place: Item,
+              swapped_items: typing.Counter[typing.Tuple[int, str]], single_player_placement: bool,
+              perform_access_check: bool) -> typing.Optional[int]:
+    """Index of the first placement whose item can be put back into the pool to make room for item_to_place,
+    None if there is none. Placements are left as they are.
+    Like the sweeps themselves, sharing one sweep between all placements relies on collecting items never making
+    event locations unreachable."""
+    if world.groups.get(item_to_place.player):
+        affected_players = {item_to_place.player, *world.groups[item_to_place.player]["players"]}
+    else:
+        affected_players = {item_to_place.player}
+
+    def count_reachable(state: CollectionState) -> int:
+        # collecting item_to_place only changes what its player can reach
+        return sum(len(world.get_reachable_locations(state, player)) for player in affected_players)
+
+    # every candidate state is this sweep, plus the placed item if it wasn't swept up from its location already
+    swept_state: typing.Optional[CollectionState] = None
+    # whether locations no longer get reachable by collecting item_to_place, which is the same for all candidates
+    # whose item is part of swept_state
+    swept_keeps_reachable: typing.Optional[bool] = None
+
+    for i, location in enumerate(placements):
+        placed_item = location.item
+        # Unplaceable items can sometimes be swapped infinitely. Limit the
+        # number of times we will swap an individual item to prevent this
+        if swapped_items[placed_item.player, placed_item.name] > 1:
+            continue
+        if single_player_placement and location.player != item_to_place.player:
+            continue
+        # rule out what doesn't depend on the state before sweeping for it
+        if type(location).can_fill is Location.can_fill and type(location).always_allow is Location.always_allow \
+                and "always_allow" not in vars(location) and not location.can_fill(base_state, item_to_place, False):
+            continue
+
+        if swept_state is None:
+            swept_state = sweep_from_pool(base_state)
+        location.item = None
+        placed_item.location = None
+        try:
+            if location in swept_state.events:
+                # collecting placed_item instead of sweeping it from location ends up at the same state
+                swap_state = swept_state
+            else:
+                swap_state = swept_state.copy()
+                swap_state.collect(placed_item, True)
+                swap_state.sweep_for_events()
+            # swap_state assumes we can collect placed item before item_to_place
+            if not location.can_fill(swap_state, item_to_place, perform_access_check):
+                continue
+
+            # Verify that placing this item won't reduce available locations, which could happen with rules
+            # that want to not have both items. Left in until removal is proven useful.
+            if swap_state is swept_state and swept_keeps_reachable is not None:
+                keeps_reachable = swept_keeps_reachable
+            else:
+                prev_loc_count = count_reachable(swap_state)
+                new_state = swap_state.copy()
+                new_state.collect(item_to_place, True)
+                keeps_reachable = count_reachable(new_state) >= prev_loc_count
+                if swap_state is swept_state:
+                    swept_keeps_reachable = keeps_reachable
+            if keeps_reachable:
+                return i
+        finally:
+            # restore original item
+            location.item = placed_item
+            placed_item.location = location
+    return None
+
+
 def remaining_fill(world: MultiWorld,
                    locations: typing.List[Location],
                    itempool: typing.List[Item]) -> None:
@@ -516,11 +559,27 @@ def balance_multiworld_progression(world: MultiWorld) -> None:
         }
         sphere_num: int = 1
         moved_item_count: int = 0
-
-        def get_sphere_locations(sphere_state: CollectionState,
-                                 locations: typing.Set[Location]) -> typing.Set[Location]:
-            sphere_state.sweep_for_events(key_only=True, locations=locations)
-            return {loc for loc in locations if sphere_state.can_reach(loc)}
+        search = SphereSearch(state, unchecked_locations)
+
+        def get_sphere_locations(search: SphereSearch) -> typing.Set[Location]:
+            search.state.sweep_for_events(key_only=True, locations=search.locations)
+            return search.find_reachable()
+
+        def sweep_for_sphere(search: SphereSearch) -> typing.Set[Location]:
+            """search.state.sweep_for_events for search.locations, only rechecking what each round of events can change.
+            Returns the locations already reached on the way, the search is left ready for get_sphere_locations."""
+            state = search.state
+            reachable: typing.Set[Location] = set()
+            new_events = True
+            while new_events:
+                found = search.find_reachable()
+                reachable |= found
+                new_events = {location for location in found if location.event and location not in state.events
+                              or getattr(location.item, "locked_dungeon_item", False)}
+                for location in new_events:
+                    state.events.add(location)
+                    state.collect(location.item, True, location)
+            return reachable
 
         def item_percentage(player: int, num: int) -> float:
             return num / total_locations_count[player]
@@ -529,7 +588,7 @@ def balance_multiworld_progression(world: MultiWorld) -> None:
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            sphere_locations = get_sphere_locations(search)
             for location in sphere_locations:
                 unchecked_locations.remove(location)
                 if not location.locked:
@@ -563,6 +622,7 @@ def balance_multiworld_progression(world: MultiWorld) -> None:
                     balancing_unchecked_locations = unchecked_locations.copy()
                     balancing_reachables = reachable_locations_count.copy()
                     balancing_sphere = sphere_locations.copy()
+                    balancing_search = search.copy(balancing_state, balancing_unchecked_locations)
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
@@ -577,7 +637,7 @@ def balance_multiworld_progression(world: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        balancing_sphere = get_sphere_locations(balancing_search)
                         for location in balancing_sphere:
                             balancing_unchecked_locations.remove(location)
                             if not location.locked:
@@ -600,25 +660,38 @@ def balance_multiworld_progression(world: MultiWorld) -> None:
                         items_to_test = list(candidate_items[player])
                         items_to_test.sort()
                         world.random.shuffle(items_to_test)
+                        # every candidate is tested from the same state, so they all continue from one search
+                        base_search = SphereSearch(state, locations_to_test)
+                        base_search.pending |= base_search.find_reachable()
+                        # whether an item has to be replaced only depends on the items collected without it,
+                        # which repeat for copies of the same item
+                        scored: typing.Dict[typing.FrozenSet[typing.Tuple[typing.Tuple[str, int], int]], bool] = {}
                         while items_to_test:
                             testing = items_to_test.pop()
-                            reducing_state = state.copy()
-                            for location in itertools.chain((
-                                l for l in items_to_replace
-                                if l.item.player == player
-                            ), items_to_test):
-                                reducing_state.collect(location.item, True, location)
-
-                            reducing_state.sweep_for_events(locations=locations_to_test)
-
-                            if world.has_beaten_game(balancing_state):
-                                if not world.has_beaten_game(reducing_state):
-                                    items_to_replace.append(testing)
-                            else:
-                                reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
-                                p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
-                                if p < threshold_percentages[player]:
-                                    items_to_replace.append(testing)
+                            collected = [l for l in items_to_replace if l.item.player == player] + items_to_test
+                            key = frozenset(Counter((l.item.name, l.item.player) for l in collected).items())
+                            replace = scored.get(key)
+                            if replace is None:
+                                reducing_state = state.copy()
+                                for location in collected:
+                                    reducing_state.collect(location.item, True, location)
+
+                                reducing_search = base_search.copy(reducing_state, locations_to_test)
+                                reduced_sphere = sweep_for_sphere(reducing_search)
+
+                                if world.has_beaten_game(balancing_state):
+                                    replace = not world.has_beaten_game(reducing_state)
+                                else:
+                                    # events can also take logic away, so what was reached before them is checked again
+                                    reduced_sphere = {location for location in reduced_sphere
+                                                      if location.can_reach(reducing_state)}
+                                    reduced_sphere |= get_sphere_locations(reducing_search)
+                                    p = item_percentage(player, reachable_locations_count[player] +
+                                                        len(reduced_sphere))
+                                    replace = p < threshold_percentages[player]
+                                scored[key] = replace
+                            if replace:
+                                items_to_replace.append(testing)
 
                     replaced_items = False
 
@@ -649,7 +722,11 @@ def balance_multiworld_progression(world: MultiWorld) -> None:
                     if replaced_items:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
                         unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
-                        for location in get_sphere_locations(state, unlocked):
+                        state.sweep_for_events(key_only=True, locations=unlocked)
+                        found = search.find_reachable()
+                        # the rest is part of the next sphere, where the search has to return it again
+                        search.pending |= found - unlocked
+                        for location in found & unlocked:
                             unchecked_locations.remove(location)
                             if not location.locked:
                                 reachable_locations_count[location.player] += 1
@@ -1,10 +1,10 @@
 import collections
+import contextlib
+import json
 import logging
 import os
 import time
-import zlib
 import concurrent.futures
-import pickle
 import tempfile
 import zipfile
 from typing import Dict, List, Tuple, Optional, Set
@@ -14,7 +14,7 @@ import worlds
 from worlds.alttp.Regions import is_main_entrance
 from Fill import distribute_items_restrictive, flood_items, balance_multiworld_progression, distribute_planned
 from worlds.alttp.Shops import SHOP_ID_START, total_shop_slots, FillDisabledShopSlots
-from Utils import output_path, get_options, __version__, version_tuple
+from Utils import output_path, get_options, __version__, version_tuple, dump_multidata
 from worlds.generic.Rules import locality_rules, exclusion_rules
 from worlds import AutoWorld
 
@@ -24,6 +24,32 @@ ordered_areas = (
     'Misery Mire', 'Turtle Rock', 'Ganons Tower', "Total"
 )
 
+# outputs that are compressed already without being zip files, they only get stored in the final archive
+precompressed_file_endings = (".archipelago", ".apz5")
+
+
+def add_to_archive(zf: zipfile.ZipFile, directory: str) -> None:
+    """Writes the files in directory to zf, storing the ones that are compressed already instead of compressing them
+    a second time."""
+    for file in os.scandir(directory):
+        if not file.is_file():
+            continue
+        if file.name.endswith(precompressed_file_endings) or zipfile.is_zipfile(file.path):
+            zf.write(file.path, arcname=file.name, compress_type=zipfile.ZIP_STORED)
+        else:
+            zf.write(file.path, arcname=file.name)
+
+
+@contextlib.contextmanager
+def remove_on_error(path: str):
+    """Removes the file at path if the block raises, so no incomplete output is left behind."""
+    try:
+        yield
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
 
 def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = None):
     if not baked_server_options:
@@ -78,35 +104,39 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, world.seed)
 
     logger.info("Found World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # listed from the data package, so worlds that aren't played don't get imported for it
+    games = worlds.network_data_package["games"]
+    longest_name = max(len(text) for text in games)
 
     max_item = 0
     max_location = 0
-    for cls in AutoWorld.AutoWorldRegister.world_types.values():
-        if cls.item_id_to_name:
-            max_item = max(max_item, max(cls.item_id_to_name))
-            max_location = max(max_location, max(cls.location_id_to_name))
+    for game in games.values():
+        if game["item_name_to_id"]:
+            max_item = max(max_item, max(game["item_name_to_id"].values()))
+            max_location = max(max_location, max(game["location_name_to_id"].values()))
 
     item_digits = len(str(max_item))
     location_digits = len(str(max_location))
-    item_count = len(str(max(len(cls.item_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
-    location_count = len(str(max(len(cls.location_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
+    item_count = len(str(max(len(game["item_name_to_id"]) for game in games.values())))
+    location_count = len(str(max(len(game["location_name_to_id"]) for game in games.values())))
     del max_item, max_location
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
-        if not cls.hidden and len(cls.item_names) > 0:
-            logger.info(f" {name:{longest_name}}: {len(cls.item_names):{item_count}} "
-                        f"Items (IDs: {min(cls.item_id_to_name):{item_digits}} - "
-                        f"{max(cls.item_id_to_name):{item_digits}}) | "
-                        f"{len(cls.location_names):{location_count}} "
-                        f"Locations (IDs: {min(cls.location_id_to_name):{location_digits}} - "
-                        f"{max(cls.location_id_to_name):{location_digits}})")
+    for name, game in games.items():
+        if not worlds.game_info[name].hidden and len(game["item_name_to_id"]) > 0:
+            logger.info(f" {name:{longest_name}}: {len(game['item_name_to_id']):{item_count}} "
+                        f"Items (IDs: {min(game['item_name_to_id'].values()):{item_digits}} - "
+                        f"{max(game['item_name_to_id'].values()):{item_digits}}) | "
+                        f"{len(game['location_name_to_id']):{location_count}} "
+                        f"Locations (IDs: {min(game['location_name_to_id'].values()):{location_digits}} - "
+                        f"{max(game['location_name_to_id'].values()):{location_digits}})")
 
     del item_digits, location_digits, item_count, location_count
 
     AutoWorld.call_stage(world, "assert_generate")
 
-    AutoWorld.call_all(world, "generate_early")
+    generation_processes: int = get_options()["generator"]["generation_processes"]
+
+    AutoWorld.call_all_parallel(world, "generate_early", generation_processes)
 
     logger.info('')
 
@@ -116,10 +146,10 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 world.push_precollected(world.create_item(item_name, player))
 
     logger.info('Creating World.')
-    AutoWorld.call_all(world, "create_regions")
+    AutoWorld.call_all_parallel(world, "create_regions", generation_processes)
 
     logger.info('Creating Items.')
-    AutoWorld.call_all(world, "create_items")
+    AutoWorld.call_all_parallel(world, "create_items", generation_processes)
 
     logger.info('Calculating Access Rules.')
 
@@ -227,7 +257,9 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
 
     logger.info("Running Item Plando")
 
-    distribute_planned(world)
+    profile = world.generation_profile
+    with profile.measure("distribute_planned"):
+        distribute_planned(world)
 
     logger.info('Running Pre Main Fill.')
 
@@ -236,29 +268,31 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     logger.info(f'Filling the world with {len(world.itempool)} items.')
 
     if world.algorithm == 'flood':
-        flood_items(world)  # different algo, biased towards early game progress items
+        with profile.measure("flood_items"):
+            flood_items(world)  # different algo, biased towards early game progress items
     elif world.algorithm == 'balanced':
-        distribute_items_restrictive(world)
+        with profile.measure("distribute_items_restrictive"):
+            distribute_items_restrictive(world)
 
     AutoWorld.call_all(world, 'post_fill')
 
     if world.players > 1:
-        balance_multiworld_progression(world)
+        with profile.measure("balance_multiworld_progression"):
+            balance_multiworld_progression(world)
 
     logger.info(f'Beginning output...')
     outfilebase = 'AP_' + world.seed_name
 
+    zipfilename = output_path(f"AP_{world.seed_name}.zip")
+    logger.info(f"Creating final archive at {zipfilename}")
     output = tempfile.TemporaryDirectory()
-    with output as temp_dir:
-        with concurrent.futures.ThreadPoolExecutor(world.players + 2) as pool:
-            check_accessibility_task = pool.submit(world.fulfills_accessibility)
-
-            output_file_futures = [pool.submit(AutoWorld.call_stage, world, "generate_output", temp_dir)]
-            for player in world.player_ids:
-                # skip starting a thread for methods that say "pass".
-                if AutoWorld.World.generate_output.__code__ is not world.worlds[player].generate_output.__code__:
-                    output_file_futures.append(
-                        pool.submit(AutoWorld.call_single, world, "generate_output", player, temp_dir))
+    with output as temp_dir, remove_on_error(zipfilename), \
+            zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
+                            compresslevel=get_options()["generator"]["zip_compression_level"]) as zf:
+        with profile.measure("output"), \
+                concurrent.futures.ThreadPoolExecutor(min(world.players, os.cpu_count() or 1) + 2) as pool:
+            # output worker processes get forked first, before the pool has started any threads
+            output_file_futures = AutoWorld.submit_generate_output(world, temp_dir, generation_processes, pool)
 
             # collect ER hint info
             er_hint_data: Dict[int, Dict[int, str]] = {}
@@ -313,6 +347,11 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                     oldmancaves.append(((location_id, player), (item.code, player)))
 
             FillDisabledShopSlots(world)
+            # only now the placement is final. The sphere record gets searched here, so the threads only read it
+            with profile.measure("sphere_record"):
+                world.get_sphere_record()
+            check_accessibility_task = pool.submit(profile.measure_call, "fulfills_accessibility",
+                                                   world.fulfills_accessibility)
 
             def write_multidata():
                 import NetUtils
@@ -394,39 +433,36 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 }
                 AutoWorld.call_all(world, "modify_multidata", multidata)
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
+                return dump_multidata(multidata)
 
-                with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(multidata)
-
-            multidata_task = pool.submit(write_multidata)
+            multidata_task = pool.submit(profile.measure_call, "write_multidata", write_multidata)
             if not check_accessibility_task.result():
-                if not world.can_beat_game():
+                # reuses the spheres recorded before the check
+                if not world.get_sphere_record().beatable:
                     raise Exception("Game appears as unbeatable. Aborting.")
                 else:
                     logger.warning("Location Accessibility requirements not fulfilled.")
 
             # retrieve exceptions via .result() if they occurred.
-            multidata_task.result()
+            zf.writestr(f'{outfilebase}.archipelago', multidata_task.result(), compress_type=zipfile.ZIP_STORED)
             for i, future in enumerate(concurrent.futures.as_completed(output_file_futures), start=1):
                 if i % 10 == 0 or i == len(output_file_futures):
                     logger.info(f'Generating output files ({i}/{len(output_file_futures)}).')
                 future.result()
+                # the files of each output are complete once it's done, so they can go into the archive right away
+                add_to_archive(zf, output_file_futures[future])
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            world.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            with profile.measure("create_playthrough"):
+                world.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         if args.spoiler:
-            world.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
-
-        zipfilename = output_path(f"AP_{world.seed_name}.zip")
-        logger.info(f"Creating final archive at {zipfilename}")
-        with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
-                             compresslevel=9) as zf:
-            for file in os.scandir(temp_dir):
-                zf.write(file.path, arcname=file.name)
+            with profile.measure("spoiler"):
+                world.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
+
+        add_to_archive(zf, temp_dir)
+        zf.writestr(f"{outfilebase}_Profile.json", json.dumps(profile.to_dict()))
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return world
@@ -6,6 +6,8 @@ import functools
 import logging
 import zlib
 import collections
+import concurrent.futures
+import copy
 import typing
 import inspect
 import weakref
@@ -17,6 +19,8 @@ import itertools
 import time
 import operator
 import hashlib
+import mmap
+import os
 
 import ModuleUpdate
 
@@ -24,11 +28,6 @@ ModuleUpdate.update()
 
 import websockets
 import colorama
-try:
-    # ponyorm is a requirement for webhost, not default server, so may not be importable
-    from pony.orm.dbapiprovider import OperationalError
-except ImportError:
-    OperationalError = ConnectionError
 
 import NetUtils
 import Utils
@@ -108,6 +107,93 @@ class Client(Endpoint):
 team_slot = typing.Tuple[int, int]
 
 
+class SaveJournal:
+    """Changes to the save data since it was last written. Saving appends them as an entry to a journal next to the
+    save file, so it costs what happened since. Once the journal outgrows the save file, both get compacted into a new
+    save file. Entries are zlib compressed pickles, each preceded by its length as 4 bytes, the first entry is the id
+    of the save file the journal belongs to."""
+    # parts of the save data that entries hold the changes of, the rest is small and in every entry as it is
+    journaled_keys = ("connect_names", "location_checks", "received_items", "hints", "stored_data")
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.save_id = 0
+        self.save_size = 0
+        self.size = 0
+        self.location_checks: typing.Dict[team_slot, typing.Set[int]] = collections.defaultdict(set)
+        self.hints: typing.List[typing.Tuple[int, int, NetUtils.Hint]] = []
+        self.stored_data: typing.Set[str] = set()
+        # lengths of the received items lists, which only ever get appended to, as of the last save
+        self.received_items: typing.Dict[typing.Tuple[int, int, bool], int] = {}
+
+    def reset(self, ctx: Context):
+        self.location_checks = collections.defaultdict(set)
+        self.hints = []
+        self.stored_data = set()
+        self.received_items = {key: len(items) for key, items in ctx.received_items.items()}
+
+    def create_entry(self, ctx: Context, savedata: dict) -> dict:
+        entry = {key: value for key, value in savedata.items() if key not in self.journaled_keys}
+        entry["location_checks"] = dict(self.location_checks)
+        entry["received_items"] = {}
+        for key, items in ctx.received_items.items():
+            saved = self.received_items.get(key, 0)
+            if len(items) > saved:
+                entry["received_items"][key] = saved, items[saved:]
+        entry["hints"] = self.hints
+        entry["stored_data"] = {key: ctx.stored_data[key] for key in self.stored_data}
+        self.reset(ctx)
+        return entry
+
+    @staticmethod
+    def apply_entry(savedata: dict, entry: dict):
+        for key, locations in entry.pop("location_checks").items():
+            savedata["location_checks"].setdefault(key, set()).update(locations)
+        for key, (saved, items) in entry.pop("received_items").items():
+            savedata["received_items"].setdefault(key, [])[saved:] = items
+        for team, slot, hint in entry.pop("hints"):
+            savedata["hints"].setdefault((team, slot), set()).add(hint)
+        savedata["stored_data"].update(entry.pop("stored_data"))
+        savedata.update(entry)
+
+    def append(self, data: typing.Any):
+        encoded = zlib.compress(pickle.dumps(data))
+        with open(self.filename, "ab") as f:
+            if not self.size:
+                header = zlib.compress(pickle.dumps(self.save_id))
+                f.write(len(header).to_bytes(4, "little") + header)
+                self.size += 4 + len(header)
+            f.write(len(encoded).to_bytes(4, "little") + encoded)
+        self.size += 4 + len(encoded)
+
+    def read(self) -> typing.List[dict]:
+        """The entries of the journal, if it belongs to the save file with save_id."""
+        try:
+            with open(self.filename, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        entries = []
+        position = 0
+        while position + 4 <= len(data):
+            length = int.from_bytes(data[position:position + 4], "little")
+            if position + 4 + length > len(data):
+                break  # the last entry didn't get written completely
+            entries.append(restricted_loads(zlib.decompress(data[position + 4:position + 4 + length])))
+            position += 4 + length
+        if not entries or entries[0] != self.save_id:  # from before the save file got compacted
+            return []
+        self.size = position
+        return entries[1:]
+
+    def remove(self):
+        self.size = 0
+        try:
+            os.remove(self.filename)
+        except FileNotFoundError:
+            pass
+
+
 class Context:
     dumper = staticmethod(encode)
     loader = staticmethod(decode)
@@ -157,6 +243,9 @@ class Context:
         self.allow_forfeits = {}
         #                          player          location_id     item_id  target_player_id
         self.locations = {}
+        # reverse indexes of locations, by (receiving player, item id) and by receiving player and finding player
+        self.item_locations: typing.Dict[typing.Tuple[int, int], typing.List[typing.Tuple[int, int]]] = {}
+        self.receiver_locations: typing.Dict[int, typing.Dict[int, typing.Set[int]]] = {}
         self.host = host
         self.port = port
         self.server_password = server_password
@@ -164,6 +253,9 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        # slots that got items since their clients were last sent theirs, see send_new_items
+        self.new_items_slots: typing.Set[team_slot] = set()
+        self.send_new_items_handle: typing.Optional[asyncio.Handle] = None
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -171,6 +263,11 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[NetUtils.Hint]] = collections.defaultdict(set)
+        # not yet found hints by (team, finding player, location), with the slots that have them, see add_hints
+        self.hint_locations: typing.Dict[typing.Tuple[int, int, int], typing.Set[typing.Tuple[int, NetUtils.Hint]]] \
+            = collections.defaultdict(set)
+        # only used for saves to a file, WebHost saves to its database
+        self.save_journal: typing.Optional[SaveJournal] = None
         self.forfeit_mode: str = forfeit_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -189,6 +286,11 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread = None
         self.save_dirty = False
+        self.save_loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self.save_writer: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # how long taking the last snapshot of the save data and writing it took, in seconds
+        self.save_snapshot_time = 0.0
+        self.save_write_time = 0.0
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Utils.Version] = {}
@@ -198,10 +300,17 @@ class Context:
         self.random = random.Random()
         self.stored_data = {}
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        # connected clients by team and the tag or game that Bounce packets can target them by, see index_client
+        self.tag_clients: typing.Dict[typing.Tuple[int, str], typing.Set[Client]] = \
+            collections.defaultdict(weakref.WeakSet)
+        self.game_clients: typing.Dict[typing.Tuple[int, str], typing.Set[Client]] = \
+            collections.defaultdict(weakref.WeakSet)
         self.read_data = {}
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
+        # encoded '"game":{GameData}' fragments of DataPackage messages, by game
+        self.encoded_gamespackage: typing.Dict[str, str] = {}
         self.item_name_groups = {}
         self.all_item_and_group_names = {}
         self.forced_auto_forfeits = collections.defaultdict(lambda: False)
@@ -214,11 +323,12 @@ class Context:
         import worlds
         self.gamespackage = worlds.network_data_package["games"]
 
-        self.item_name_groups = {world_name: world.item_name_groups for world_name, world in
-                                 worlds.AutoWorldRegister.world_types.items()}
-        for world_name, world in worlds.AutoWorldRegister.world_types.items():
-            self.forced_auto_forfeits[world_name] = world.forced_auto_forfeit
-            self.non_hintable_names[world_name] = world.hint_blacklist
+        # from the worlds manifest, so no world has to be imported
+        self.item_name_groups = {world_name: game_info.item_name_groups for world_name, game_info in
+                                 worlds.game_info.items()}
+        for world_name, game_info in worlds.game_info.items():
+            self.forced_auto_forfeits[world_name] = game_info.forced_auto_forfeit
+            self.non_hintable_names[world_name] = game_info.hint_blacklist
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -228,6 +338,9 @@ class Context:
                 self.location_names[location_id] = location_name
             self.all_item_and_group_names[game_name] = \
                 set(game_package["item_name_to_id"]) | set(self.item_name_groups[game_name])
+        # games of this multiworld are the ones clients ask for, the others get encoded when first asked for
+        self.encoded_gamespackage = {}
+        self.get_encoded_data_package({"Archipelago", *self.games.values()})
 
     def item_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["item_name_to_id"] if game in self.gamespackage else None
@@ -235,6 +348,18 @@ class Context:
     def location_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
+    def get_encoded_data_package(self, games: typing.Iterable[str]) -> str:
+        """Encoded DataPackage message of the known ones of games, assembled from their cached encoded data."""
+        fragments = []
+        for game in games:
+            if game in self.gamespackage:
+                fragment = self.encoded_gamespackage.get(game, None)
+                if fragment is None:
+                    fragment = self.encoded_gamespackage[game] = \
+                        f"{self.dumper(game)}:{self.dumper(self.gamespackage[game])}"
+                fragments.append(fragment)
+        return f'[{{"cmd":"DataPackage","data":{{"games":{{{",".join(fragments)}}}}}}}]'
+
     # General networking
     async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
@@ -291,11 +416,36 @@ class Context:
         msgs = self.dumper(msgs)
         async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
 
+    def index_client(self, client: Client):
+        """Adds a connected client to the indexes Bounce packets get routed by, has to be undone by unindex_client
+        before its team, slot or tags change."""
+        self.game_clients[client.team, self.games[client.slot]].add(client)
+        for tag in client.tags:
+            self.tag_clients[client.team, tag].add(client)
+
+    def unindex_client(self, client: Client):
+        self.game_clients[client.team, self.games[client.slot]].discard(client)
+        for tag in client.tags:
+            self.tag_clients[client.team, tag].discard(client)
+
+    def get_bounce_targets(self, team: int, games: typing.Iterable[str], tags: typing.Iterable[str],
+                           slots: typing.Iterable[int]) -> typing.Set[Client]:
+        """Connected clients of team that play one of games, have one of tags or are connected to one of slots."""
+        targets: typing.Set[Client] = set()
+        for game in games:
+            targets.update(self.game_clients.get((team, game), ()))
+        for tag in tags:
+            targets.update(self.tag_clients.get((team, tag), ()))
+        for slot in slots:
+            targets.update(self.clients[team].get(slot, ()))
+        return targets
+
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
             self.endpoints.remove(endpoint)
         if endpoint.slot and endpoint in self.clients[endpoint.team][endpoint.slot]:
             self.clients[endpoint.team][endpoint.slot].remove(endpoint)
+            self.unindex_client(endpoint)
         await on_client_disconnected(self, endpoint)
 
     # text
@@ -334,18 +484,26 @@ class Context:
                         break
                 else:
                     raise Exception("No .archipelago found in archive.")
+            self._load(self.decompress(data), use_embedded_server_options)
         else:
-            with open(multidatapath, 'rb') as f:
-                data = f.read()
-
-        self._load(self.decompress(data), use_embedded_server_options)
+            # sections of the current format get read from the map only when they're needed, the ones loading
+            # doesn't need get copied out of it, so the file doesn't stay open
+            with open(multidatapath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                multidata = self.decompress(data)
+                try:
+                    self._load(multidata, use_embedded_server_options)
+                finally:
+                    if isinstance(multidata, Utils.MultiData):
+                        multidata.release()
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
+    def decompress(data: typing.Union[bytes, mmap.mmap]) -> typing.Mapping[str, typing.Any]:
         format_version = data[0]
-        if format_version > 3:
+        if format_version > Utils.multidata_format_version:
             raise Utils.VersionException("Incompatible multidata.")
+        if format_version == Utils.multidata_format_version:
+            return Utils.MultiData(data)
         return restricted_loads(zlib.decompress(data[1:]))
 
     def _load(self, decoded_obj: dict, use_embedded_server_options: bool):
@@ -367,14 +525,15 @@ class Context:
                 self.player_names[team, player] = name
                 self.player_name_lookup[name] = team, player
                 self.read_data[f"hints_{team}_{player}"] = lambda local_team=team, local_player=player: \
-                    list(self.get_rechecked_hints(local_team, local_player))
+                    list(self.hints[local_team, local_player])
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
         self.locations = decoded_obj['locations']
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        # slot_data gets decoded once it's read, which for most slots only happens when they connect
+        for slot in self.slot_data:
+            self.read_data[f"slot_data_{slot}"] = lambda local_slot=slot: self.slot_data[local_slot]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -384,7 +543,7 @@ class Context:
 
         for team in range(len(decoded_obj['names'])):
             for slot, hints in decoded_obj["precollected_hints"].items():
-                self.hints[team, slot].update(hints)
+                self.add_hints(team, slot, hints)
         if "slot_info" in decoded_obj:
             self.slot_info = decoded_obj["slot_info"]
             self.games = {slot: slot_info.game for slot, slot_info in self.slot_info.items()}
@@ -405,6 +564,12 @@ class Context:
                 for location, item_data in locations.items():
                     if len(item_data) < 3:
                         locations[location] = (*item_data, 0)
+        self.item_locations = collections.defaultdict(list)
+        self.receiver_locations = collections.defaultdict(lambda: collections.defaultdict(set))
+        for finding_player, locations in self.locations.items():
+            for location_id, (item_id, receiving_player, _) in locations.items():
+                self.item_locations[receiving_player, item_id].append((finding_player, location_id))
+                self.receiver_locations[receiving_player][finding_player].add(location_id)
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
             if slot_info.type.always_goal:
@@ -416,11 +581,14 @@ class Context:
             self._set_options(server_options)
 
         # custom datapackage
+        from worlds import data_package_checksum
         for game_name, data in decoded_obj.get("datapackage", {}).items():
             logging.info(f"Loading custom datapackage for game {game_name}")
             self.gamespackage[game_name] = data
             self.item_name_groups[game_name] = data["item_name_groups"]
             del data["item_name_groups"]  # remove from datapackage, but keep in self.item_name_groups
+            if "checksum" not in data:  # generated before checksums were added
+                data["checksum"] = data_package_checksum(data)
         self._init_game_data()
         for game_name, data in self.item_name_groups.items():
             self.read_data[f"item_name_groups_{game_name}"] = lambda lgame=game_name: self.item_name_groups[lgame]
@@ -439,36 +607,112 @@ class Context:
         return False
 
     def _save(self, exit_save: bool = False) -> bool:
+        """Saves and waits for the save to be written. Has to be called from the thread of the running event loop or,
+        on exit, after it stopped."""
+        if exit_save:
+            if self.save_writer:  # lets queued writes finish first
+                self.save_writer.shutdown()
+                self.save_writer = None
+            return self.write_save(self.snapshot_save(True), True)
+        return self.queue_save().result()
+
+    def queue_save(self) -> concurrent.futures.Future:
+        """Takes a snapshot of the save data, then compresses and writes it in the save writer thread, in the order
+        the snapshots were taken in. Has to be called from the thread of the running event loop, which is what keeps
+        the snapshot consistent."""
+        snapshot = self.snapshot_save()
+        if not self.save_writer:
+            self.save_writer = concurrent.futures.ThreadPoolExecutor(1, "SaveWriter")
+        return self.save_writer.submit(self.write_save, snapshot)
+
+    def snapshot_save(self, exit_save: bool = False) -> typing.Tuple[dict, bool]:
+        """Copy of what needs to be saved that later changes don't affect, and whether it is a journal entry.
+        Only copies the containers, as the values in them don't get changed in place."""
+        start = time.perf_counter()
+        savedata = self.get_save()
+        small = copy.deepcopy({key: value for key, value in savedata.items()
+                               if key not in SaveJournal.journaled_keys})
+        journal = self.save_journal
+        if journal and not exit_save and journal.save_size and journal.size < journal.save_size:
+            snapshot = journal.create_entry(self, small), True
+        else:
+            savedata.update(small)
+            savedata["location_checks"] = {key: set(locations) for key, locations
+                                           in savedata["location_checks"].items()}
+            savedata["received_items"] = {key: list(items) for key, items in savedata["received_items"].items()}
+            savedata["hints"] = {key: set(hints) for key, hints in savedata["hints"].items()}
+            savedata["stored_data"] = dict(savedata["stored_data"])
+            if journal:
+                journal.save_id += 1
+                savedata["journal_id"] = journal.save_id
+                journal.reset(self)
+            snapshot = savedata, False
+        self.save_snapshot_time = time.perf_counter() - start
+        return snapshot
+
+    def write_save(self, snapshot: typing.Tuple[dict, bool], exit_save: bool = False) -> bool:
+        start = time.perf_counter()
+        savedata, journal_entry = snapshot
+        journal = self.save_journal
         try:
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            if journal_entry:
+                journal.append(savedata)
+            else:
+                encoded_save = zlib.compress(pickle.dumps(savedata))
+                # replaces the save file only once it's complete, failing to write it leaves the last one as it was
+                with open(self.save_filename + "_new", "wb") as f:
+                    f.write(encoded_save)
+                os.replace(self.save_filename + "_new", self.save_filename)
+                if journal:
+                    journal.save_size = len(encoded_save)
+                    journal.remove()
         except Exception as e:
             logging.exception(e)
+            if journal:
+                # the journal got reset by the snapshot, so what changed since the last save is only in the data
+                # this failed to write, which the next save has to be complete to cover again
+                journal.save_size = 0
             return False
         else:
+            self.save_write_time = time.perf_counter() - start
+            logging.debug(f"Saved {'journal entry' if journal_entry else 'save file'}, snapshot took "
+                          f"{self.save_snapshot_time * 1000:.2f} ms, writing {self.save_write_time * 1000:.2f} ms.")
             return True
 
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
             if not self.save_filename:
-                import os
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
+            self.save_journal = SaveJournal(self.save_filename + "_journal")
             try:
                 with open(self.save_filename, 'rb') as f:
-                    save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                    encoded_save = f.read()
+                save_data = restricted_loads(zlib.decompress(encoded_save))
+                self.save_journal.save_id = save_data.get("journal_id", 0)
+                self.save_journal.save_size = len(encoded_save)
+                for entry in self.save_journal.read():
+                    self.save_journal.apply_entry(save_data, entry)
+                self.set_save(save_data)
+                self.save_journal.reset(self)
             except FileNotFoundError:
                 logging.error('No save data found, starting a new game')
             except Exception as e:
                 logging.exception(e)
             self._start_async_saving()
 
+    async def async_queue_save(self) -> concurrent.futures.Future:
+        return self.queue_save()
+
     def _start_async_saving(self):
         if not self.auto_saver_thread:
+            try:
+                self.save_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.save_loop = None
+
             def save_regularly():
                 # time.time() is platform dependent, so using the expensive datetime method instead
                 def get_datetime_second():
@@ -482,12 +726,17 @@ class Context:
                         time.sleep(max(1.0, next_wakeup))
                         if self.save_dirty:
                             logging.debug("Saving via thread.")
-                            self._save()
-                    except OperationalError as e:
+                            self.save_dirty = False
+                            if self.save_loop and self.save_loop.is_running():
+                                # snapshot on the event loop, as it changes the save data
+                                asyncio.run_coroutine_threadsafe(self.async_queue_save(), self.save_loop) \
+                                    .result().result()
+                            else:
+                                self.write_save(self.snapshot_save())
+                    except Exception as e:  # like the database of the WebHost being unavailable
                         logging.exception(e)
                         logging.info(f"Saving failed. Retry in {self.auto_save_interval} seconds.")
-                    else:
-                        self.save_dirty = False
+                        self.save_dirty = True
             self.auto_saver_thread = threading.Thread(target=save_regularly, daemon=True)
             self.auto_saver_thread.start()
 
@@ -495,7 +744,6 @@ class Context:
             atexit.register(self._save, True)  # make sure we save on exit too
 
     def get_save(self) -> dict:
-        self.recheck_hints()
         d = {
             "version": self.save_version,
             "connect_names": self.connect_names,
@@ -557,6 +805,7 @@ class Context:
 
         if "stored_data" in savedata:
             self.stored_data = savedata["stored_data"]
+        self.recheck_hints()
         # count items and slots from lists for items_handling = remote
         logging.info(
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
@@ -569,17 +818,30 @@ class Context:
             return max(0, int(self.hint_cost * 0.01 * len(self.locations[slot])))
         return 0
 
-    def recheck_hints(self, team: typing.Optional[int] = None, slot: typing.Optional[int] = None):
-        for hint_team, hint_slot in self.hints:
-            if (team is None or team == hint_team) and (slot is None or slot == hint_slot):
-                self.hints[hint_team, hint_slot] = {
-                    hint.re_check(self, hint_team) for hint in
-                    self.hints[hint_team, hint_slot]
-                }
-
-    def get_rechecked_hints(self, team: int, slot: int):
-        self.recheck_hints(team, slot)
-        return self.hints[team, slot]
+    def add_hints(self, team: int, slot: int, hints: typing.Iterable[NetUtils.Hint]):
+        """Remember hints for a slot. The ones that aren't found yet get marked found by register_location_checks."""
+        slot_hints = self.hints[team, slot]
+        for hint in hints:
+            hint = hint.re_check(self, team)
+            slot_hints.add(hint)
+            if not hint.found:
+                self.hint_locations[team, hint.finding_player, hint.location].add((slot, hint))
+
+    def mark_hints_found(self, team: int, slot: int, locations: typing.Iterable[int]):
+        """Marks the hints for newly checked locations of a slot as found."""
+        for location in locations:
+            for hint_slot, hint in self.hint_locations.pop((team, slot, location), ()):
+                slot_hints = self.hints[team, hint_slot]
+                if hint in slot_hints:
+                    slot_hints.remove(hint)
+                    slot_hints.add(hint._replace(found=True))
+
+    def recheck_hints(self):
+        """Rebuilds which hints are found from the location checks, for after both got loaded."""
+        self.hint_locations.clear()
+        for (team, slot), hints in list(self.hints.items()):
+            self.hints[team, slot] = set()
+            self.add_hints(team, slot, hints)
 
     def get_players_package(self):
         return [NetworkPlayer(t, p, self.get_aliased_name(t, p), n) for (t, p), n in self.player_names.items()]
@@ -633,11 +895,14 @@ class Context:
                 # since hints are bidirectional, finding player and receiving player,
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
-                    self.hints[team, hint.finding_player].add(hint)
+                    self.add_hints(team, hint.finding_player, (hint,))
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
-                        self.hints[team, player].add(hint)
+                        self.add_hints(team, player, (hint,))
                         new_hint_events.add(player)
+                    if self.save_journal:
+                        self.save_journal.hints.extend((team, player, hint) for player
+                                                       in {hint.finding_player, *self.slot_set(hint.receiving_player)})
 
             logging.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
         for slot in new_hint_events:
@@ -727,6 +992,8 @@ async def on_client_connected(ctx: Context, client: Client):
         'location_check_points': ctx.location_check_points,
         'datapackage_versions': {game: game_data["version"] for game, game_data
                                  in ctx.gamespackage.items()},
+        'datapackage_checksums': {game: game_data["checksum"] for game, game_data
+                                  in ctx.gamespackage.items()},
         'seed_name': ctx.seed_name,
         'time': time.time(),
     }])
@@ -841,19 +1108,37 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+    """Sends ReceivedItems to the clients of the slots in ctx.new_items_slots. Within the event loop, this is done once
+    at its next iteration, so any number of checks registered until then result in a single message per client."""
+    if ctx.send_new_items_handle:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush_new_items(ctx)
+    else:
+        ctx.send_new_items_handle = loop.call_soon(flush_new_items, ctx)
+
+
+def flush_new_items(ctx: Context):
+    ctx.send_new_items_handle = None
+    new_items_slots, ctx.new_items_slots = ctx.new_items_slots, set()
+    for team, slot in new_items_slots:
+        # clients that are sent the same items share their message
+        messages: typing.Dict[typing.Tuple[int, bool, bool], typing.List[Client]] = collections.defaultdict(list)
+        for client in ctx.clients[team].get(slot, ()):
+            if not client.no_items:
+                messages[client.send_index, client.remote_start_inventory, client.remote_items].append(client)
+        for (send_index, remote_start_inventory, remote_items), clients in messages.items():
+            start_inventory = get_start_inventory(ctx, slot, remote_start_inventory)
+            items = get_received_items(ctx, team, slot, remote_items)
+            if len(start_inventory) + len(items) > send_index:
+                first_new_item = max(0, send_index - len(start_inventory))
+                ctx.broadcast(clients, [{
+                    "cmd": "ReceivedItems",
+                    "index": send_index,
+                    "items": start_inventory[send_index:] + items[first_new_item:]}])
+                for client in clients:
                     client.send_index = len(start_inventory) + len(items)
 
 
@@ -872,11 +1157,7 @@ def forfeit_player(ctx: Context, team: int, slot: int):
 
 def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
     """register any locations that are in the multidata, pointing towards this player"""
-    all_locations = collections.defaultdict(set)
-    for source_slot, location_data in ctx.locations.items():
-        for location_id, values in location_data.items():
-            if values[1] == slot:
-                all_locations[source_slot].add(location_id)
+    all_locations = ctx.receiver_locations.get(slot, {})
 
     ctx.notify_all("%s (Team #%d) has collected their items from other worlds." % (ctx.player_names[(team, slot)], team + 1))
     for source_player, location_ids in all_locations.items():
@@ -893,11 +1174,8 @@ def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
 
 
 def get_remaining(ctx: Context, team: int, slot: int) -> typing.List[int]:
-    items = []
-    for location_id in ctx.locations[slot]:
-        if location_id not in ctx.location_checks[team, slot]:
-            items.append(ctx.locations[slot][location_id][0])  # item ID
-    return sorted(items)
+    locations = ctx.locations[slot]
+    return sorted(locations[location_id][0] for location_id in locations.keys() - ctx.location_checks[team, slot])
 
 
 def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem):
@@ -906,6 +1184,7 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.new_items_slots.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -927,6 +1206,9 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             ctx.broadcast_team(team, [info_text])
 
         ctx.location_checks[team, slot] |= new_locations
+        if ctx.save_journal:
+            ctx.save_journal.location_checks[team, slot] |= new_locations
+        ctx.mark_hints_found(team, slot, new_locations)
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -945,13 +1227,13 @@ def collect_hints(ctx: Context, team: int, slot: int, item: typing.Union[int, st
             slots.add(group_id)
 
     seeked_item_id = item if isinstance(item, int) else ctx.item_names_for_game(ctx.games[slot])[item]
-    for finding_player, check_data in ctx.locations.items():
-        for location_id, (item_id, receiving_player, item_flags) in check_data.items():
-            if receiving_player in slots and item_id == seeked_item_id:
-                found = location_id in ctx.location_checks[team, finding_player]
-                entrance = ctx.er_hint_data.get(finding_player, {}).get(location_id, "")
-                hints.append(NetUtils.Hint(receiving_player, finding_player, location_id, item_id, found, entrance,
-                                           item_flags))
+    for receiving_player in slots:
+        for finding_player, location_id in ctx.item_locations.get((receiving_player, seeked_item_id), ()):
+            item_flags = ctx.locations[finding_player][location_id][2]
+            found = location_id in ctx.location_checks[team, finding_player]
+            entrance = ctx.er_hint_data.get(finding_player, {}).get(location_id, "")
+            hints.append(NetUtils.Hint(receiving_player, finding_player, location_id, seeked_item_id, found,
+                                       entrance, item_flags))
 
     return hints
 
@@ -1356,6 +1638,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.new_items_slots.add((self.client.team, self.client.slot))
                 self.ctx.notify_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot))
@@ -1373,9 +1656,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         cost = self.ctx.get_hint_cost(self.client.slot)
 
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.hints[self.client.team, self.client.slot]
             self.ctx.notify_hints(self.client.team, list(hints))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1576,6 +1857,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             team, slot = ctx.connect_names[args['name']]
             if client.auth and client.team is not None and client.slot in ctx.clients[client.team]:
                 ctx.clients[team][slot].remove(client)  # re-auth, remove old entry
+                ctx.unindex_client(client)
                 if client.team != team or client.slot != slot:
                     client.auth = False  # swapping Team/Slot
             client.team = team
@@ -1586,6 +1868,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             client.version = args['version']
             client.tags = args['tags']
             client.no_locations = 'TextOnly' in client.tags or 'Tracker' in client.tags
+            ctx.index_client(client)
             connected_packet = {
                 "cmd": "Connected",
                 "team": client.team, "slot": client.slot,
@@ -1610,23 +1893,15 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            requested = set(args.get("games", []))
+            games = [name for name in ctx.gamespackage if name in requested]
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
-
+            games = [name for name in ctx.gamespackage if name not in exclusions]
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            games = ctx.gamespackage
+        await ctx.send_encoded_msgs(client, ctx.get_encoded_data_package(games))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -1654,7 +1929,9 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
 
             if "tags" in args:
                 old_tags = client.tags
+                ctx.unindex_client(client)
                 client.tags = args["tags"]
+                ctx.index_client(client)
                 if set(old_tags) != set(client.tags):
                     client.no_locations = 'TextOnly' in client.tags or 'Tracker' in client.tags
                     ctx.notify_all(
@@ -1707,17 +1984,10 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             client.messageprocessor(args["text"])
 
         elif cmd == "Bounce":
-            games = set(args.get("games", []))
-            tags = set(args.get("tags", []))
-            slots = set(args.get("slots", []))
+            targets = ctx.get_bounce_targets(client.team, args.get("games", []), args.get("tags", []),
+                                             args.get("slots", []))
             args["cmd"] = "Bounced"
-            msg = ctx.dumper([args])
-
-            for bounceclient in ctx.endpoints:
-                if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
-                                                         set(bounceclient.tags) & tags or
-                                                         bounceclient.slot in slots):
-                    await ctx.send_encoded_msgs(bounceclient, msg)
+            await ctx.broadcast_send_encoded_msgs(targets, ctx.dumper([args]))
 
         elif cmd == "Get":
             if "keys" not in args or type(args["keys"]) != list:
@@ -1746,6 +2016,8 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
+            if ctx.save_journal:
+                ctx.save_journal.stored_data.add(args["key"])
             targets = set(ctx.stored_data_notification_clients[args["key"]])
             if args.get("want_reply", True):
                 targets.add(client)
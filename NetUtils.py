@@ -3,6 +3,7 @@ from __future__ import annotations
 import typing
 import enum
 from json import JSONEncoder, JSONDecoder
+from json.encoder import encode_basestring
 
 import websockets
 
@@ -81,27 +82,109 @@ class NetworkItem(typing.NamedTuple):
     flags: int = 0
 
 
-def _scan_for_TypedTuples(obj: typing.Any) -> typing.Any:
-    if isinstance(obj, tuple) and hasattr(obj, "_fields"):  # NamedTuple is not actually a parent class
-        data = obj._asdict()
-        data["class"] = obj.__class__.__name__
-        return data
-    if isinstance(obj, (tuple, list, set)):
-        return tuple(_scan_for_TypedTuples(o) for o in obj)
-    if isinstance(obj, dict):
-        return {key: _scan_for_TypedTuples(value) for key, value in obj.items()}
-    return obj
-
-
 _encode = JSONEncoder(
     ensure_ascii=False,
     check_circular=False,
     separators=(',', ':'),
 ).encode
 
+# types the json module's C encoder handles as they are, containers of only these get encoded by it in one go
+_scalar_types = frozenset({str, int, float, bool, type(None)})
+_int_types = frozenset({int})
+
+
+def _encode_sequence(obj: typing.Union[typing.List, typing.Tuple, typing.AbstractSet]) -> str:
+    if not obj:
+        return "[]"
+    types = set(map(type, obj))
+    if _scalar_types.issuperset(types):
+        return _encode(obj if type(obj) in (list, tuple) else list(obj))
+    if len(types) == 1:  # like a list of NetworkItems
+        return f"[{','.join(map(_get_encoder(types.pop()), obj))}]"
+    return f"[{','.join(map(_encode_value, obj))}]"
+
+
+def _encode_key(key: typing.Any) -> str:
+    if isinstance(key, str):
+        return f"{encode_basestring(key)}:"
+    if key is None or isinstance(key, bool):
+        return f'"{_encode_value(key)}":'
+    if isinstance(key, int):
+        return f'"{int.__repr__(key)}":'
+    if isinstance(key, float):
+        return f'"{_encode(key)}":'
+    raise TypeError(f"keys must be str, int, float, bool or None, not {key.__class__.__name__}")
+
+
+def _encode_dict(obj: typing.Dict[typing.Any, typing.Any]) -> str:
+    if _scalar_types.issuperset(map(type, obj.values())):
+        return _encode(obj)
+    return f"{{{','.join(map(str.__add__, map(_encode_key, obj), map(_encode_value, obj.values())))}}}"
+
+
+def _make_TypedTuple_encoder(cls: typing.Type[typing.NamedTuple]) -> typing.Callable[[typing.Any], str]:
+    """NamedTuples get encoded as an object of their fields, with their class name as "class"."""
+    keys = tuple(f"{encode_basestring(field)}:" for field in cls._fields)
+    class_name = f'{"," if keys else ""}"class":{encode_basestring(cls.__name__)}}}'
+    # for the common case of only int fields, like NetworkItem
+    int_template = f"{{{','.join(f'{key}%d' for key in keys)}{class_name}"
+
+    def encode_TypedTuple(obj: typing.NamedTuple) -> str:
+        if _int_types.issuperset(map(type, obj)):
+            return int_template % obj
+        return f"{{{','.join(map(str.__add__, keys, map(_encode_value, obj)))}{class_name}"
+
+    return encode_TypedTuple
+
+
+def _make_encoder(cls: type) -> typing.Callable[[typing.Any], str]:
+    if issubclass(cls, tuple) and hasattr(cls, "_fields"):  # NamedTuple is not actually a parent class
+        return _make_TypedTuple_encoder(cls)
+    if issubclass(cls, (tuple, list, set, frozenset)):
+        return _encode_sequence
+    if issubclass(cls, dict):
+        return _encode_dict
+    if issubclass(cls, bool):
+        return _encoders[bool]
+    if issubclass(cls, int):  # like SlotType, the json module encodes these as their int value as well
+        return int.__repr__
+    if issubclass(cls, str):
+        return encode_basestring
+    return _encode
+
+
+_encoders: typing.Dict[type, typing.Callable[[typing.Any], str]] = {
+    str: encode_basestring,
+    int: int.__repr__,
+    bool: {True: "true", False: "false"}.__getitem__,
+    type(None): lambda obj: "null",
+    float: _encode,
+    list: _encode_sequence,
+    tuple: _encode_sequence,
+    set: _encode_sequence,
+    dict: _encode_dict,
+}
+
+
+def _get_encoder(cls: type) -> typing.Callable[[typing.Any], str]:
+    try:
+        return _encoders[cls]
+    except KeyError:
+        encoder = _encoders[cls] = _make_encoder(cls)
+        return encoder
+
+
+def _encode_value(obj: typing.Any) -> str:
+    # this runs for every value that isn't part of a container of scalars, so the lookup of _get_encoder is inlined
+    encoder = _encoders.get(type(obj), None)
+    if encoder is None:
+        encoder = _get_encoder(type(obj))
+    return encoder(obj)
+
 
 def encode(obj: typing.Any) -> str:
-    return _encode(_scan_for_TypedTuples(obj))
+    """Encodes obj to JSON in one pass, NamedTuples like NetworkItem as objects with their class name as "class"."""
+    return _encode_value(obj)
 
 
 def get_any_version(data: dict) -> Version:
@@ -10,8 +10,16 @@ import pickle
 import functools
 import io
 import collections
+import contextlib
 import importlib
 import logging
+import threading
+import time
+import json
+import mmap
+import struct
+import zlib
+from array import array
 from typing import BinaryIO, ClassVar, Coroutine, Optional, Set
 
 from yaml import load, load_all, dump, SafeLoader
@@ -142,6 +150,23 @@ def user_path(*path: str) -> str:
     return os.path.join(user_path.cached_path, *path)
 
 
+def cache_path(*path: str) -> str:
+    """Returns path to a file in the user's cache directory for Archipelago, which is writable for installs that
+    aren't."""
+    if hasattr(cache_path, "cached_path"):
+        pass
+    elif sys.platform == "win32":
+        cache_path.cached_path = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")),
+                                              "Archipelago", "Cache")
+    elif sys.platform == "darwin":
+        cache_path.cached_path = os.path.expanduser("~/Library/Caches/Archipelago")
+    else:
+        cache_path.cached_path = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                                              "Archipelago")
+
+    return os.path.join(cache_path.cached_path, *path)
+
+
 def output_path(*path: str) -> str:
     if hasattr(output_path, 'cached_path'):
         return os.path.join(output_path.cached_path, *path)
@@ -277,6 +302,8 @@ def get_default_options() -> OptionsType:
             "glitch_triforce_room": 1,
             "race": 0,
             "plando_options": "bosses",
+            "generation_processes": 0,
+            "zip_compression_level": 9,
         },
         "minecraft_options": {
             "forge_directory": "Minecraft Forge server",
@@ -434,6 +461,140 @@ def restricted_loads(s):
     return RestrictedUnpickler(io.BytesIO(s)).load()
 
 
+multidata_format_version = 4
+# sections of multidata format 4 that get their own blob, decoded only when they're accessed
+multidata_sections = ("er_hint_data", "precollected_hints")
+# sections of multidata format 4 with a blob per slot
+multidata_slot_sections = ("locations", "slot_data")
+
+
+def _pack_locations(locations: typing.Dict[int, typing.Tuple[int, int, int]]) -> bytes:
+    """Packs a slot's locations table into columns of location ids, item codes, item players and flags."""
+    columns = [array("q", locations)]
+    columns += [array("q", (data[column] for data in locations.values())) for column in range(3)]
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+    return b"".join(column.tobytes() for column in columns)
+
+
+def _unpack_locations(data: bytes) -> typing.Dict[int, typing.Tuple[int, int, int]]:
+    table = array("q", data)
+    if sys.byteorder != "little":
+        table.byteswap()
+    count = len(table) // 4
+    locations, items, players, flags = (table[column * count:(column + 1) * count] for column in range(4))
+    return dict(zip(locations, zip(items, players, flags)))
+
+
+def dump_multidata(multidata: typing.Dict[str, typing.Any]) -> bytes:
+    """Encodes multidata in the current format, see MultiData."""
+    blobs: typing.List[bytes] = []
+    index: typing.Dict[str, typing.Any] = {}
+    offset = 0
+
+    def add(blob: bytes) -> typing.List[int]:
+        nonlocal offset
+        blob = zlib.compress(blob, 9)
+        blobs.append(blob)
+        offset += len(blob)
+        return [offset - len(blob), len(blob)]
+
+    base = {key: value for key, value in multidata.items()
+            if key not in multidata_sections and key not in multidata_slot_sections}
+    index["base"] = add(pickle.dumps(base))
+    index["sections"] = {key: add(pickle.dumps(multidata[key])) for key in multidata_sections if key in multidata}
+    index["slots"] = {key: {slot: add(_pack_locations(value) if key == "locations" else pickle.dumps(value))
+                            for slot, value in multidata[key].items()}
+                      for key in multidata_slot_sections if key in multidata}
+    encoded_index = json.dumps(index).encode()
+    return b"".join((bytes([multidata_format_version]), struct.pack("<I", len(encoded_index)), encoded_index,
+                     *blobs))
+
+
+class MultiDataSlots(typing.Mapping[int, typing.Any]):
+    """A section of MultiData with a value per slot, each of which gets decoded when it's first accessed."""
+
+    def __init__(self, multidata: MultiData, key: str, index: typing.Dict[str, typing.List[int]]):
+        self.multidata = multidata
+        self.key = key
+        self.index = {int(slot): blob for slot, blob in index.items()}
+        self.decoded: typing.Dict[int, typing.Any] = {}
+
+    def __getitem__(self, slot: int) -> typing.Any:
+        value = self.decoded.get(slot, self)
+        if value is self:
+            data = self.multidata.read(self.index[slot])
+            value = self.decoded[slot] = _unpack_locations(data) if self.key == "locations" \
+                else restricted_loads(data)
+        return value
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+class MultiData(typing.Mapping[str, typing.Any]):
+    """Multidata of format 4: a version byte, the length of the json index of the sections as 4 bytes,
+    the index and the zlib compressed sections. The locations table and slot_data have a section per slot and
+    er_hint_data and precollected_hints have one each, the rest is in the base section. A section only gets
+    decoded when it's first accessed, so data can also be a memory map of the file, see release."""
+
+    def __init__(self, data: typing.Union[bytes, memoryview, mmap.mmap]):
+        self.view = memoryview(data)
+        if self.view[0] != multidata_format_version:
+            raise VersionException(f"Expected multidata format {multidata_format_version}, got {self.view[0]}.")
+        index_length, = struct.unpack_from("<I", self.view, 1)
+        self.index = json.loads(bytes(self.view[5:5 + index_length]))
+        self.data: typing.Optional[memoryview] = self.view[5 + index_length:]
+        # the sections that weren't decoded yet when data got released, by offset
+        self.released: typing.Dict[int, bytes] = {}
+        self.decoded: typing.Dict[str, typing.Any] = {}
+        self.base: typing.Dict[str, typing.Any] = restricted_loads(self.read(self.index["base"]))
+
+    def read(self, blob: typing.List[int]) -> bytes:
+        offset, length = blob
+        if self.data is None:
+            return zlib.decompress(self.released[offset])
+        return zlib.decompress(self.data[offset:offset + length])
+
+    def release(self) -> None:
+        """Copies the sections that haven't been decoded yet out of data and stops using it,
+        so the memory map it may be can be closed."""
+        if self.data is None:
+            return
+        blobs = [blob for key, blob in self.index["sections"].items() if key not in self.decoded]
+        for key, index in self.index["slots"].items():
+            decoded = self.decoded[key].decoded if key in self.decoded else {}
+            blobs += [blob for slot, blob in index.items() if int(slot) not in decoded]
+        self.released = {offset: bytes(self.data[offset:offset + length]) for offset, length in blobs}
+        self.data.release()
+        self.view.release()
+        self.data = None
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key in self.base:
+            return self.base[key]
+        value = self.decoded.get(key, self)
+        if value is self:
+            if key in self.index["slots"]:
+                value = MultiDataSlots(self, key, self.index["slots"][key])
+            else:
+                value = restricted_loads(self.read(self.index["sections"][key]))
+            self.decoded[key] = value
+        return value
+
+    def __iter__(self) -> typing.Iterator[str]:
+        yield from self.base
+        yield from self.index["sections"]
+        yield from self.index["slots"]
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.index["sections"]) + len(self.index["slots"])
+
+
 class KeyedDefaultDict(collections.defaultdict):
     """defaultdict variant that uses the missing key as argument to default_factory"""
     default_factory: typing.Callable[[typing.Any], typing.Any]
@@ -443,6 +604,56 @@ class KeyedDefaultDict(collections.defaultdict):
         return value
 
 
+class GenerationProfile:
+    """Wall time and allocated memory blocks of generation stages, in total and per game.
+    Allocations are the change of sys.getallocatedblocks over a stage, which is process wide, so stages running
+    concurrently in threads also count each other's."""
+    version: ClassVar[int] = 1
+    stages: typing.Dict[str, typing.Dict[str, typing.Any]]
+
+    def __init__(self) -> None:
+        self.stages = {}
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: typing.Dict[str, typing.Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, game: typing.Optional[str], seconds: float, allocations: int) -> None:
+        """Adds a measured call of stage, to the stage itself if game is None, to the game's part of it otherwise."""
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"time": 0.0, "allocations": 0, "calls": 0, "games": {}})
+            if game is not None:
+                entry = entry["games"].setdefault(game, {"time": 0.0, "allocations": 0, "calls": 0})
+            entry["time"] += seconds
+            entry["allocations"] += allocations
+            entry["calls"] += 1
+
+    @contextlib.contextmanager
+    def measure(self, stage: str, game: typing.Optional[str] = None) -> typing.Iterator[None]:
+        start, blocks = time.perf_counter(), sys.getallocatedblocks()
+        try:
+            yield
+        finally:
+            self.record(stage, game, time.perf_counter() - start, sys.getallocatedblocks() - blocks)
+
+    def measure_call(self, stage: str, function: typing.Callable[..., RetType], *args: typing.Any) -> RetType:
+        """Calls function with args as stage, for handing measured stages to an executor."""
+        with self.measure(stage):
+            return function(*args)
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """The report written next to the generation output, stages in the order they were first run."""
+        return {"version": self.version, "total": time.perf_counter() - self.start,
+                "stages": [{"name": name, **entry} for name, entry in self.stages.items()]}
+
+
 def get_text_between(text: str, start: str, end: str) -> str:
     return text[text.index(start) + len(start): text.rindex(end)]
 
@@ -10,6 +10,7 @@ import random
 import socket
 import threading
 import time
+import typing
 
 import websockets
 from pony.orm import db_session, commit, select
@@ -104,9 +105,10 @@ class WebHostContext(Context):
         threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
 
     @db_session
-    def _save(self, exit_save: bool = False) -> bool:
+    def write_save(self, snapshot: typing.Tuple[dict, bool], exit_save: bool = False) -> bool:
+        savedata, journal_entry = snapshot  # there is no journal here, so it's always all of the save data
         room = Room.get(id=self.room_id)
-        room.multisave = pickle.dumps(self.get_save())
+        room.multisave = pickle.dumps(savedata)
         # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
         if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
             room.last_activity = datetime.datetime.utcnow()
@@ -129,13 +131,13 @@ def get_static_server_data() -> dict:
         "forced_auto_forfeits": {},
         "non_hintable_names": {},
         "gamespackage": worlds.network_data_package["games"],
-        "item_name_groups": {world_name: world.item_name_groups for world_name, world in
-                             worlds.AutoWorldRegister.world_types.items()},
+        "item_name_groups": {world_name: game_info.item_name_groups for world_name, game_info in
+                             worlds.game_info.items()},
     }
 
-    for world_name, world in worlds.AutoWorldRegister.world_types.items():
-        data["forced_auto_forfeits"][world_name] = world.forced_auto_forfeit
-        data["non_hintable_names"][world_name] = world.hint_blacklist
+    for world_name, game_info in worlds.game_info.items():
+        data["forced_auto_forfeits"][world_name] = game_info.forced_auto_forfeit
+        data["non_hintable_names"][world_name] = game_info.hint_blacklist
 
     return data
 
@@ -1,4 +1,5 @@
 import datetime
+import json
 import os
 
 import jinja2.exceptions
@@ -91,7 +92,8 @@ def view_seed(seed: UUID):
     seed = Seed.get(id=seed)
     if not seed:
         abort(404)
-    return render_template("viewSeed.html", seed=seed, slot_count=count(seed.slots))
+    profile = json.loads(seed.meta).get("profile")
+    return render_template("viewSeed.html", seed=seed, slot_count=count(seed.slots), profile=profile)
 
 
 @app.route('/new_room/<suuid:seed>')
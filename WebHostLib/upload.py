@@ -30,6 +30,7 @@ def upload_zip_to_db(zfile: zipfile.ZipFile, owner=None, meta={"race": False}, s
     spoiler = ""
     files = {}
     multidata = None
+    profile = None
 
     # Load files.
     for file in infolist:
@@ -45,6 +46,10 @@ def upload_zip_to_db(zfile: zipfile.ZipFile, owner=None, meta={"race": False}, s
             patch.read()
             files[patch.player] = data
 
+        # Generation profile
+        elif file.filename.endswith("_Profile.json"):
+            profile = json.loads(zfile.open(file, "r").read())
+
         # Spoiler
         elif file.filename.endswith(".txt"):
             spoiler = zfile.open(file, "r").read().decode("utf-8-sig")
@@ -90,6 +95,8 @@ def upload_zip_to_db(zfile: zipfile.ZipFile, owner=None, meta={"race": False}, s
 
             flush()  # commit slots
 
+        if profile:
+            meta = {**meta, "profile": profile}
         seed = Seed(multidata=multidata, spoiler=spoiler, slots=slots, owner=owner, meta=json.dumps(meta),
                     id=sid if sid else uuid.uuid4())
         flush()  # create seed
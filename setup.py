@@ -213,6 +213,9 @@ class BuildExeCommand(cx_Freeze.command.build_exe.BuildEXE):
                         zf.write(path, relative_path)
                     folders_to_remove.append(file_name)
                 shutil.rmtree(world_directory)
+        # lets the frozen build import only the worlds that get used
+        import worlds
+        worlds.write_manifest(str(self.libfolder / "worlds"))
         shutil.copyfile("meta.yaml", self.buildfolder / "Players" / "Templates" / "meta.yaml")
         # TODO: fix LttP options one day
         shutil.copyfile("playerSettings.yaml", self.buildfolder / "Players" / "Templates" / "A Link to the Past.yaml")
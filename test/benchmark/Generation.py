@@ -0,0 +1,61 @@
+"""
+Measures generation without output on a multiworld of games that need no ROM, with and without entrance rule
+dependencies being tracked for incremental region updates.
+Run from the root directory with: python -m test.benchmark.Generation [players] [seed]
+"""
+import sys
+import time
+from argparse import Namespace
+from typing import Dict
+
+from BaseClasses import CollectionState, MultiWorld
+from Fill import balance_multiworld_progression, distribute_items_restrictive
+from worlds.AutoWorld import AutoWorldRegister, call_all
+
+games = ("Hollow Knight", "Timespinner", "Minecraft", "Rogue Legacy", "The Witness", "Raft", "Subnautica",
+         "Sonic Adventure 2 Battle", "Risk of Rain 2", "Slay the Spire", "Meritous", "Hylics 2", "ChecksFinder",
+         "Super Mario 64", "Dark Souls III", "VVVVVV")
+
+
+def generate(players: int, seed: int, tracked: bool) -> Dict[str, float]:
+    """Generates a multiworld with players cycling through games, returning how long each phase took. Without tracked,
+    no world tracks entrance rule dependencies."""
+    multiworld = MultiWorld(players)
+    multiworld.game = {player: games[(player - 1) % len(games)] for player in multiworld.player_ids}
+    multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+    multiworld.set_seed(seed)
+    args = Namespace()
+    for player, game in multiworld.game.items():
+        for name, option in AutoWorldRegister.world_types[game].option_definitions.items():
+            vars(args).setdefault(name, {})[player] = option.from_any(option.default)
+    multiworld.set_options(args)
+    multiworld.set_default_common_options()
+    if not tracked:
+        for world in multiworld.worlds.values():
+            world.incremental_reachability = False
+    multiworld.state = CollectionState(multiworld)
+
+    times: Dict[str, float] = {}
+    start = time.perf_counter()
+    for step in ("generate_early", "create_regions", "create_items", "set_rules", "generate_basic", "pre_fill"):
+        call_all(multiworld, step)
+    times["stages"] = time.perf_counter() - start
+    for name, phase in (("fill", distribute_items_restrictive),
+                        ("balance", balance_multiworld_progression),
+                        ("accessibility", MultiWorld.fulfills_accessibility),
+                        ("playthrough", lambda multiworld: multiworld.spoiler.create_playthrough())):
+        start = time.perf_counter()
+        phase(multiworld)
+        times[name] = time.perf_counter() - start
+    return times
+
+
+def run(players: int, seed: int) -> None:
+    for tracked in (False, True):
+        times = generate(players, seed, tracked)
+        print(f"{'tracked' if tracked else 'untracked'}: {sum(times.values()):.2f}s "
+              + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in times.items()))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20, int(sys.argv[2]) if len(sys.argv) > 2 else 0)
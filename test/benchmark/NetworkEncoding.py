@@ -0,0 +1,57 @@
+"""
+Measures what encoding the packets a client gets sent when it reconnects costs.
+Run from the root directory with: python -m test.benchmark.NetworkEncoding [items] [repetitions]
+"""
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from NetUtils import Hint, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, encode
+
+
+def create_packets(items: int, players: int = 50) -> Dict[str, List[Dict[str, Any]]]:
+    rng = random.Random(0)
+    locations = list(range(1000, 1000 + items * 3))
+    checked = set(rng.sample(locations, items))
+    return {
+        "Connected": [{
+            "cmd": "Connected",
+            "team": 0, "slot": 1,
+            "players": [NetworkPlayer(0, slot, f"Player{slot}", f"Player{slot}") for slot in range(1, players + 1)],
+            "missing_locations": [location for location in locations if location not in checked],
+            "checked_locations": checked,
+            "slot_info": {slot: NetworkSlot(f"Player{slot}", "Game", SlotType.player)
+                          for slot in range(1, players + 1)},
+            "slot_data": {"goal": 1, "options": {"setting": "value", "values": [1, 2, 3]}},
+            "hint_points": 10,
+        }],
+        "ReceivedItems": [{
+            "cmd": "ReceivedItems", "index": 0,
+            "items": [NetworkItem(rng.randrange(1000, 2000), rng.choice(locations), rng.randrange(1, players + 1),
+                                  rng.choice((0, 1, 2, 4))) for _ in range(items)],
+        }],
+        "RoomUpdate": [{
+            "cmd": "RoomUpdate", "hint_points": 12, "checked_locations": sorted(checked),
+        }],
+        "Hints": [{
+            "key": "_read_hints_0_1",
+            "value": [Hint(1, rng.randrange(1, players + 1), rng.choice(locations), rng.randrange(1000, 2000),
+                           False, "", 1) for _ in range(items // 10)],
+        }],
+    }
+
+
+def run(items: int, repetitions: int) -> None:
+    print(f"{items} items, {repetitions} repetitions")
+    for name, packet in create_packets(items).items():
+        encoded = encode(packet)
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            encode(packet)
+        duration = time.perf_counter() - start
+        print(f"{name:13}: {len(encoded):7} bytes, {duration / repetitions * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100, int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -0,0 +1,59 @@
+"""
+Measures what copying a CollectionState costs during a fill step on a multiworld with many players.
+Run from the root directory with: python -m test.benchmark.StateCopy [players] [steps]
+"""
+import random
+import sys
+import time
+import tracemalloc
+from typing import List
+
+from BaseClasses import CollectionState, Item, ItemClassification, MultiWorld
+from test.general.TestCollectionState import generate_random_regions, generate_tracked_multi_world
+
+
+def create_multiworld(players: int) -> MultiWorld:
+    multiworld = generate_tracked_multi_world(players)
+    rng = random.Random(0)
+    for player in multiworld.player_ids:
+        generate_random_regions(multiworld, player, rng)
+    return multiworld
+
+
+def fill_step(base_state: CollectionState, item: Item) -> CollectionState:
+    """What fill_restrictive does for each placement: copy the state, collect and look at the item's world."""
+    state = base_state.copy()
+    state.collect(item, True)
+    state.update_reachable_regions(item.player)
+    return state
+
+
+def run(players: int, steps: int) -> None:
+    multiworld = create_multiworld(players)
+    rng = random.Random(0)
+    base_state = CollectionState(multiworld)
+    for player in multiworld.player_ids:
+        base_state.collect(Item("A", ItemClassification.progression, None, player), True)
+        base_state.update_reachable_regions(player)
+    items = [Item(rng.choice("BCDE"), ItemClassification.progression, None, rng.choice(multiworld.player_ids))
+             for _ in range(steps)]
+
+    start = time.perf_counter()
+    for item in items:
+        fill_step(base_state, item)
+    duration = time.perf_counter() - start
+
+    tracemalloc.start()
+    states: List[CollectionState] = [fill_step(base_state, item) for item in items]
+    allocated, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+
+    print(f"{players} players, {len(states)} fill steps")
+    print(f"time per step: {duration / steps * 1000:.3f} ms")
+    print(f"memory kept per step: {allocated / steps / 1024:.1f} KiB in {blocks / steps:.0f} blocks")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100, int(sys.argv[2]) if len(sys.argv) > 2 else 200)
@@ -0,0 +1,233 @@
+import random
+import unittest
+from typing import List
+
+from BaseClasses import CollectionState, Entrance, Item, ItemClassification, MultiWorld, Region, RegionType
+from test.general.TestFill import generate_multi_world
+
+
+def generate_random_regions(multiworld: MultiWorld, player: int, rng: random.Random,
+                            region_count: int = 40, item_names: List[str] = ("A", "B", "C", "D", "E")) -> None:
+    menu = multiworld.get_region("Menu", player)
+    regions = [menu]
+    for i in range(region_count):
+        region = Region(f"Region {i}", RegionType.Generic, "Region Hint", player, multiworld)
+        multiworld.regions.append(region)
+        regions.append(region)
+
+    rules = [
+        lambda state: True,
+        lambda state: False,
+        *(lambda state, name=name: state.has(name, player) for name in item_names),
+        *(lambda state, name=name: state.has(name, player, 2) for name in item_names),
+        lambda state: state.has_all({"A", "B"}, player),
+        lambda state: state.has("C", player) or state.has("D", player),
+    ]
+    for i, region in enumerate(regions):
+        for target in rng.sample(regions, 3):
+            entrance = Entrance(player, f"{region.name} -> {target.name} {i}", region)
+            entrance.access_rule = rng.choice(rules)
+            region.exits.append(entrance)
+            entrance.connect(target)
+    multiworld._recache()
+
+
+def generate_tracked_multi_world(players: int = 1) -> MultiWorld:
+    """generate_multi_world with worlds that track entrance rule dependencies, as worlds have to opt into it."""
+    multiworld = generate_multi_world(players)
+    for world in multiworld.worlds.values():
+        world.incremental_reachability = True
+    return multiworld
+
+
+class TestIncrementalReachability(unittest.TestCase):
+    item_names = ("A", "B", "C", "D", "E")
+
+    def assertSameReachability(self, multiworld: MultiWorld, state: CollectionState, items: List[Item]) -> None:
+        fresh_state = CollectionState(multiworld)
+        for item in items:
+            fresh_state.collect(item, True)
+        for region in multiworld.get_regions(1):
+            self.assertEqual(region.can_reach(fresh_state), region.can_reach(state), region)
+
+    def test_matches_full_search(self) -> None:
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                multiworld = generate_tracked_multi_world()
+                generate_random_regions(multiworld, 1, rng, item_names=self.item_names)
+                state = CollectionState(multiworld)
+                collected: List[Item] = []
+                for _ in range(30):
+                    if collected and rng.random() < 0.4:
+                        item = collected.pop(rng.randrange(len(collected)))
+                        state.remove(item)
+                    else:
+                        item = Item(rng.choice(self.item_names), ItemClassification.progression, None, 1)
+                        collected.append(item)
+                        state.collect(item, True)
+                    self.assertSameReachability(multiworld, state, collected)
+                    copied_state = state.copy()
+                    self.assertSameReachability(multiworld, copied_state, collected)
+
+    def test_region_rules_are_always_rechecked(self) -> None:
+        multiworld = generate_tracked_multi_world()
+        menu = multiworld.get_region("Menu", 1)
+        first = Region("First", RegionType.Generic, "Region Hint", 1, multiworld)
+        second = Region("Second", RegionType.Generic, "Region Hint", 1, multiworld)
+        multiworld.regions += [first, second]
+        to_first = Entrance(1, "to First", menu)
+        to_first.access_rule = lambda state: state.has("A", 1)
+        to_second = Entrance(1, "to Second", menu)
+        to_second.access_rule = lambda state: state.can_reach("First", "Region", 1)
+        for entrance, region in ((to_second, second), (to_first, first)):
+            menu.exits.append(entrance)
+            entrance.connect(region)
+        multiworld._recache()
+
+        state = CollectionState(multiworld)
+        self.assertFalse(second.can_reach(state))
+        self.assertIsNone(state.connection_dependencies[1][to_second][1])
+        self.assertEqual(state.connection_dependencies[1][to_first][1], {"A"})
+        state.collect(Item("A", ItemClassification.progression, None, 1), True)
+        self.assertTrue(first.can_reach(state))
+        # not registered as indirect condition, so like a full search, this is picked up on the next update
+        state.collect(Item("B", ItemClassification.progression, None, 1), True)
+        self.assertTrue(second.can_reach(state))
+
+    def test_changed_rule_is_rechecked(self) -> None:
+        multiworld = generate_tracked_multi_world()
+        menu = multiworld.get_region("Menu", 1)
+        region = Region("Locked", RegionType.Generic, "Region Hint", 1, multiworld)
+        multiworld.regions.append(region)
+        entrance = Entrance(1, "to Locked", menu)
+        entrance.access_rule = lambda state: state.has("A", 1)
+        menu.exits.append(entrance)
+        entrance.connect(region)
+        multiworld._recache()
+
+        state = CollectionState(multiworld)
+        self.assertFalse(region.can_reach(state))
+        entrance.access_rule = lambda state: True
+        state.update_reachable_regions(1)
+        self.assertTrue(region.can_reach(state))
+
+    def test_untracked_by_default(self) -> None:
+        multiworld = generate_multi_world()
+        menu = multiworld.get_region("Menu", 1)
+        region = Region("Locked", RegionType.Generic, "Region Hint", 1, multiworld)
+        multiworld.regions.append(region)
+        entrance = Entrance(1, "to Locked", menu)
+        # like logic state a LogicMixin keeps with init_mixin and copy_mixin, reading it can't be recorded
+        entrance.access_rule = lambda state: state.mixin_unlocked
+        menu.exits.append(entrance)
+        entrance.connect(region)
+        multiworld._recache()
+
+        state = CollectionState(multiworld)
+        state.mixin_unlocked = False
+        self.assertFalse(region.can_reach(state))
+        state.mixin_unlocked = True
+        state.collect(Item("A", ItemClassification.progression, None, 1), True)
+        self.assertTrue(region.can_reach(state))
+
+
+class TestCollectionStateCopy(unittest.TestCase):
+    def test_copies_are_independent(self) -> None:
+        multiworld = generate_tracked_multi_world()
+        generate_random_regions(multiworld, 1, random.Random(0))
+        state = CollectionState(multiworld)
+        state.update_reachable_regions(1)
+        reachable = set(state.reachable_regions[1])
+        copied_state = state.copy()
+        self.assertIs(state.reachable_regions[1], copied_state.reachable_regions[1])
+
+        items = [Item(name, ItemClassification.progression, None, 1) for name in ("A", "B", "C", "D", "E")]
+        for item in items:
+            copied_state.collect(item, True)
+        copied_state.update_reachable_regions(1)
+        self.assertIsNot(state.reachable_regions[1], copied_state.reachable_regions[1])
+        self.assertGreater(copied_state.reachable_regions[1], reachable)
+        self.assertEqual(state.reachable_regions[1], reachable)
+
+        # the original keeps working on its own structures as well
+        state.collect(items[0], True)
+        state.update_reachable_regions(1)
+        fresh_state = CollectionState(multiworld)
+        fresh_state.collect(items[0], True)
+        fresh_state.update_reachable_regions(1)
+        self.assertEqual(state.reachable_regions[1], fresh_state.reachable_regions[1])
+        self.assertGreater(copied_state.reachable_regions[1], reachable)
+
+    def test_copy_functions(self) -> None:
+        multiworld = generate_tracked_multi_world()
+        copied = []
+        CollectionState.additional_copy_functions.append(lambda state, ret: copied.append((state, ret)) or ret)
+        try:
+            state = CollectionState(multiworld)
+            copied_state = state.copy()
+        finally:
+            CollectionState.additional_copy_functions.pop()
+        self.assertEqual(copied, [(state, copied_state)])
+
+
+class TestCompactItemCounts(unittest.TestCase):
+    item_names = ("A", "B", "C", "D", "E")
+
+    def setUp(self) -> None:
+        self.multiworld = generate_tracked_multi_world(2)
+        for world in self.multiworld.worlds.values():
+            world.item_name_to_index = {name: index for index, name in enumerate(self.item_names[:4])}
+        self.multiworld.worlds[1].compact_item_counts = True
+
+    def test_item_counts(self) -> None:
+        state = CollectionState(self.multiworld)
+        self.assertIn(1, state.compact_items)
+        self.assertNotIn(2, state.compact_items)
+        for player in (1, 2):
+            with self.subTest(player=player):
+                items = [Item(name, ItemClassification.progression, None, player) for name in ("A", "A", "C", "E")]
+                for item in items:
+                    state.collect(item, True)
+                self.assertTrue(state.has("A", player, 2))
+                self.assertFalse(state.has("A", player, 3))
+                self.assertEqual(state.count("C", player), 1)
+                self.assertEqual(state.count("E", player), 1)  # not part of the index
+                self.assertEqual(state.prog_items["A", player], 2)
+                self.assertEqual(state.prog_items.get(("B", player), 0), 0)
+                self.assertIn(("C", player), state.prog_items)
+                self.assertNotIn(("B", player), state.prog_items)
+                self.assertTrue(state.has_all({"A", "C", "E"}, player))
+                self.assertFalse(state.has_all({"A", "B"}, player))
+                self.assertTrue(state.has_any({"B", "E"}, player))
+                self.assertFalse(state.has_any({"B", "D"}, player))
+
+                copied_state = state.copy()
+                state.remove(items[0])
+                del state.prog_items["C", player]
+                self.assertEqual(state.count("A", player), 1)
+                self.assertFalse(state.has("C", player))
+                self.assertEqual(copied_state.count("A", player), 2)
+                self.assertTrue(copied_state.has("C", player))
+
+        self.assertEqual(state.prog_items.pop_changes(1), ({"A", "C", "E"}, {"A", "C"}))
+
+    def test_matches_full_search(self) -> None:
+        rng = random.Random(0)
+        generate_random_regions(self.multiworld, 1, rng, item_names=self.item_names)
+        state = CollectionState(self.multiworld)
+        collected: List[Item] = []
+        for _ in range(30):
+            if collected and rng.random() < 0.4:
+                item = collected.pop(rng.randrange(len(collected)))
+                state.remove(item)
+            else:
+                item = Item(rng.choice(self.item_names), ItemClassification.progression, None, 1)
+                collected.append(item)
+                state.collect(item, True)
+            fresh_state = CollectionState(self.multiworld)
+            fresh_state.compact_items = {}  # count through prog_items only
+            for item in collected:
+                fresh_state.collect(item, True)
+            for region in self.multiworld.get_regions(1):
+                self.assertEqual(region.can_reach(fresh_state), region.can_reach(state), region)
@@ -1,9 +1,11 @@
-from typing import List, Iterable
+from collections import Counter
+from typing import List, Iterable, Optional
+import random
 import unittest
 from worlds.AutoWorld import World
 from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
-    distribute_early_items, distribute_items_restrictive
-from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, RegionType, Item, Location, \
+    distribute_early_items, distribute_items_restrictive, find_swap, sweep_from_pool
+from BaseClasses import CollectionState, Entrance, LocationProgressType, MultiWorld, Region, RegionType, Item, Location, \
     ItemClassification
 from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
 
@@ -400,6 +402,66 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertTrue(multi_world.state.prog_items[item.name, item.player], "Sweep did not collect - Test flawed")
         self.assertEqual(multi_world.state.prog_items[item.name, item.player], 1, "Sweep collected multiple times")
 
+    def test_find_swap(self):
+        def find_swap_by_sweeping_each(world: MultiWorld, base_state: CollectionState, placements: List[Location],
+                                       item_to_place: Item) -> Optional[int]:
+            for i, location in enumerate(placements):
+                placed_item = location.item
+                location.item = None
+                swap_state = sweep_from_pool(base_state, [placed_item])
+                try:
+                    if location.can_fill(swap_state, item_to_place):
+                        prev_count = len(world.get_reachable_locations(swap_state.copy()))
+                        swap_state.collect(item_to_place, True)
+                        if len(world.get_reachable_locations(swap_state)) >= prev_count:
+                            return i
+                finally:
+                    location.item = placed_item
+            return None
+
+        for seed in range(30):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                multi_world = generate_multi_world(1)
+                player1 = generate_player_data(multi_world, 1, 10, 6)
+                items = player1.prog_items
+                rules = [
+                    lambda state: True,
+                    *(lambda state, item=item: state.has(item.name, 1) for item in items),
+                    lambda state: state.has_all({items[0].name, items[1].name}, 1),
+                ]
+                placements = rng.sample(player1.locations, 5)
+                for location in player1.locations:
+                    if location in placements:
+                        set_rule(location, rng.choice(rules))
+                    else:
+                        # rules that no longer hold after collecting more are what the reachable count check is for
+                        set_rule(location, rng.choice(rules + [lambda state: not state.has(items[5].name, 1)]))
+                for location, item in zip(placements, items):
+                    multi_world.push_item(location, item, False)
+                    location.event = True
+                for item_to_place in items[5:]:
+                    swapped_items = Counter({(item.player, item.name): rng.randint(0, 2) for item in items})
+                    candidates = [location for location in placements
+                                  if swapped_items[location.item.player, location.item.name] <= 1]
+                    expected = find_swap_by_sweeping_each(multi_world, multi_world.state, candidates, item_to_place)
+                    found = find_swap(multi_world, multi_world.state, placements, item_to_place, swapped_items,
+                                      False, True)
+                    self.assertEqual(found, None if expected is None else placements.index(candidates[expected]))
+
+    def test_find_swap_always_allow(self):
+        multi_world = generate_multi_world(1)
+        player1 = generate_player_data(multi_world, 1, 1, 2)
+        location = player1.locations[0]
+        placed_item, item_to_place = player1.prog_items
+        multi_world.push_item(location, placed_item, False)
+        location.event = True
+        location.item_rule = lambda item: item is not item_to_place
+        # only allows item_to_place in the state after the swap, in which placed_item is collected
+        location.always_allow = lambda state, item: state.has(placed_item.name, placed_item.player)
+        found = find_swap(multi_world, multi_world.state, [location], item_to_place, Counter(), False, True)
+        self.assertEqual(found, 0)
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
@@ -756,6 +818,26 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
         self.assertRegionContains(
             self.player1.regions[1], self.player2.prog_items[0])
 
+    def test_balances_copies_of_progression(self) -> None:
+        self.multi_world.progression_balancing[self.player1.id].value = 50
+        self.multi_world.progression_balancing[self.player2.id].value = 50
+
+        # player 2 needs a second copy of the same item, placed next to the first one
+        copy = Item(self.player2.prog_items[0].name, ItemClassification.progression, None, self.player2.id)
+        location = next(location for location in self.player1.regions[2].locations
+                        if not location.item.advancement)
+        self.multi_world.push_item(location, copy, False)
+        location.event = True
+        self.player2.regions[1].entrances[0].access_rule = lambda state: state.has(
+            self.player2.prog_items[0].name, self.player2.id, 2)
+
+        balance_multiworld_progression(self.multi_world)
+
+        self.assertRegionContains(
+            self.player1.regions[1], self.player2.prog_items[0])
+        self.assertRegionContains(
+            self.player1.regions[1], copy)
+
     def test_skips_balancing_progression(self) -> None:
         self.multi_world.progression_balancing[self.player1.id].value = 0
         self.multi_world.progression_balancing[self.player2.id].value = 0
@@ -0,0 +1,66 @@
+import random
+import unittest
+from typing import List
+
+from BaseClasses import Item, ItemClassification, Location, MultiWorld, Region, RegionType
+from Fill import swap_location_item
+from test.general.TestFill import generate_multi_world
+
+
+class TestLocationIndexes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_multi_world(2)
+        for player in (1, 2):
+            self.multiworld.regions.append(Region("Other", RegionType.Generic, "Region Hint", player, self.multiworld))
+        for region in self.multiworld.regions:
+            region.locations += [Location(region.player, f"{region.name} {i}", None, region) for i in range(10)]
+        self.multiworld._recache()
+
+    def assertIndexesMatch(self, multiworld: MultiWorld) -> None:
+        locations = [location for region in multiworld.regions for location in region.locations]
+        for player in (None, 1, 2):
+            with self.subTest(player=player):
+                player_locations = [location for location in locations if player is None or location.player == player]
+                self.assertEqual(multiworld.get_locations(player), player_locations)
+                self.assertEqual(multiworld.get_unfilled_locations(player),
+                                 [location for location in player_locations if location.item is None])
+                self.assertEqual(multiworld.get_filled_locations(player),
+                                 [location for location in player_locations if location.item is not None])
+        for name in ("A", "B", "C"):
+            for player in (1, 2):
+                item_locations = [location for location in locations if location.item
+                                  and location.item.name == name and location.item.player == player]
+                self.assertEqual(multiworld.find_item_locations(name, player), item_locations)
+                if item_locations:
+                    self.assertIs(multiworld.find_item(name, player), item_locations[0])
+        self.assertEqual(multiworld.find_items_in_locations({"A", "C"}, 1),
+                         [location for location in locations if location.item
+                          and location.item.name in {"A", "C"} and location.item.player == 1])
+
+    def test_indexes_follow_placements(self) -> None:
+        rng = random.Random(0)
+        multiworld = self.multiworld
+        self.assertIndexesMatch(multiworld)
+        locations: List[Location] = multiworld.get_locations()
+        for location in rng.sample(locations, 10):
+            multiworld.push_item(location, Item(rng.choice("ABC"), ItemClassification.progression, None,
+                                                rng.choice((1, 2))), False)
+        self.assertIndexesMatch(multiworld)
+        unfilled = multiworld.get_unfilled_locations()
+        unfilled[0].place_locked_item(Item("A", ItemClassification.progression, None, 1))
+        unfilled[1].item = Item("B", ItemClassification.progression, None, 2)
+        self.assertIndexesMatch(multiworld)
+        filled = multiworld.get_filled_locations()
+        swap_location_item(filled[0], filled[-1])
+        filled[1].item = None
+        self.assertIndexesMatch(multiworld)
+
+    def test_indexes_get_rebuilt(self) -> None:
+        multiworld = self.multiworld
+        self.assertIndexesMatch(multiworld)
+        region = multiworld.get_region("Menu", 2)
+        location = Location(2, "New", None, region)
+        region.locations.append(location)
+        location.item = Item("C", ItemClassification.progression, None, 1)
+        multiworld.clear_location_cache()
+        self.assertIndexesMatch(multiworld)
@@ -0,0 +1,221 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor, wait
+from argparse import Namespace
+from typing import Callable, List, Tuple
+from unittest import mock
+
+from BaseClasses import CollectionState, MultiWorld
+from worlds import AutoWorld
+from worlds.AutoWorld import AutoWorldRegister, World, call_all, call_all_parallel, parallel_stages, \
+    submit_generate_output
+
+
+def setup_multiworld(world_type: type, players: int) -> MultiWorld:
+    multiworld = MultiWorld(players)
+    multiworld.game = {player: world_type.game for player in multiworld.player_ids}
+    multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+    multiworld.set_seed(0)
+    args = Namespace()
+    for name, option in world_type.option_definitions.items():
+        setattr(args, name, {player: option.from_any(option.default) for player in multiworld.player_ids})
+    multiworld.set_options(args)
+    multiworld.set_default_common_options()
+    multiworld.state = CollectionState(multiworld)
+    return multiworld
+
+
+def generate(world_type: type, processes: int = 2) \
+        -> Tuple[List[Tuple[str, int, str]], List[Tuple[str, int]], List[Tuple[Tuple[str, str, int], dict]]]:
+    multiworld = setup_multiworld(world_type, 3)
+    for step in ("generate_early", "create_regions", "create_items"):
+        call_all_parallel(multiworld, step, processes)
+    for step in ("set_rules", "generate_basic"):
+        call_all(multiworld, step)
+    multiworld.state.sweep_for_events()
+    return [(location.name, location.player, location.item and location.item.name)
+            for location in multiworld.get_locations()], \
+        [(item.name, item.player) for item in multiworld.itempool], \
+        list(multiworld.spoiler.entrances.items())
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "parallel generation requires fork")
+class TestParallelGeneration(unittest.TestCase):
+    def test_matches_main_process(self) -> None:
+        """Stages run in worker processes result in the same MultiWorld as running them in the main process."""
+        def fail(player: int) -> bytes:
+            raise Exception("not run in parallel")
+
+        for world_type in AutoWorldRegister.world_types.values():
+            if not world_type.parallel_generation:
+                continue
+            with self.subTest(game=world_type.game):
+                called: List[str] = []
+                call_single: Callable = AutoWorld.call_single
+                with mock.patch.object(AutoWorld, "call_single",
+                                       lambda multiworld, method_name, player, *args:
+                                       called.append(method_name) or call_single(multiworld, method_name, player,
+                                                                                 *args)):
+                    parallel = generate(world_type)
+                # everything got merged back from the workers
+                self.assertFalse(parallel_stages.intersection(called))
+
+                with mock.patch.object(AutoWorld, "_run_parallel_stage", fail):
+                    fallback = generate(world_type)
+                self.assertEqual(parallel, fallback)
+
+    def test_random_without_processes(self) -> None:
+        """Without worker processes, worlds draw from multiworld.random like with call_all, with them their draws
+        don't depend on where their stage runs."""
+        def generate_early(self: World) -> None:
+            self.drawn = self.multiworld.random.random()
+
+        def fail(player: int) -> bytes:
+            raise Exception("not run in parallel")
+
+        def draw(call: Callable[[MultiWorld], None]) -> List[float]:
+            multiworld = setup_multiworld(world_type, 3)
+            with mock.patch.object(world_type, "generate_early", generate_early):
+                call(multiworld)
+            return [world.drawn for world in multiworld.worlds.values()] + [multiworld.random.random()]
+
+        world_type = AutoWorldRegister.world_types["VVVVVV"]
+        self.assertEqual(draw(lambda multiworld: call_all_parallel(multiworld, "generate_early", 0)),
+                         draw(lambda multiworld: call_all(multiworld, "generate_early")))
+        parallel = draw(lambda multiworld: call_all_parallel(multiworld, "generate_early", 2))
+        with mock.patch.object(AutoWorld, "_run_parallel_stage", fail):
+            self.assertEqual(draw(lambda multiworld: call_all_parallel(multiworld, "generate_early", 2)), parallel)
+
+    def test_spoiler_entrances(self) -> None:
+        """Entrances worlds put into the spoiler from a worker process get merged back in slot order."""
+        def create_regions(self: World) -> None:
+            create_regions_(self)
+            self.multiworld.spoiler.set_entrance(f"Entrance {self.player}", "Exit", "entrance", self.player)
+
+        def fail(player: int) -> bytes:
+            raise Exception("not run in parallel")
+
+        world_type = AutoWorldRegister.world_types["VVVVVV"]
+        create_regions_ = world_type.create_regions
+        with mock.patch.object(world_type, "create_regions", create_regions):
+            parallel = generate(world_type)
+            with mock.patch.object(AutoWorld, "_run_parallel_stage", fail):
+                fallback = generate(world_type)
+        self.assertEqual([key for key, entrance in parallel[2]],
+                         [(f"Entrance {player}", "entrance", player) for player in (1, 2, 3)])
+        self.assertEqual(parallel, fallback)
+
+
+def generate_output(self: World, output_directory: str) -> None:
+    with open(os.path.join(output_directory, f"{self.player}.txt"), "w") as f:
+        f.write(self.multiworld.player_name[self.player])
+    self.output_pid = os.getpid()
+    self.output_done.set()
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "parallel output requires fork")
+class TestParallelOutput(unittest.TestCase):
+    def run_output(self, output_attributes: Tuple[str, ...]) -> MultiWorld:
+        world_type = AutoWorldRegister.world_types["VVVVVV"]
+        multiworld = setup_multiworld(world_type, 3)
+        for world in multiworld.worlds.values():
+            world.output_done = threading.Event()
+        with tempfile.TemporaryDirectory() as output_directory, \
+                mock.patch.object(world_type, "generate_output", generate_output), \
+                mock.patch.object(world_type, "output_attributes", output_attributes), \
+                ThreadPoolExecutor(2) as pool:
+            futures = submit_generate_output(multiworld, output_directory, 2, pool)
+            wait(futures)
+            files = []
+            for future, directory in futures.items():
+                future.result()
+                files += os.listdir(directory)
+            self.assertEqual(sorted(files), ["1.txt", "2.txt", "3.txt"])
+        return multiworld
+
+    def test_sends_back_declared_attributes(self) -> None:
+        """Declared attributes and set events of worlds that generated their output in a worker get merged back."""
+        multiworld = self.run_output(("output_pid",))
+        for world in multiworld.worlds.values():
+            self.assertNotEqual(world.output_pid, os.getpid())
+            self.assertTrue(world.output_done.is_set())
+
+    def test_falls_back_to_main_process(self) -> None:
+        """If a world's results can't be sent back, its output gets generated in the main process instead."""
+        multiworld = self.run_output(("output_done",))
+        for world in multiworld.worlds.values():
+            self.assertEqual(world.output_pid, os.getpid())
+            self.assertTrue(world.output_done.is_set())
+
+    def test_errors_are_not_retried(self) -> None:
+        """generate_output failing in a worker fails its future, without running it again in the main process."""
+        def failing_generate_output(self: World, output_directory: str) -> None:
+            open(os.path.join(output_directory, str(os.getpid())), "w").close()
+            raise ValueError(self.player)
+
+        world_type = AutoWorldRegister.world_types["VVVVVV"]
+        multiworld = setup_multiworld(world_type, 3)
+        with tempfile.TemporaryDirectory() as output_directory, \
+                mock.patch.object(world_type, "generate_output", failing_generate_output), \
+                mock.patch.object(world_type, "output_attributes", ()), \
+                ThreadPoolExecutor(2) as pool:
+            futures = submit_generate_output(multiworld, output_directory, 2, pool)
+            wait(futures)
+            for future, directory in futures.items():
+                if os.path.basename(directory) != "stage":
+                    self.assertIsInstance(future.exception(), ValueError)
+                    self.assertNotIn(str(os.getpid()), os.listdir(directory))
+
+    def test_errors_set_events(self) -> None:
+        """generate_output failing in a worker sets the world's events before failing its future, so the main process
+        waiting for them in modify_multidata doesn't hang."""
+        def failing_generate_output(self: World, output_directory: str) -> None:
+            try:
+                raise ValueError(self.player)
+            finally:
+                self.output_done.set()
+
+        world_type = AutoWorldRegister.world_types["VVVVVV"]
+        multiworld = setup_multiworld(world_type, 3)
+        set_before_failing: List[bool] = []
+        for world in multiworld.worlds.values():
+            world.output_done = threading.Event()
+        with tempfile.TemporaryDirectory() as output_directory, \
+                mock.patch.object(world_type, "generate_output", failing_generate_output), \
+                mock.patch.object(world_type, "output_attributes", ()), \
+                ThreadPoolExecutor(2) as pool:
+            futures = submit_generate_output(multiworld, output_directory, 2, pool)
+            for world in multiworld.worlds.values():
+                self.assertTrue(world.output_done.wait(60))
+            for future, directory in futures.items():
+                if os.path.basename(directory) != "stage":
+                    future.add_done_callback(lambda future: set_before_failing.append(
+                        all(world.output_done.is_set() for world in multiworld.worlds.values())))
+                    self.assertIsInstance(future.exception(60), ValueError)
+        self.assertEqual(set_before_failing, [True] * 3)
+
+    def test_no_fallback_after_shutdown(self) -> None:
+        """Output that can't be sent back after thread_pool got shut down fails, instead of being submitted to it."""
+        def waiting_generate_output(self: World, output_directory: str) -> None:
+            while not os.path.exists(os.path.join(output_directory, os.pardir, "shut down")):
+                time.sleep(0.01)
+            self.output_done.set()
+
+        world_type = AutoWorldRegister.world_types["VVVVVV"]
+        multiworld = setup_multiworld(world_type, 3)
+        for world in multiworld.worlds.values():
+            world.output_done = threading.Event()
+        with tempfile.TemporaryDirectory() as output_directory, \
+                mock.patch.object(world_type, "generate_output", waiting_generate_output), \
+                mock.patch.object(world_type, "output_attributes", ("output_done",)):
+            with ThreadPoolExecutor(2) as pool:
+                futures = submit_generate_output(multiworld, output_directory, 2, pool)
+            open(os.path.join(output_directory, "shut down"), "w").close()
+            self.assertFalse(wait(futures, 60).not_done)
+            for future, directory in futures.items():
+                if os.path.basename(directory) != "stage":
+                    self.assertIsInstance(future.exception(), AutoWorld._OutputNotSent)
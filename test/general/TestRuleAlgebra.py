@@ -0,0 +1,108 @@
+import pickle
+import random
+import unittest
+from typing import Callable, List, Tuple
+
+from BaseClasses import CollectionState, Entrance, Item, ItemClassification, Location, Region, RegionType
+from test.general.TestFill import generate_multi_world
+from worlds.generic.Rules import And, CanReach, Constant, Count, Has, HasAll, HasAny, Or, Rule, _compile_rule, \
+    add_rule, set_rule
+
+
+def generate_rules(player: int) -> List[Tuple[Rule, Callable[[CollectionState], bool]]]:
+    return [
+        (Has("A", player), lambda state: state.has("A", player)),
+        (Has("A", player, 2), lambda state: state.has("A", player, 2)),
+        (Has("A", player, 0), lambda state: True),
+        (HasAll(["A", "B"], player), lambda state: state.has_all({"A", "B"}, player)),
+        (HasAny(["B", "C"], player), lambda state: state.has_any({"B", "C"}, player)),
+        (HasAny([], player), lambda state: False),
+        (Count(["A", "B", "C"], player, 3),
+         lambda state: state.count("A", player) + state.count("B", player) + state.count("C", player) >= 3),
+        (Has("A", player) & Has("A", player, 3) & Has("B", player),
+         lambda state: state.has("A", player, 3) and state.has("B", player)),
+        (Has("A", player, 3) | Has("A", player) | Has("C", player, 2),
+         lambda state: state.has("A", player) or state.has("C", player, 2)),
+        ((Has("B", player) | HasAll(["A", "C"], player)) & Count(["A", "C"], player, 2),
+         lambda state: (state.has("B", player) or state.has_all({"A", "C"}, player))
+         and state.count("A", player) + state.count("C", player) >= 2),
+        (CanReach("Region", "Region", player) | Has("C", player),
+         lambda state: state.can_reach("Region", "Region", player) or state.has("C", player)),
+    ]
+
+
+class TestRuleAlgebra(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_multi_world(2)
+        menu = self.multiworld.get_region("Menu", 1)
+        region = Region("Region", RegionType.Generic, "Region Hint", 1, self.multiworld)
+        self.multiworld.regions.append(region)
+        entrance = Entrance(1, "to Region", menu)
+        entrance.access_rule = lambda state: state.has("D", 1)
+        menu.exits.append(entrance)
+        entrance.connect(region)
+        self.multiworld._recache()
+
+    def test_matches_lambdas(self) -> None:
+        rng = random.Random(0)
+        rules = generate_rules(1)
+        state = CollectionState(self.multiworld)
+        for _ in range(40):
+            state.collect(Item(rng.choice("ABCD"), ItemClassification.progression, None, rng.choice((1, 2))), True)
+            for rule, function in rules:
+                with self.subTest(rule=rule):
+                    self.assertEqual(rule(state), function(state))
+                    # without simplifying it first
+                    self.assertEqual(_compile_rule(rule)[0](state), function(state))
+
+    def test_compiled_once(self) -> None:
+        self.assertIs((Has("A", 1) & Count(["B", "C"], 1, 2))._compile(),
+                      (Has("A", 1) & Count(["B", "C"], 1, 2))._compile())
+        with self.assertRaises(TypeError):
+            Rule()
+
+    def test_simplify(self) -> None:
+        self.assertEqual((Has("A", 1) & Has("A", 1, 2)).simplify(), Has("A", 1, 2))
+        self.assertEqual((Has("A", 1) | Has("A", 1, 2)).simplify(), Has("A", 1))
+        self.assertEqual((Has("A", 1) & (Has("B", 1) & Constant(True))).simplify(), And(Has("A", 1), Has("B", 1)))
+        self.assertEqual((Has("A", 1) | (Has("B", 1) | Constant(True))).simplify(), Constant(True))
+        self.assertEqual((Has("A", 1) & Constant(False)).simplify(), Constant(False))
+        self.assertEqual(Or(Has("A", 1), Has("A", 2), Count(["B"], 1, 2)).simplify(),
+                         Or(Has("A", 1), Has("A", 2), Has("B", 1, 2)))
+        self.assertEqual(And(CanReach("Region", "Region", 1), CanReach("Region", "Region", 1)).simplify(),
+                         CanReach("Region", "Region", 1))
+
+    def test_item_dependencies(self) -> None:
+        self.assertEqual((Has("A", 1) & HasAny(["B", "C"], 2)).item_dependencies, {("A", 1), ("B", 2), ("C", 2)})
+        self.assertEqual(Constant(True).item_dependencies, set())
+        self.assertIsNone((Has("A", 1) | CanReach("Region", "Region", 1)).item_dependencies)
+
+        state = CollectionState(self.multiworld)
+        self.assertEqual(state._evaluate_recorded(Has("A", 1) & Has("B", 1)), (False, {("A", 1), ("B", 1)}))
+
+    def test_set_and_add_rule(self) -> None:
+        location = Location(1, "Location", None, self.multiworld.get_region("Menu", 1))
+        add_rule(location, HasAll(["A"], 1))
+        self.assertEqual(location.access_rule, Has("A", 1))
+        add_rule(location, Has("A", 1, 2) | Has("B", 1))
+        self.assertEqual(location.access_rule, And(Or(Has("A", 1, 2), Has("B", 1)), Has("A", 1)))
+        add_rule(location, Has("C", 1), "or")
+        self.assertIsInstance(location.access_rule, Or)
+
+        set_rule(location, HasAny(["A"], 1))
+        self.assertEqual(location.access_rule, Has("A", 1))
+        # plain functions still combine with rules
+        add_rule(location, lambda state: state.has("B", 1))
+        state = CollectionState(self.multiworld)
+        state.collect(Item("A", ItemClassification.progression, None, 1), True)
+        self.assertFalse(location.can_reach(state))
+        state.collect(Item("B", ItemClassification.progression, None, 1), True)
+        self.assertTrue(location.can_reach(state))
+
+    def test_pickle(self) -> None:
+        rule = Has("A", 1) & Count(["B", "C"], 1, 2)
+        state = CollectionState(self.multiworld)
+        self.assertFalse(rule(state))
+        copied = pickle.loads(pickle.dumps(rule))
+        self.assertEqual(copied, rule)
+        self.assertFalse(copied(state))
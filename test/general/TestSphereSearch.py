@@ -0,0 +1,134 @@
+import random
+import unittest
+from typing import List, Set
+
+from BaseClasses import CollectionState, Item, ItemClassification, Location, LocationProgressType, MultiWorld, \
+    SphereSearch
+from test.general.TestCollectionState import generate_random_regions, generate_tracked_multi_world
+
+
+def generate_random_locations(multiworld: MultiWorld, rng: random.Random, item_names: List[str]) -> None:
+    rules = [
+        lambda state: True,
+        *(lambda state, name=name: state.has(name, 1) for name in item_names),
+        *(lambda state, name=name: state.has(name, 1, 2) for name in item_names),
+        lambda state: state.has_all({"A", "B"}, 1),
+        lambda state: state.can_reach("Region 3", "Region", 1),
+    ]
+    regions = list(multiworld.get_regions(1))
+    for i in range(60):
+        region = rng.choice(regions)
+        location = Location(1, f"Location {i}", None, region)
+        location.access_rule = rng.choice(rules)
+        region.locations.append(location)
+    locations = multiworld.get_locations(1)
+    for location in rng.sample(locations, 20):
+        location.item = Item(rng.choice(item_names), ItemClassification.progression, None, 1)
+        location.event = True
+    multiworld.clear_location_cache()
+
+
+def get_spheres_by_full_search(multiworld: MultiWorld) -> List[Set[Location]]:
+    state = CollectionState(multiworld)
+    locations = set(multiworld.get_filled_locations())
+    spheres = []
+    while locations:
+        sphere = {location for location in locations if location.can_reach(state)}
+        spheres.append(sphere)
+        if not sphere:
+            break
+        for location in sphere:
+            state.collect(location.item, True, location)
+        locations -= sphere
+    return spheres
+
+
+class TestSphereSearch(unittest.TestCase):
+    item_names = ["A", "B", "C", "D", "E"]
+
+    def test_matches_full_search(self) -> None:
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                multiworld = generate_tracked_multi_world()
+                generate_random_regions(multiworld, 1, rng, item_names=self.item_names)
+                generate_random_locations(multiworld, rng, self.item_names)
+                spheres = get_spheres_by_full_search(multiworld)
+                if not spheres[-1]:
+                    spheres.append(set(multiworld.get_filled_locations()).difference(*spheres))
+                self.assertEqual(list(multiworld.get_spheres()), spheres)
+
+    def test_sphere_record(self) -> None:
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                multiworld = generate_tracked_multi_world()
+                generate_random_regions(multiworld, 1, rng, item_names=self.item_names)
+                generate_random_locations(multiworld, rng, self.item_names)
+                # opens up enough of the random regions for the game to be beaten in some seeds only
+                for name in ("A", "B", "C", "D"):
+                    multiworld.push_precollected(Item(name, ItemClassification.progression, None, 1))
+                multiworld.completion_condition[1] = lambda state: state.has("E", 1)
+                # the accessibility check doesn't collect items at excluded locations, unlike the playthrough
+                for location in rng.sample(multiworld.get_filled_locations(), 2):
+                    location.progress_type = LocationProgressType.EXCLUDED
+                spheres = get_spheres_by_full_search(multiworld)
+                record = multiworld.get_sphere_record()
+                self.assertEqual(record.sphere_numbers, {location: number for number, sphere in
+                                                         enumerate(spheres, start=1) for location in sphere})
+                state = CollectionState(multiworld)
+                beaten_sphere = None
+                for number, sphere in enumerate(spheres, start=1):
+                    for location in sphere:
+                        state.collect(location.item, True, location)
+                    if beaten_sphere is None and multiworld.has_beaten_game(state):
+                        beaten_sphere = number
+                self.assertEqual(record.beaten_sphere, beaten_sphere)
+                self.assertEqual(record.beatable, multiworld.can_beat_game())
+                self.assertEqual(multiworld.fulfills_accessibility(),
+                                 multiworld.fulfills_accessibility(CollectionState(multiworld)))
+
+    def test_accessibility_skips_excluded(self) -> None:
+        multiworld = generate_tracked_multi_world()
+        menu = multiworld.get_region("Menu", 1)
+        excluded = Location(1, "Excluded", None, menu)
+        excluded.progress_type = LocationProgressType.EXCLUDED
+        behind = Location(1, "Behind", None, menu)
+        behind.access_rule = lambda state: state.has("A", 1)
+        menu.locations += [excluded, behind]
+        multiworld.clear_location_cache()
+        for location, name in ((excluded, "A"), (behind, "B")):
+            location.place_locked_item(Item(name, ItemClassification.progression, None, 1))
+        multiworld.completion_condition[1] = lambda state: state.has("B", 1)
+        self.assertTrue(multiworld.can_beat_game())
+        self.assertFalse(multiworld.fulfills_accessibility(CollectionState(multiworld)))
+        self.assertFalse(multiworld.fulfills_accessibility())
+
+    def test_only_returns_reachable_once(self) -> None:
+        multiworld = generate_tracked_multi_world()
+        generate_random_regions(multiworld, 1, random.Random(0), item_names=self.item_names)
+        generate_random_locations(multiworld, random.Random(0), self.item_names)
+        menu = multiworld.get_region("Menu", 1)
+        menu.locations.append(Location(1, "Menu Location", None, menu))
+        multiworld.clear_location_cache()
+        state = CollectionState(multiworld)
+        locations = set(multiworld.get_locations())
+        search = SphereSearch(state, locations)
+        reachable = search.find_reachable()
+        self.assertTrue(reachable)
+        self.assertFalse(reachable & search.find_reachable())
+        for name in self.item_names:
+            state.collect(Item(name, ItemClassification.progression, None, 1), True)
+        self.assertEqual(reachable | search.find_reachable(),
+                         {location for location in locations if location.can_reach(state)})
+
+    def test_spheres_are_cached(self) -> None:
+        multiworld = generate_tracked_multi_world()
+        generate_random_regions(multiworld, 1, random.Random(0), item_names=self.item_names)
+        generate_random_locations(multiworld, random.Random(0), self.item_names)
+        spheres = list(multiworld.get_spheres())
+        self.assertTrue(all(cached is sphere for cached, sphere in zip(multiworld.get_spheres(), spheres)))
+
+        filled = multiworld.get_filled_locations()
+        filled[0].item = Item("A", ItemClassification.progression, None, 1)
+        self.assertFalse(any(cached is sphere for cached, sphere in zip(multiworld.get_spheres(), spheres)))
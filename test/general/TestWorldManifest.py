@@ -0,0 +1,50 @@
+import unittest
+from unittest import mock
+
+import worlds
+from worlds import WorldSource, data_package_checksum
+from worlds.AutoWorld import AutoWorldRegister, WorldTypes
+
+
+class TestWorldManifest(unittest.TestCase):
+    def test_matches_worlds(self) -> None:
+        """The data of worlds that weren't imported for it is the same as the data of the imported worlds."""
+        for game, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest(game=game):
+                game_package = {
+                    "item_name_to_id": world_type.item_name_to_id,
+                    "location_name_to_id": world_type.location_name_to_id,
+                    "version": world_type.data_version,
+                }
+                game_package["checksum"] = data_package_checksum(game_package)
+                self.assertEqual(worlds.network_data_package["games"][game], game_package)
+                game_info = worlds.game_info[game]
+                self.assertEqual(game_info.item_name_groups, world_type.item_name_groups)
+                self.assertEqual(game_info.hint_blacklist, world_type.hint_blacklist)
+                self.assertEqual(game_info.forced_auto_forfeit, world_type.forced_auto_forfeit)
+                self.assertEqual(game_info.hidden, world_type.hidden)
+        self.assertEqual(set(worlds.network_data_package["games"]), set(AutoWorldRegister.world_types))
+
+    def test_imports_on_lookup(self) -> None:
+        world_type = AutoWorldRegister.world_types["VVVVVV"]
+        world_types = WorldTypes({}, {"VVVVVV": WorldSource("v6")})
+        imported = []
+
+        def load_world_source(world_source: WorldSource) -> None:
+            imported.append(world_source)
+            world_types["VVVVVV"] = world_type
+
+        with mock.patch.object(worlds, "load_world_source", load_world_source):
+            self.assertEqual(len(world_types), 1)
+            self.assertNotIn("Other", world_types)
+            self.assertFalse(imported)
+            self.assertIs(world_types["VVVVVV"], world_type)
+            self.assertIs(world_types["VVVVVV"], world_type)
+            self.assertEqual(list(world_types), ["VVVVVV"])
+        self.assertEqual(imported, [WorldSource("v6")])
+
+    def test_checksum(self) -> None:
+        game_package = dict(worlds.network_data_package["games"]["VVVVVV"])
+        self.assertEqual(data_package_checksum(game_package), game_package["checksum"])
+        game_package["location_name_to_id"] = dict(game_package["location_name_to_id"], Other=1)
+        self.assertNotEqual(data_package_checksum(game_package), game_package["checksum"])
@@ -1,5 +1,14 @@
+import asyncio
+import copy
+import os
+import tempfile
+import time
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+from unittest import mock
+from MultiServer import Client, Context, ServerCommandProcessor, collect_hints, get_remaining, \
+    process_client_cmd, register_location_checks, send_items_to, send_new_items
+from NetUtils import Hint, NetworkItem, NetworkSlot, SlotType, decode, encode
+from Utils import dump_multidata
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +47,283 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestDataPackage(unittest.IsolatedAsyncioTestCase):
+    def test_encoded(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        games = ["VVVVVV", "Archipelago", "Unknown Game"]
+        expected = [{"cmd": "DataPackage", "data": {"games": {game: ctx.gamespackage[game] for game in games[:2]}}}]
+        self.assertEqual(ctx.get_encoded_data_package(games), encode(expected))
+        self.assertEqual(decode(ctx.get_encoded_data_package(games)), expected)
+        self.assertEqual(decode(ctx.get_encoded_data_package([])), [{"cmd": "DataPackage", "data": {"games": {}}}])
+
+    def test_refreshed(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.get_encoded_data_package(["VVVVVV"])
+        ctx.gamespackage = dict(ctx.gamespackage, VVVVVV={"item_name_to_id": {}, "location_name_to_id": {},
+                                                          "version": 0, "checksum": ""})
+        ctx._init_game_data()
+        self.assertEqual(decode(ctx.get_encoded_data_package(["VVVVVV"]))[0]["data"]["games"]["VVVVVV"],
+                         ctx.gamespackage["VVVVVV"])
+
+
+class TestSendNewItems(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx.clients = {0: {1: [], 2: []}}
+        self.sent = []
+        self.ctx.broadcast = lambda endpoints, msgs: self.sent.append((list(endpoints), msgs))
+
+    def add_client(self, slot: int, items_handling: int) -> Client:
+        client = Client(None, self.ctx)
+        client.team, client.slot, client.items_handling = 0, slot, items_handling
+        self.ctx.clients[0][slot].append(client)
+        return client
+
+    async def test_coalesced(self) -> None:
+        clients = [self.add_client(1, 0b111), self.add_client(1, 0b111)]
+        other_client = self.add_client(1, 0b001)
+        self.add_client(2, 0b111)
+        for location in range(3):
+            send_items_to(self.ctx, 0, 1, NetworkItem(100 + location, location, 2))
+            send_new_items(self.ctx)
+        send_items_to(self.ctx, 0, 1, NetworkItem(103, 3, 1))
+        send_new_items(self.ctx)
+        self.assertEqual(self.sent, [])
+        await asyncio.sleep(0)
+        self.assertEqual(self.sent, [
+            (clients, [{"cmd": "ReceivedItems", "index": 0,
+                        "items": [*(NetworkItem(100 + location, location, 2) for location in range(3)),
+                                  NetworkItem(103, 3, 1)]}]),
+            ([other_client], [{"cmd": "ReceivedItems", "index": 0,
+                               "items": [NetworkItem(100 + location, location, 2) for location in range(3)]}]),
+        ])
+        self.assertEqual([client.send_index for client in clients], [4, 4])
+        self.assertEqual(other_client.send_index, 3)
+        self.assertFalse(self.ctx.new_items_slots)
+
+
+def create_multidata() -> dict:
+    return {
+        "minimum_versions": {"server": (0, 0, 0), "clients": {}},
+        "names": [["Player1", "Player2", "Group"]],
+        "seed_name": "12345",
+        "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+        #             location: (item, receiving player, flags)
+        "locations": {1: {10: (100, 2, 1), 11: (101, 3, 0), 12: (100, 1, 0)},
+                      2: {20: (100, 2, 0), 21: (102, 1, 0), 22: (101, 3, 0)}},
+        "slot_data": {1: {}, 2: {}},
+        "er_hint_data": {2: {20: "Entrance"}},
+        "precollected_items": {1: [], 2: []},
+        "precollected_hints": {1: set(), 2: set()},
+        "slot_info": {1: NetworkSlot("Player1", "VVVVVV", SlotType.player),
+                      2: NetworkSlot("Player2", "VVVVVV", SlotType.player),
+                      3: NetworkSlot("Group", "VVVVVV", SlotType.group, [1, 2])},
+    }
+
+
+class TestBounce(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx._load(create_multidata(), False)
+        self.ctx.games[2] = "Other Game"
+        self.bounced = []
+
+        async def broadcast_send_encoded_msgs(endpoints, msg: str) -> bool:
+            if decode(msg)[0]["cmd"] == "Bounced":
+                self.bounced.append((set(endpoints), decode(msg)))
+            return True
+        self.ctx.broadcast_send_encoded_msgs = broadcast_send_encoded_msgs
+
+    def add_client(self, slot: int, tags: list) -> Client:
+        client = Client(None, self.ctx)
+        client.auth, client.team, client.slot, client.tags = True, 0, slot, tags
+        self.ctx.clients[0][slot].append(client)
+        self.ctx.index_client(client)
+        return client
+
+    async def bounce(self, sender: Client, **targets) -> set:
+        self.bounced.clear()
+        await process_client_cmd(self.ctx, sender, {"cmd": "Bounce", "data": {"time": 1}, **targets})
+        [(endpoints, msgs)] = self.bounced
+        self.assertEqual(msgs, [{"cmd": "Bounced", "data": {"time": 1}, **targets}])
+        return endpoints
+
+    async def test_targets(self) -> None:
+        death_link = self.add_client(1, ["DeathLink"])
+        tracker = self.add_client(1, ["Tracker"])
+        other = self.add_client(2, [])
+        self.assertEqual(await self.bounce(tracker, tags=["DeathLink"]), {death_link})
+        self.assertEqual(await self.bounce(tracker, games=["Other Game"]), {other})
+        self.assertEqual(await self.bounce(tracker, slots=[1], tags=["DeathLink"]), {death_link, tracker})
+        self.assertEqual(await self.bounce(tracker, games=["Unknown"], tags=["Unknown"], slots=[3, 4]), set())
+
+    async def test_index_updates(self) -> None:
+        client = self.add_client(1, [])
+        self.assertEqual(await self.bounce(client, tags=["DeathLink"]), set())
+        await process_client_cmd(self.ctx, client, {"cmd": "ConnectUpdate", "tags": ["DeathLink"]})
+        self.assertEqual(await self.bounce(client, tags=["DeathLink"]), {client})
+        await self.ctx.disconnect(client)
+        self.assertEqual(await self.bounce(client, tags=["DeathLink"], games=["VVVVVV"]), set())
+
+
+class TestLoad(unittest.IsolatedAsyncioTestCase):
+    def test_load_file(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "AP_12345.archipelago")
+            with open(path, "wb") as f:
+                f.write(dump_multidata(create_multidata()))
+            ctx = Context("", 0, "", "", 0, 0, False)
+            ctx.load(path)
+            # the file isn't in use anymore, but what wasn't needed for loading can still be read
+            os.remove(path)
+        self.assertFalse(ctx.slot_data.decoded)
+        self.assertEqual(ctx.read_data["slot_data_2"](), {})
+        self.assertEqual(ctx.slot_data[1], {})
+        self.assertEqual(ctx.data_filename, path)
+
+
+class TestLocationIndexes(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx._load(create_multidata(), False)
+
+    def test_collect_hints(self) -> None:
+        self.ctx.location_checks[0, 2].add(20)
+        self.assertEqual(set(collect_hints(self.ctx, 0, 2, 100)), {Hint(2, 1, 10, 100, False, "", 1),
+                                                                   Hint(2, 2, 20, 100, True, "Entrance", 0)})
+        self.assertEqual(set(collect_hints(self.ctx, 0, 1, 101)), {Hint(3, 1, 11, 101, False, "", 0),
+                                                                   Hint(3, 2, 22, 101, False, "", 0)})
+        self.assertEqual(collect_hints(self.ctx, 0, 1, 103), [])
+
+    def test_receiver_locations(self) -> None:
+        self.assertEqual(self.ctx.receiver_locations[3], {1: {11}, 2: {22}})
+        self.ctx.location_checks[0, 1].add(10)
+        self.assertEqual(get_remaining(self.ctx, 0, 1), [100, 101])
+
+
+class TestHints(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        multidata = create_multidata()
+        multidata["precollected_hints"][1] = {Hint(2, 1, 10, 100, False, "", 1)}
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx._load(multidata, False)
+
+    async def test_found(self) -> None:
+        self.ctx.notify_hints(0, collect_hints(self.ctx, 0, 1, 101))
+        self.assertEqual(self.ctx.hints[0, 2], {Hint(3, 2, 22, 101, False, "", 0), Hint(3, 1, 11, 101, False, "", 0)})
+        register_location_checks(self.ctx, 0, 1, [10, 11])
+        self.assertEqual(self.ctx.hints[0, 1], {Hint(2, 1, 10, 100, True, "", 1), Hint(3, 2, 22, 101, False, "", 0),
+                                                Hint(3, 1, 11, 101, True, "", 0)})
+        self.assertEqual(self.ctx.hints[0, 2], {Hint(3, 2, 22, 101, False, "", 0), Hint(3, 1, 11, 101, True, "", 0)})
+        self.assertEqual(set(self.ctx.hint_locations), {(0, 2, 22)})
+
+    def test_loaded(self) -> None:
+        savedata = self.ctx.get_save()
+        savedata["location_checks"] = {(0, 1): {10}}
+        self.ctx.set_save(savedata)
+        self.assertEqual(self.ctx.hints[0, 1], {Hint(2, 1, 10, 100, True, "", 1)})
+        self.assertFalse(self.ctx.hint_locations)
+
+
+class TestSaveJournal(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.ctx = self.load()
+
+    def load(self) -> Context:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx._load(create_multidata(), False)
+        ctx.data_filename = os.path.join(self.directory.name, "AP_12345.archipelago")
+        with mock.patch.object(ctx, "_start_async_saving"):
+            ctx.init_save()
+        return ctx
+
+    def play(self, location: int) -> None:
+        register_location_checks(self.ctx, 0, 1, [location])
+        self.ctx.notify_hints(0, collect_hints(self.ctx, 0, 2, 102))
+        self.ctx.stored_data["key"] = location
+        self.ctx.save_journal.stored_data.add("key")
+        self.ctx.name_aliases[0, 1] = str(location)
+
+    def assertLoaded(self) -> None:
+        save = self.ctx.get_save()
+        del save["random_state"]
+        loaded = self.load().get_save()
+        del loaded["random_state"]
+        self.assertEqual(loaded, save)
+
+    async def test_replay(self) -> None:
+        self.assertTrue(self.ctx._save())
+        self.play(10)
+        self.assertTrue(self.ctx._save())
+        self.assertTrue(os.path.exists(self.ctx.save_journal.filename))
+        self.play(11)
+        self.assertTrue(self.ctx._save())
+        self.assertLoaded()
+
+    async def test_compaction(self) -> None:
+        self.assertTrue(self.ctx._save())
+        self.ctx.save_journal.save_size = 1
+        self.play(10)
+        self.assertTrue(self.ctx._save())
+        self.play(11)
+        self.assertTrue(self.ctx._save())
+        self.assertFalse(os.path.exists(self.ctx.save_journal.filename))
+        self.assertLoaded()
+
+    async def test_stale(self) -> None:
+        self.assertTrue(self.ctx._save())
+        self.play(10)
+        self.assertTrue(self.ctx._save())
+        with open(self.ctx.save_journal.filename, "rb") as f:
+            journal = f.read()
+        self.assertTrue(self.ctx._save(True))
+        # written by a save that got interrupted after compacting, belongs to the previous save file
+        with open(self.ctx.save_journal.filename, "wb") as f:
+            f.write(journal)
+        self.ctx.save_journal.size = len(journal)
+        self.assertLoaded()
+
+    async def test_failed_write(self) -> None:
+        self.assertTrue(self.ctx._save())
+        self.ctx.save_journal.save_size = 1  # the next save is a complete one
+        self.play(10)
+        with mock.patch("MultiServer.zlib.compress", side_effect=OSError):
+            self.assertFalse(self.ctx._save())
+        self.assertNotIn(10, self.load().location_checks[0, 1])  # the last save is still there
+        self.play(11)
+        self.assertTrue(self.ctx._save())
+        self.assertFalse(os.path.exists(self.ctx.save_journal.filename))
+        self.assertLoaded()
+
+    def test_save_regularly_survives_errors(self) -> None:
+        sleep = time.sleep
+        self.ctx.save_dirty = True
+        with mock.patch("time.sleep", lambda seconds: sleep(0.01)), mock.patch("atexit.register"), \
+                mock.patch.object(self.ctx, "snapshot_save", side_effect=[ValueError, ({}, False)]), \
+                mock.patch.object(self.ctx, "write_save", side_effect=lambda snapshot: self.ctx.exit_event.set()) \
+                as write_save:
+            self.ctx._start_async_saving()
+            self.ctx.auto_saver_thread.join(10)
+        # retried after the snapshot failed
+        write_save.assert_called_once_with(({}, False))
+        self.assertFalse(self.ctx.save_dirty)
+
+    async def test_snapshot(self) -> None:
+        for save_size, location in ((0, 10), (1000000, 11)):  # a complete save, then a journal entry
+            with self.subTest(save_size=save_size):
+                self.ctx.save_journal.save_size = save_size
+                snapshot = self.ctx.snapshot_save()
+                self.assertEqual(snapshot[1], bool(save_size))
+                expected = copy.deepcopy(snapshot)
+                self.play(location)
+                self.assertEqual(snapshot, expected)
+
+    async def test_queue_save(self) -> None:
+        future = self.ctx.queue_save()
+        self.play(10)  # after the snapshot, so not part of the save
+        self.assertTrue(await asyncio.wrap_future(future))
+        self.assertNotIn(10, self.load().location_checks[0, 1])
@@ -0,0 +1,41 @@
+# Tests for GenerationProfile in Utils.py
+
+import gc
+import json
+import pickle
+import unittest
+
+from Utils import GenerationProfile
+from test.general.TestFill import generate_multi_world
+from worlds.AutoWorld import call_all
+
+
+class TestGenerationProfile(unittest.TestCase):
+    def test_measure(self):
+        profile = GenerationProfile()
+        # garbage of other tests being collected in between would count as negative allocations
+        gc.collect()
+        gc.disable()
+        try:
+            with profile.measure("stage"):
+                with profile.measure("stage", "Game"):
+                    data = [[] for _ in range(1000)]
+        finally:
+            gc.enable()
+        self.assertEqual(profile.measure_call("other", len, data), 1000)
+        report = json.loads(json.dumps(pickle.loads(pickle.dumps(profile)).to_dict()))
+        self.assertEqual([stage["name"] for stage in report["stages"]], ["stage", "other"])
+        stage = report["stages"][0]
+        self.assertEqual(stage["calls"], 1)
+        self.assertGreater(stage["allocations"], 0)
+        self.assertGreaterEqual(stage["time"], stage["games"]["Game"]["time"])
+        self.assertEqual(stage["games"]["Game"]["calls"], 1)
+        self.assertGreaterEqual(report["total"], stage["time"])
+
+    def test_stages_per_game(self):
+        multiworld = generate_multi_world(2)
+        call_all(multiworld, "generate_basic")
+        stage = multiworld.generation_profile.stages["generate_basic"]
+        self.assertEqual(stage["calls"], 1)
+        self.assertEqual({game: entry["calls"] for game, entry in stage["games"].items()},
+                         {"Game 1": 1, "Game 2": 1})
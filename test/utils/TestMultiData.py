@@ -0,0 +1,62 @@
+# Tests for the multidata format in Utils.py
+
+import mmap
+import pickle
+import tempfile
+import unittest
+import zlib
+
+from NetUtils import Hint, NetworkSlot, SlotType
+from Utils import MultiData, dump_multidata, multidata_format_version
+
+
+def create_multidata():
+    return {
+        "slot_data": {1: {"goal": 2}, 2: {}},
+        "slot_info": {1: NetworkSlot("Player1", "Game", SlotType.player),
+                      2: NetworkSlot("Player2", "Game", SlotType.player)},
+        "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+        "locations": {1: {100: (200, 2, 1), 2 ** 40: (2 ** 50, 1, 0)}, 2: {}},
+        "er_hint_data": {1: {100: "Entrance"}},
+        "precollected_hints": {1: {Hint(2, 1, 100, 200, False, "Entrance", 1)}, 2: set()},
+        "seed_name": "12345",
+    }
+
+
+class TestMultiData(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        multidata = create_multidata()
+        data = dump_multidata(multidata)
+        self.assertEqual(data[0], multidata_format_version)
+        loaded = MultiData(data)
+        self.assertEqual(set(loaded), set(multidata))
+        for key, value in multidata.items():
+            with self.subTest(key=key):
+                self.assertEqual(dict(loaded[key]) if key in ("locations", "slot_data") else loaded[key], value)
+
+    def test_decodes_on_access(self) -> None:
+        loaded = MultiData(dump_multidata(create_multidata()))
+        self.assertNotIn("er_hint_data", loaded.decoded)
+        self.assertEqual(loaded["locations"][2], {})
+        self.assertEqual(list(loaded["locations"].decoded), [2])
+        self.assertIs(loaded["locations"][2], loaded["locations"][2])
+
+    def test_release(self) -> None:
+        multidata = create_multidata()
+        with tempfile.TemporaryFile() as f:
+            f.write(dump_multidata(multidata))
+            f.flush()
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            loaded = MultiData(data)
+            self.assertEqual(loaded["locations"][2], {})
+            loaded.release()
+            data.close()  # raises BufferError if the map is still in use
+        self.assertEqual(dict(loaded["locations"]), multidata["locations"])
+        self.assertEqual(dict(loaded["slot_data"]), multidata["slot_data"])
+        self.assertEqual(loaded["er_hint_data"], multidata["er_hint_data"])
+
+    def test_loads_format_3(self) -> None:
+        from MultiServer import Context
+        multidata = create_multidata()
+        self.assertEqual(Context.decompress(bytes([3]) + zlib.compress(pickle.dumps(multidata))), multidata)
+        self.assertEqual(dict(Context.decompress(dump_multidata(multidata))["slot_info"]), multidata["slot_info"])
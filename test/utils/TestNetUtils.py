@@ -0,0 +1,47 @@
+# Tests for the network encoding in NetUtils.py
+
+import json
+import unittest
+
+from NetUtils import Hint, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, encode
+from Utils import Version
+
+
+class TestEncode(unittest.TestCase):
+    def test_typed_tuples(self) -> None:
+        self.assertEqual(encode([NetworkItem(1, 2, 3)]),
+                         '[{"item":1,"location":2,"player":3,"flags":0,"class":"NetworkItem"}]')
+        self.assertEqual(encode({1: NetworkSlot("Ä\"", "Game", SlotType.group, [1, 2])}),
+                         '{"1":{"name":"Ä\\"","game":"Game","type":2,"group_members":[1,2],"class":"NetworkSlot"}}')
+        self.assertEqual(encode(Hint(1, 2, 3, 4, True, "", 1)),
+                         '{"receiving_player":1,"finding_player":2,"location":3,"item":4,"found":true,'
+                         '"entrance":"","item_flags":1,"class":"Hint"}')
+        self.assertTrue(encode(NetworkItem(1, 2, 3, True)).endswith('"flags":true,"class":"NetworkItem"}'))
+
+    def test_same_as_json(self) -> None:
+        """Anything without NamedTuples is encoded like the json module does, sets like lists."""
+        values = [
+            1, -1.5, True, None, "text\n", [], {}, (), [[[]]],
+            {"a": [1, "b", None, 2.5], 1: {False: [True, {None: ()}]}, 2.5: "c"},
+            [SlotType.group, {SlotType.player: [SlotType.spectator]}, 2 ** 70],
+        ]
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(encode(value), json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+        self.assertEqual(json.loads(encode({"locations": {3, 1, 2}})), {"locations": [1, 2, 3]})
+
+    def test_mixed(self) -> None:
+        value = {"cmd": "Connected", "players": [NetworkPlayer(0, 1, "A", "B")], "version": Version(0, 3, 9),
+                 "items": (NetworkItem(1, 2, 3), 4, [NetworkItem(5, 6, 7, 1)])}
+        self.assertEqual(json.loads(encode(value)), {
+            "cmd": "Connected",
+            "players": [{"team": 0, "slot": 1, "alias": "A", "name": "B", "class": "NetworkPlayer"}],
+            "version": {"major": 0, "minor": 3, "build": 9, "class": "Version"},
+            "items": [{"item": 1, "location": 2, "player": 3, "flags": 0, "class": "NetworkItem"}, 4,
+                      [{"item": 5, "location": 6, "player": 7, "flags": 1, "class": "NetworkItem"}]],
+        })
+
+    def test_invalid(self) -> None:
+        for value in ({(1, 2): NetworkItem(1, 2, 3)}, [b"bytes", NetworkItem(1, 2, 3)], object()):
+            with self.subTest(value=value):
+                self.assertRaises(TypeError, encode, value)
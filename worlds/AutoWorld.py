@@ -1,20 +1,66 @@
 from __future__ import annotations
 
+import io
 import logging
+import multiprocessing
+import os
+import pickle
 import sys
 import pathlib
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, FrozenSet, Set, Tuple, List, Optional, TextIO, Any, Callable, Type, Union, TYPE_CHECKING, \
-    ClassVar
+    ClassVar, Iterator, MutableMapping
 
 from Options import AssembleOptions
 from BaseClasses import CollectionState
 
 if TYPE_CHECKING:
     from BaseClasses import MultiWorld, Item, Location, Tutorial
+    from . import WorldSource
+
+
+class WorldTypes(MutableMapping[str, "Type[World]"]):
+    """The registered worlds by game. Games the worlds manifest knows the world source of get their world imported
+    when they're first looked up, iterating imports all of them."""
+    loaded: Dict[str, Type[World]]
+    pending: Dict[str, WorldSource]
+
+    def __init__(self, loaded: Dict[str, Type[World]], pending: Dict[str, WorldSource]):
+        self.loaded = dict(loaded)
+        self.pending = {game: world_source for game, world_source in pending.items() if game not in self.loaded}
+
+    def _load(self, game: str) -> None:
+        world_source = self.pending.pop(game, None)
+        if world_source:
+            from . import load_world_source
+            load_world_source(world_source)
+
+    def __getitem__(self, game: str) -> Type[World]:
+        self._load(game)
+        return self.loaded[game]
+
+    def __setitem__(self, game: str, world_type: Type[World]) -> None:
+        self.pending.pop(game, None)
+        self.loaded[game] = world_type
+
+    def __delitem__(self, game: str) -> None:
+        self.pending.pop(game, None)
+        del self.loaded[game]
+
+    def __iter__(self) -> Iterator[str]:
+        for game in list(self.pending):
+            self._load(game)
+        return iter(self.loaded)
+
+    def __len__(self) -> int:
+        return len(self.loaded) + len(self.pending)
 
 
 class AutoWorldRegister(type):
-    world_types: Dict[str, Type[World]] = {}
+    world_types: Union[Dict[str, Type[World]], WorldTypes] = {}
 
     def __new__(mcs, name: str, bases: Tuple[type, ...], dct: Dict[str, Any]) -> AutoWorldRegister:
         if "web" in dct:
@@ -25,6 +71,7 @@ class AutoWorldRegister(type):
         # build reverse lookups
         dct["item_id_to_name"] = {code: name for name, code in dct["item_name_to_id"].items()}
         dct["location_id_to_name"] = {code: name for name, code in dct["location_name_to_id"].items()}
+        dct["item_name_to_index"] = {name: index for index, name in enumerate(dct["item_name_to_id"])}
 
         # build rest
         dct["item_names"] = frozenset(dct["item_name_to_id"])
@@ -74,29 +121,304 @@ class AutoLogicRegister(type):
 
 def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args: Any) -> Any:
     method = getattr(multiworld.worlds[player], method_name)
-    return method(*args)
+    with multiworld.generation_profile.measure(method_name, multiworld.game[player]):
+        return method(*args)
 
 
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
-    for player in multiworld.player_ids:
-        prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
-        call_single(multiworld, method_name, player, *args)
-        if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
-
-    # TODO: investigate: Iterating through a set is not a deterministic order.
-    # If any random is used, this could make unreproducible seed.
-    for world_type in world_types:
-        stage_callable = getattr(world_type, f"stage_{method_name}", None)
-        if stage_callable:
-            stage_callable(multiworld, *args)
+    with multiworld.generation_profile.measure(method_name):
+        world_types: Set[AutoWorldRegister] = set()
+        for player in multiworld.player_ids:
+            prev_item_count = len(multiworld.itempool)
+            world_types.add(multiworld.worlds[player].__class__)
+            call_single(multiworld, method_name, player, *args)
+            if __debug__:
+                new_items = multiworld.itempool[prev_item_count:]
+                for i, item in enumerate(new_items):
+                    for other in new_items[i+1:]:
+                        assert item is not other, (
+                            f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                            f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+        # TODO: investigate: Iterating through a set is not a deterministic order.
+        # If any random is used, this could make unreproducible seed.
+        for world_type in world_types:
+            stage_callable = getattr(world_type, f"stage_{method_name}", None)
+            if stage_callable:
+                with multiworld.generation_profile.measure(method_name, world_type.game):
+                    stage_callable(multiworld, *args)
+
+
+# stages that may run in worker processes for worlds with parallel_generation set.
+# set_rules and later stages create closures, which can not be transferred between processes.
+parallel_stages: FrozenSet[str] = frozenset({"generate_early", "create_regions", "create_items"})
+
+# set in the parent process right before forking workers for a stage, inherited by the workers
+_parallel_stage: Optional[Tuple["MultiWorld", str, List[Any], Dict[int, int]]] = None
+
+
+class _StagePickler(pickle.Pickler):
+    """Pickles a slot's stage results, referencing objects that already existed in the parent by index."""
+
+    def __init__(self, file: io.BytesIO, player: int, objects: List[Any], shared: int):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.player = player
+        self.objects = objects
+        self.shared = shared
+        self.indices = {id(obj): index for index, obj in enumerate(objects)}
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        index = self.indices.get(id(obj), None)
+        # the slot's own regions and items are sent in full, as the stage may have changed them
+        if index is not None and (index < self.shared or obj.player != self.player):
+            return index
+        return None
+
+
+class _StageUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, objects: List[Any]):
+        super().__init__(file)
+        self.objects = objects
+
+    def persistent_load(self, pid: int) -> Any:
+        return self.objects[pid]
+
+
+def _get_player_attributes(multiworld: "MultiWorld", player: int) -> List[str]:
+    from Options import per_game_common_options
+    return ["early_items", "local_early_items", "precollected_items", "completion_condition",
+            *per_game_common_options, *multiworld.worlds[player].option_definitions]
+
+
+def _run_parallel_stage(player: int) -> bytes:
+    multiworld, method_name, objects, seeds = _parallel_stage
+    multiworld.random.seed(seeds[player])
+    attributes = _get_player_attributes(multiworld, player)
+    before = {attribute: getattr(multiworld, attribute)[player] for attribute in attributes}
+
+    start, blocks = time.perf_counter(), sys.getallocatedblocks()
+    call_single(multiworld, method_name, player)
+    measured = time.perf_counter() - start, sys.getallocatedblocks() - blocks
+
+    world = multiworld.worlds[player]
+    player_attributes = {}
+    for attribute in attributes:
+        value = getattr(multiworld, attribute)[player]
+        # unchanged functions, like the default completion_condition, can't be pickled and don't need to be
+        if not (callable(value) and value is before[attribute]):
+            player_attributes[attribute] = value
+    result = (world.__dict__,
+              [region for region in multiworld.regions if region.player == player],
+              [item for item in multiworld.itempool if item.player == player],
+              player_attributes,
+              {region: entrances for region, entrances in multiworld.indirect_connections.items()
+               if region.player == player},
+              # like the structure entrances Minecraft shuffles in create_regions
+              {key: entrance for key, entrance in multiworld.spoiler.entrances.items() if key[2] == player},
+              measured)
+    data = io.BytesIO()
+    _StagePickler(data, player, objects, len(multiworld.worlds) + 1).dump(result)
+    return data.getvalue()
+
+
+def _replace_player_entries(entries: List[Any], player: int, new_entries: List[Any]) -> None:
+    """Replace a slot's entries in a list shared by all slots, in the place of its first old entry."""
+    position = next((index for index, entry in enumerate(entries) if entry.player == player), len(entries))
+    entries[:] = [entry for entry in entries if entry.player != player]
+    entries[position:position] = new_entries
+
+
+def _merge_parallel_stage(multiworld: "MultiWorld", method_name: str, player: int, result: Tuple[Any, ...]) -> None:
+    world_state, regions, items, player_attributes, indirect_connections, spoiler_entrances, \
+        (seconds, allocations) = result
+    world = multiworld.worlds[player]
+    multiworld.generation_profile.record(method_name, multiworld.game[player], seconds, allocations)
+    world.__dict__.clear()
+    world.__dict__.update(world_state)
+    _replace_player_entries(multiworld.regions, player, regions)
+    _replace_player_entries(multiworld.itempool, player, items)
+    if __debug__:
+        assert len(set(map(id, items))) == len(items), (
+            f"Duplicate item reference in \"{world.game}\" of player \"{multiworld.player_name[player]}\". "
+            f"Please make a copy instead.")
+    new_precollected = player_attributes["precollected_items"][len(multiworld.precollected_items[player]):]
+    for attribute, value in player_attributes.items():
+        getattr(multiworld, attribute)[player] = value
+    for item in new_precollected:
+        multiworld.state.collect(item, True)
+    for region in [region for region in multiworld.indirect_connections if region.player == player]:
+        del multiworld.indirect_connections[region]
+    multiworld.indirect_connections.update(indirect_connections)
+    multiworld.spoiler.entrances.update(spoiler_entrances)
+
+
+def call_all_parallel(multiworld: "MultiWorld", method_name: str, processes: int) -> None:
+    """Like call_all, but runs the stage of worlds that set parallel_generation in up to processes worker processes.
+    Results of each worker are merged back into the MultiWorld. If a slot's stage fails in its worker,
+    it is run again in this process instead, so errors get raised the same way as with call_all.
+    Running in parallel is opt-in: each of those worlds runs its stage with multiworld.random seeded for its slot,
+    also when it gets run again in this process, so a seed generates differently than with call_all.
+    Without worker processes, this is call_all."""
+    global _parallel_stage
+    players = [player for player in multiworld.player_ids if multiworld.worlds[player].parallel_generation]
+    if processes < 2 or method_name not in parallel_stages or len(players) < 2 \
+            or "fork" not in multiprocessing.get_all_start_methods():
+        return call_all(multiworld, method_name)
+
+    with multiworld.generation_profile.measure(method_name):
+        seeds = {player: multiworld.random.getrandbits(64) for player in players}
+        objects: List[Any] = [multiworld, *multiworld.worlds.values()]
+        objects += multiworld.regions
+        objects += multiworld.itempool
+        for precollected in multiworld.precollected_items.values():
+            objects += precollected
+        pool: Optional[ProcessPoolExecutor] = None
+        _parallel_stage = multiworld, method_name, objects, seeds
+        try:
+            pool = ProcessPoolExecutor(processes, multiprocessing.get_context("fork"))
+            futures: Dict[int, Future[bytes]] = {player: pool.submit(_run_parallel_stage, player)
+                                                 for player in players}
+            world_types: Set[AutoWorldRegister] = set()
+            for player in multiworld.player_ids:
+                world_types.add(multiworld.worlds[player].__class__)
+                if player in futures:
+                    try:
+                        result = _StageUnpickler(io.BytesIO(futures[player].result()), objects).load()
+                    except Exception as e:
+                        logging.debug(f"{method_name} of player {multiworld.player_name[player]} could not be "
+                                      f"run in parallel, running it in the main process instead: {e!r}")
+                    else:
+                        _merge_parallel_stage(multiworld, method_name, player, result)
+                        continue
+                if player in seeds:
+                    random_state = multiworld.random.getstate()
+                    multiworld.random.seed(seeds[player])
+                    call_single(multiworld, method_name, player)
+                    multiworld.random.setstate(random_state)
+                else:
+                    call_single(multiworld, method_name, player)
+        finally:
+            if pool:
+                pool.shutdown()
+            _parallel_stage = None
+        multiworld._recache()
+
+        for world_type in world_types:
+            stage_callable = getattr(world_type, f"stage_{method_name}", None)
+            if stage_callable:
+                with multiworld.generation_profile.measure(method_name, world_type.game):
+                    stage_callable(multiworld)
+
+
+# set in the parent process right before forking workers for generate_output, inherited by the workers
+_output_stage: Optional["MultiWorld"] = None
+
+
+class _OutputNotSent(Exception):
+    """generate_output ran in a worker, but what it changed can't be sent back to the parent."""
+
+
+def _run_output(player: int, output_directory: str) -> bytes:
+    multiworld = _output_stage
+    world = multiworld.worlds[player]
+
+    start, blocks = time.perf_counter(), sys.getallocatedblocks()
+    call_single(multiworld, "generate_output", player, output_directory)
+    measured = time.perf_counter() - start, sys.getallocatedblocks() - blocks
+
+    attributes = {attribute: world.__dict__[attribute] for attribute in world.output_attributes
+                  if attribute in world.__dict__}
+    # events the world uses to tell fill_slot_data or modify_multidata that its output is done
+    events = [name for name, value in world.__dict__.items() if isinstance(value, threading.Event) and value.is_set()]
+    try:
+        return pickle.dumps((attributes, events, measured), pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        raise _OutputNotSent(repr(e))
+
+
+def _merge_output(multiworld: "MultiWorld", player: int, result: Tuple[Any, ...]) -> None:
+    attributes, events, (seconds, allocations) = result
+    world = multiworld.worlds[player]
+    multiworld.generation_profile.record("generate_output", multiworld.game[player], seconds, allocations)
+    world.__dict__.update(attributes)
+    for name in events:
+        getattr(world, name).set()
+
+
+def _fail_output(multiworld: "MultiWorld", player: int, future: Future, error: BaseException) -> None:
+    # the world's events only got set in the worker, anything waiting for them would never stop
+    for value in multiworld.worlds[player].__dict__.values():
+        if isinstance(value, threading.Event):
+            value.set()
+    future.set_exception(error)
+
+
+def _copy_future(source: Future, target: Future) -> None:
+    if source.exception() is None:
+        target.set_result(source.result())
+    else:
+        target.set_exception(source.exception())
+
+
+def submit_generate_output(multiworld: "MultiWorld", output_directory: str, processes: int,
+                           thread_pool: Executor) -> Dict[Future[Any], str]:
+    """Submits generate_output of every world, returning the futures of the calls with the directory each of them
+    writes to. Every call gets its own directory in output_directory, so its files are complete once it's done.
+    Worlds that declare output_attributes run it in up to processes worker processes, everything else runs on
+    thread_pool. Workers are forked, so this has to be called before thread_pool starts any threads.
+    If a slot's output can't be sent back from its worker, it is run again on thread_pool instead, unless thread_pool
+    has been shut down by then. Errors of generate_output itself are set on its future as they are, after setting the
+    events of the world, so that waiting for them in the main process doesn't hang."""
+    global _output_stage
+    players = [player for player in multiworld.player_ids
+               if World.generate_output.__code__ is not multiworld.worlds[player].generate_output.__code__]
+    process_players = [player for player in players if multiworld.worlds[player].output_attributes is not None]
+    directories = {player: os.path.join(output_directory, str(player)) for player in players}
+    for directory in directories.values():
+        os.mkdir(directory)
+    futures: Dict[Future[Any], str] = {}
+    if processes > 1 and len(process_players) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        _output_stage = multiworld
+        try:
+            # the workers get forked on the first submit and inherit the MultiWorld, no World has to be pickled
+            process_pool = ProcessPoolExecutor(min(processes, len(process_players)),
+                                               multiprocessing.get_context("fork"))
+            for player in process_players:
+                future: Future[Any] = Future()
+                futures[future] = directories[player]
+
+                def merge(done: Future[bytes], player: int = player, future: Future[Any] = future) -> None:
+                    try:
+                        _merge_output(multiworld, player, pickle.loads(done.result()))
+                    except (_OutputNotSent, BrokenProcessPool, pickle.UnpicklingError) as e:
+                        logging.debug(f"generate_output of player {multiworld.player_name[player]} could not be run "
+                                      f"in parallel, running it in the main process instead: {e!r}")
+                        try:
+                            fallback = thread_pool.submit(call_single, multiworld, "generate_output", player,
+                                                          directories[player])
+                        except RuntimeError:  # generation got aborted, which shut thread_pool down
+                            _fail_output(multiworld, player, future, e)
+                        else:
+                            fallback.add_done_callback(lambda fallback: _copy_future(fallback, future))
+                    except BaseException as e:
+                        _fail_output(multiworld, player, future, e)
+                    else:
+                        future.set_result(None)
+
+                process_pool.submit(_run_output, player, directories[player]).add_done_callback(merge)
+            # lets the workers finish what was submitted, then frees them
+            process_pool.shutdown(wait=False)
+        finally:
+            _output_stage = None
+        players = [player for player in players if player not in process_players]
+
+    stage_directory = os.path.join(output_directory, "stage")
+    os.mkdir(stage_directory)
+    futures[thread_pool.submit(call_stage, multiworld, "generate_output", stage_directory)] = stage_directory
+    for player in players:
+        futures[thread_pool.submit(call_single, multiworld, "generate_output", player, directories[player])] = \
+            directories[player]
+    return futures
 
 
 def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
@@ -104,7 +426,8 @@ def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     for world_type in world_types:
         stage_callable = getattr(world_type, f"stage_{method_name}", None)
         if stage_callable:
-            stage_callable(multiworld, *args)
+            with multiworld.generation_profile.measure(method_name, world_type.game):
+                stage_callable(multiworld, *args)
 
 
 class WebWorld:
@@ -167,6 +490,27 @@ class World(metaclass=AutoWorldRegister):
     # Hide World Type from various views. Does not remove functionality.
     hidden: ClassVar[bool] = False
 
+    # Entrance rules get re-checked only when an item they read changes. Only set this to True if access rules depend
+    # on nothing but items, regions and data that doesn't change during generation, not on CollectionState data kept
+    # outside of prog_items, like a LogicMixin's init_mixin/copy_mixin state, or on values cached on the (multi)world.
+    incremental_reachability: ClassVar[bool] = False
+
+    # Keep CollectionState's counts of this world's items in an array instead of prog_items' dict, which makes
+    # CollectionState.has and related methods cheaper. Items counted this way are not part of iterating prog_items.
+    compact_item_counts: ClassVar[bool] = False
+
+    # Allow generate_early, create_regions and create_items of this world to run in a worker process when parallel
+    # generation is enabled in host.yaml. In those stages, the world may only change its own attributes, its own
+    # regions, its items in the itempool, its precollected items and its own per-player MultiWorld attributes,
+    # and everything it creates has to be picklable. Stages that can't be transferred fall back to running serially.
+    parallel_generation: ClassVar[bool] = False
+
+    # Names of the attributes generate_output sets on this world that later stages, like fill_slot_data or
+    # modify_multidata, read. Declaring them, even as an empty tuple, allows generate_output to run in a worker process
+    # when parallel generation is enabled in host.yaml. Only these attributes and which of the world's
+    # threading.Events got set are sent back, so generate_output may not change anything else that is used later.
+    output_attributes: ClassVar[Optional[Tuple[str, ...]]] = None
+
     # see WebWorld for options
     web: ClassVar[WebWorld] = WebWorld()
 
@@ -176,6 +520,7 @@ class World(metaclass=AutoWorldRegister):
 
     # automatically generated
     item_id_to_name: ClassVar[Dict[int, str]]
+    item_name_to_index: ClassVar[Dict[str, int]]  # position of each item name in item_name_to_id
     location_id_to_name: ClassVar[Dict[int, str]]
 
     item_names: ClassVar[Set[str]]  # set of all potential item names
@@ -232,7 +577,8 @@ class World(metaclass=AutoWorldRegister):
         This happens before progression balancing, so the items may not be in their final locations yet."""
 
     def generate_output(self, output_directory: str) -> None:
-        """This method gets called from a threadpool, do not use world.random here.
+        """This method gets called from a threadpool, or a worker process if output_attributes is declared,
+        do not use world.random here.
         If you need any last-second randomization, use MultiWorld.slot_seeds[slot] instead."""
         pass
 
@@ -24,6 +24,11 @@ class AutoPatchRegister(type):
 
     @staticmethod
     def get_handler(file: str) -> Optional[AutoPatchRegister]:
+        # the world the handler comes from may not be imported yet
+        from . import load_world_source, patch_file_endings
+        for file_ending, world_source in patch_file_endings.items():
+            if file.endswith(file_ending):
+                load_world_source(world_source)
         for file_ending, handler in AutoPatchRegister.file_endings.items():
             if file.endswith(file_ending):
                 return handler
@@ -1,19 +1,33 @@
+import hashlib
 import importlib
+import json
+import logging
 import os
 import sys
 import typing
 import warnings
 import zipimport
 
+from .AutoWorld import AutoWorldRegister, WorldTypes
+
 folder = os.path.dirname(__file__)
+# data of all worlds, written after importing them, so later imports of this package only import the worlds they use.
+# This copy next to the worlds is written by setup.py for frozen builds, see get_manifest_path for the others
+manifest_path = os.path.join(folder, "_manifest.json")
+manifest_version = 2
 
 __all__ = {
     "lookup_any_item_id_to_name",
     "lookup_any_location_id_to_name",
     "network_data_package",
+    "game_info",
     "AutoWorldRegister",
     "world_sources",
     "folder",
+    "load_world_source",
+    "write_manifest",
+    "get_manifest_path",
+    "data_package_checksum",
 }
 
 if typing.TYPE_CHECKING:
@@ -24,6 +38,7 @@ class GamesPackage(typing.TypedDict):
     item_name_to_id: typing.Dict[str, int]
     location_name_to_id: typing.Dict[str, int]
     version: int
+    checksum: str
 
 
 class DataPackage(typing.TypedDict):
@@ -31,25 +46,56 @@ class DataPackage(typing.TypedDict):
     games: typing.Dict[str, GamesPackage]
 
 
+class GameInfo(typing.NamedTuple):
+    """What needs to be known about a game without importing its world, besides its GamesPackage."""
+    item_name_groups: typing.Dict[str, typing.FrozenSet[str]]
+    hint_blacklist: typing.FrozenSet[str]
+    forced_auto_forfeit: bool
+    hidden: bool
+
+
 class WorldSource(typing.NamedTuple):
     path: str  # typically relative path from this module
     is_zip: bool = False
 
-
-# find potential world containers, currently folders and zip-importable .apworld's
-world_sources: typing.List[WorldSource] = []
-file: os.DirEntry  # for me (Berserker) at least, PyCharm doesn't seem to infer the type correctly
-for file in os.scandir(folder):
-    # prevent loading of __pycache__ and allow _* for non-world folders, disable files/folders starting with "."
-    if not file.name.startswith(("_", ".")):
-        if file.is_dir():
-            world_sources.append(WorldSource(file.name))
-        elif file.is_file() and file.name.endswith(".apworld"):
-            world_sources.append(WorldSource(file.name, is_zip=True))
-
-# import all submodules to trigger AutoWorldRegister
-world_sources.sort()
-for world_source in world_sources:
+    @property
+    def module_name(self) -> str:
+        return f"worlds.{self.path.split('.', 1)[0]}"
+
+    def get_mtime(self, directory: str = folder) -> float:
+        """Newest modification time of the files of this world."""
+        path = os.path.join(directory, self.path)
+        if self.is_zip:
+            return os.stat(path).st_mtime
+        return max((entry.stat().st_mtime for current, _, _ in os.walk(path) if "__pycache__" not in current
+                    for entry in os.scandir(current) if entry.is_file()), default=0)
+
+
+def data_package_checksum(data: GamesPackage) -> str:
+    """Checksum of the contents of a game's data package, by which clients can validate their cached copy of it."""
+    contents = {key: data[key] for key in ("item_name_to_id", "location_name_to_id", "version")}
+    return hashlib.sha1(json.dumps(contents, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def find_world_sources(directory: str = folder) -> typing.List[WorldSource]:
+    """Finds potential world containers, currently folders and zip-importable .apworld's"""
+    sources: typing.List[WorldSource] = []
+    file: os.DirEntry  # for me (Berserker) at least, PyCharm doesn't seem to infer the type correctly
+    for file in os.scandir(directory):
+        # prevent loading of __pycache__ and allow _* for non-world folders, disable files/folders starting with "."
+        if not file.name.startswith(("_", ".")):
+            if file.is_dir():
+                sources.append(WorldSource(file.name))
+            elif file.is_file() and file.name.endswith(".apworld"):
+                sources.append(WorldSource(file.name, is_zip=True))
+    sources.sort()
+    return sources
+
+
+def load_world_source(world_source: WorldSource) -> None:
+    """Imports a world container, which registers its worlds with AutoWorldRegister."""
+    if world_source.module_name in sys.modules:
+        return
     if world_source.is_zip:
         importer = zipimport.zipimporter(os.path.join(folder, world_source.path))
         spec = importer.find_spec(world_source.path.split(".", 1)[0])
@@ -63,30 +109,147 @@ for world_source in world_sources:
     else:
         importlib.import_module(f".{world_source.path}", "worlds")
 
+
+def get_manifest_path() -> str:
+    """Where the manifest of this worlds folder is read from. Installs that aren't frozen keep theirs in the user's
+    cache, as the worlds folder may not be writable, named after the folder so each checkout gets its own."""
+    if getattr(sys, "frozen", False):
+        return manifest_path
+    from Utils import cache_path
+    return cache_path("worlds", f"manifest_{hashlib.sha1(os.path.abspath(folder).encode()).hexdigest()[:16]}.json")
+
+
+def _read_manifest() -> typing.Dict[WorldSource, typing.Dict[str, typing.Any]]:
+    """The manifest entries of the world sources it is up to date for. In frozen builds, where the manifest is written
+    at build time, the modification times of bundled world folders are not checked."""
+    try:
+        with open(get_manifest_path()) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    from Utils import __version__
+    if manifest.get("version") != manifest_version or manifest.get("archipelago_version") != __version__:
+        return {}
+    frozen = getattr(sys, "frozen", False)
+    sources = manifest["sources"]
+    return {world_source: sources[world_source.module_name] for world_source in world_sources
+            if world_source.module_name in sources
+            and (frozen and not world_source.is_zip or sources[world_source.module_name]["mtime"] ==
+                 world_source.get_mtime())}
+
+
+def write_manifest(directory: str = folder, path: typing.Optional[str] = None) -> None:
+    """Imports all worlds and writes their data to the manifest at path, by default the one in directory, which is
+    where the worlds they were imported from get installed to."""
+    from Utils import __version__
+    from .Files import AutoPatchRegister
+    for world_source in world_sources:
+        load_world_source(world_source)
+    sources: typing.Dict[str, typing.Dict[str, typing.Any]] = {
+        world_source.module_name: {"mtime": world_source.get_mtime(directory), "games": {}, "patch_file_endings": []}
+        for world_source in find_world_sources(directory)}
+
+    def get_source(module: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        return sources.get(".".join(module.split(".", 2)[:2]), None)
+
+    for game, world_type in AutoWorldRegister.world_types.items():
+        source = get_source(world_type.__module__)
+        if source is not None:
+            game_package = {
+                "item_name_to_id": world_type.item_name_to_id,
+                "location_name_to_id": world_type.location_name_to_id,
+                "version": world_type.data_version,
+            }
+            source["games"][game] = {
+                **game_package,
+                "checksum": data_package_checksum(game_package),
+                "item_name_groups": {name: sorted(items) for name, items in world_type.item_name_groups.items()
+                                     if name != "Everything"},
+                "hint_blacklist": sorted(world_type.hint_blacklist),
+                "forced_auto_forfeit": world_type.forced_auto_forfeit,
+                "hidden": world_type.hidden,
+            }
+    for file_ending, handler in AutoPatchRegister.file_endings.items():
+        source = get_source(handler.__module__)
+        if source is not None:
+            source["patch_file_endings"].append(file_ending)
+    # other processes may be reading it at the same time, so it gets replaced once it is complete
+    if path is None:
+        path = os.path.join(directory, os.path.basename(manifest_path))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w") as f:
+            json.dump({"version": manifest_version, "archipelago_version": __version__, "sources": sources}, f)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+world_sources: typing.List[WorldSource] = find_world_sources()
+
+manifest = _read_manifest()
+# import the submodules the manifest doesn't know about to trigger AutoWorldRegister,
+# the others get imported by AutoWorldRegister.world_types when their game is first looked up
+for world_source in world_sources:
+    if world_source not in manifest:
+        load_world_source(world_source)
+if len(manifest) != len(world_sources) and not getattr(sys, "frozen", False):
+    try:
+        write_manifest(path=get_manifest_path())
+    except OSError as e:
+        logging.warning(f"Could not write the worlds manifest to {get_manifest_path()}, "
+                        f"so every world gets imported on each start: {e}")
+    manifest = _read_manifest()
+AutoWorldRegister.world_types = WorldTypes(AutoWorldRegister.world_types,
+                                           {game: world_source for world_source, source in manifest.items()
+                                            for game in source["games"]})
+# patch handlers get looked up by file ending, see AutoPatchRegister.get_handler
+patch_file_endings: typing.Dict[str, WorldSource] = {file_ending: world_source
+                                                     for world_source, source in manifest.items()
+                                                     for file_ending in source["patch_file_endings"]}
+
 lookup_any_item_id_to_name = {}
 lookup_any_location_id_to_name = {}
 games: typing.Dict[str, GamesPackage] = {}
-
-from .AutoWorld import AutoWorldRegister
-
-for world_name, world in AutoWorldRegister.world_types.items():
-    games[world_name] = {
-        "item_name_to_id": world.item_name_to_id,
-        "location_name_to_id": world.location_name_to_id,
-        "version": world.data_version,
-        # seems clients don't actually want this. Keeping it here in case someone changes their mind.
-        # "item_name_groups": {name: tuple(items) for name, items in world.item_name_groups.items()}
-    }
-    lookup_any_item_id_to_name.update(world.item_id_to_name)
-    lookup_any_location_id_to_name.update(world.location_id_to_name)
+game_info: typing.Dict[str, GameInfo] = {}
+
+for world_source, source in manifest.items():
+    for world_name, game in source["games"].items():
+        games[world_name] = {
+            "item_name_to_id": game["item_name_to_id"],
+            "location_name_to_id": game["location_name_to_id"],
+            "version": game["version"],
+            "checksum": game["checksum"],
+        }
+        item_name_groups = {name: frozenset(items) for name, items in game["item_name_groups"].items()}
+        item_name_groups["Everything"] = frozenset(game["item_name_to_id"])
+        game_info[world_name] = GameInfo(item_name_groups, frozenset(game["hint_blacklist"]),
+                                         game["forced_auto_forfeit"], game["hidden"])
+# worlds that had to be imported, when the manifest couldn't be written
+for world_name, world in AutoWorldRegister.world_types.loaded.items():
+    if world_name not in games:
+        games[world_name] = {
+            "item_name_to_id": world.item_name_to_id,
+            "location_name_to_id": world.location_name_to_id,
+            "version": world.data_version,
+            # seems clients don't actually want this. Keeping it here in case someone changes their mind.
+            # "item_name_groups": {name: tuple(items) for name, items in world.item_name_groups.items()}
+        }
+        games[world_name]["checksum"] = data_package_checksum(games[world_name])
+        game_info[world_name] = GameInfo(world.item_name_groups, world.hint_blacklist, world.forced_auto_forfeit,
+                                         world.hidden)
+for game in games.values():
+    lookup_any_item_id_to_name.update({item_id: name for name, item_id in game["item_name_to_id"].items()})
+    lookup_any_location_id_to_name.update({location_id: name for name, location_id
+                                           in game["location_name_to_id"].items()})
 
 network_data_package: DataPackage = {
     "games": games,
 }
 
 # Set entire datapackage to version 0 if any of them are set to 0
-if any(not world.data_version for world in AutoWorldRegister.world_types.values()):
-    import logging
-
+if any(not game["version"] for game in games.values()):
     logging.warning(f"Datapackage is in custom mode. Custom Worlds: "
-                    f"{[world for world in AutoWorldRegister.world_types.values() if not world.data_version]}")
+                    f"{[world_name for world_name, game in games.items() if not game['version']]}")
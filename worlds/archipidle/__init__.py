@@ -24,10 +24,12 @@ class ArchipIDLEWorld(World):
     An idle game which sends a check every thirty seconds, up to one hundred checks.
     """
     game = "ArchipIDLE"
+    parallel_generation = True
     topology_present = False
     data_version = 4
     hidden = (datetime.now().month != 4)  # ArchipIDLE is only visible during April
     web = ArchipIDLEWebWorld()
+    incremental_reachability = True
 
     item_name_to_id = {}
     start_id = 9000
@@ -24,6 +24,7 @@ class Bk_SudokuWorld(World):
     """
     game = "Sudoku"
     web = Bk_SudokuWebWorld()
+    incremental_reachability = True
 
     item_name_to_id: Dict[str, int] = {}
     location_name_to_id: Dict[str, int] = {}
@@ -27,9 +27,11 @@ class ChecksFinderWorld(World):
     with the mines! You win when you get all your items and beat the board!
     """
     game: str = "ChecksFinder"
+    parallel_generation = True
     option_definitions = checksfinder_options
     topology_present = True
     web = ChecksFinderWeb()
+    incremental_reachability = True
 
     item_name_to_id = {name: data.code for name, data in item_table.items()}
     location_name_to_id = {name: data.id for name, data in advancement_table.items()}
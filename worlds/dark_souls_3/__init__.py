@@ -52,6 +52,7 @@ class DarkSouls3World(World):
     option_definitions = dark_souls_options
     topology_present: bool = True
     web = DarkSouls3Web()
+    incremental_reachability = True
     data_version = 4
     base_id = 100000
     required_client_version = (0, 3, 6)
@@ -42,6 +42,7 @@ class DKC3World(World):
     option_definitions = dkc3_options
     topology_present = False
     data_version = 2
+    output_attributes = ("rom_name", "active_level_list")
     #hint_blacklist = {LocationName.rocket_rush_flag}
 
     item_name_to_id = {name: data.code for name, data in item_table.items()}
@@ -49,6 +50,7 @@ class DKC3World(World):
 
     active_level_list: typing.List[str]
     web = DKC3Web()
+    incremental_reachability = True
     
     def __init__(self, world: MultiWorld, player: int):
         self.rom_name_available_event = threading.Event()
@@ -44,12 +44,14 @@ class Factorio(World):
     research new technologies, and become more efficient in your quest to build a rocket and return home.
     """
     game: str = "Factorio"
+    parallel_generation = True
     special_nodes = {"automation", "logistics", "rocket-silo"}
     custom_recipes: typing.Dict[str, Recipe]
     location_pool: typing.List[FactorioScienceLocation]
     advancement_technologies: typing.Set[str]
 
     web = FactorioWeb()
+    incremental_reachability = True
 
     item_name_to_id = all_items
     # TODO: remove base_tech_table ~ 0.3.7
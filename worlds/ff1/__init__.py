@@ -39,6 +39,7 @@ class FF1World(World):
     location_name_to_id = ff1_locations.get_location_name_to_address_dict()
 
     web = FF1Web()
+    incremental_reachability = True
 
     def __init__(self, world: MultiWorld, player: int):
         super().__init__(world, player)
@@ -1,4 +1,6 @@
+import abc
 import collections
+import functools
 import typing
 
 from BaseClasses import LocationProgressType, MultiWorld
@@ -92,15 +94,276 @@ def exclusion_rules(world: MultiWorld, player: int, exclude_locations: typing.Se
             location.progress_type = LocationProgressType.EXCLUDED
 
 
+class Rule(abc.ABC):
+    """Access rule built from item and region checks, which can be simplified when combined and gets compiled into a
+    single function reading the item counts of a CollectionState directly.
+    Unlike a plain lambda, the item counts it depends on are known without evaluating it, see item_dependencies."""
+    _evaluate: typing.Optional[CollectionRule] = None
+    _dependencies: typing.Optional[typing.FrozenSet[typing.Tuple[str, int]]] = None
+
+    def __call__(self, state: "BaseClasses.CollectionState") -> bool:
+        evaluate = self._evaluate
+        if evaluate is None:
+            evaluate = self._compile()
+        return evaluate(state)
+
+    def __and__(self, other: "Rule") -> "Rule":
+        return And(self, other)
+
+    def __or__(self, other: "Rule") -> "Rule":
+        return Or(self, other)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash((type(self), self._key()))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self._key()!r}"
+
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        # the compiled function can't be pickled, it is simply compiled again when needed
+        return {key: value for key, value in self.__dict__.items() if key not in {"_evaluate", "_dependencies"}}
+
+    @property
+    def item_dependencies(self) -> typing.Optional[typing.FrozenSet[typing.Tuple[str, int]]]:
+        """The (item name, player) counts this rule reads, None if it depends on anything else."""
+        if self._evaluate is None:
+            self._compile()
+        return self._dependencies
+
+    def simplify(self) -> "Rule":
+        """Returns an equivalent rule with nested rules flattened and redundant checks removed."""
+        return self
+
+    @abc.abstractmethod
+    def _key(self) -> typing.Tuple:
+        """What identifies this rule among rules of its type, equal rules share their compiled function."""
+
+    @abc.abstractmethod
+    def _items_read(self) -> typing.Optional[typing.Iterable[typing.Tuple[str, int]]]:
+        """The (item name, player) counts the expression of this rule reads, None if it depends on anything else."""
+
+    @abc.abstractmethod
+    def _expression(self, constants: typing.Dict[str, typing.Any]) -> str:
+        """Python expression evaluating this rule, with state and items (its prog_items) in scope.
+        Values that aren't plain numbers are passed in through constants."""
+
+    def _compile(self) -> CollectionRule:
+        self._evaluate, self._dependencies = _compile_rule(self.simplify())
+        return self._evaluate
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_rule(rule: Rule) -> \
+        typing.Tuple[CollectionRule, typing.Optional[typing.FrozenSet[typing.Tuple[str, int]]]]:
+    constants: typing.Dict[str, typing.Any] = {}
+    source = f"def evaluate(state):\n    items = state.prog_items\n    return {rule._expression(constants)}\n"
+    exec(compile(source, "<rule>", "exec"), constants)
+    read = rule._items_read()
+    return constants["evaluate"], None if read is None else frozenset(read)
+
+
+def _constant(constants: typing.Dict[str, typing.Any], value: typing.Any) -> str:
+    name = f"c{len(constants)}"
+    constants[name] = value
+    return name
+
+
+class Constant(Rule):
+    def __init__(self, value: bool):
+        self.value = bool(value)
+
+    def _key(self) -> typing.Tuple:
+        return self.value,
+
+    def _items_read(self) -> typing.Iterable[typing.Tuple[str, int]]:
+        return ()
+
+    def _expression(self, constants: typing.Dict[str, typing.Any]) -> str:
+        return repr(self.value)
+
+
+class Has(Rule):
+    def __init__(self, item: str, player: int, count: int = 1):
+        self.item = item
+        self.player = player
+        self.count = count
+
+    def simplify(self) -> Rule:
+        return Constant(True) if self.count <= 0 else self
+
+    def _key(self) -> typing.Tuple:
+        return self.item, self.player, self.count
+
+    def _items_read(self) -> typing.Iterable[typing.Tuple[str, int]]:
+        return (self.item, self.player),
+
+    def _expression(self, constants: typing.Dict[str, typing.Any]) -> str:
+        return f"items[{_constant(constants, (self.item, self.player))}] >= {int(self.count)}"
+
+
+class HasAll(Rule):
+    def __init__(self, items: typing.Iterable[str], player: int):
+        self.items = tuple(items)
+        self.player = player
+
+    def simplify(self) -> Rule:
+        return And(*(Has(item, self.player) for item in self.items)).simplify()
+
+    def _key(self) -> typing.Tuple:
+        return self.items, self.player
+
+    def _items_read(self) -> typing.Iterable[typing.Tuple[str, int]]:
+        return ((item, self.player) for item in self.items)
+
+    def _expression(self, constants: typing.Dict[str, typing.Any]) -> str:
+        if not self.items:
+            return "True"
+        return "(" + " and ".join(f"items[{_constant(constants, (item, self.player))}] >= 1"
+                                  for item in self.items) + ")"
+
+
+class HasAny(Rule):
+    def __init__(self, items: typing.Iterable[str], player: int):
+        self.items = tuple(items)
+        self.player = player
+
+    def simplify(self) -> Rule:
+        return Or(*(Has(item, self.player) for item in self.items)).simplify()
+
+    def _key(self) -> typing.Tuple:
+        return self.items, self.player
+
+    def _items_read(self) -> typing.Iterable[typing.Tuple[str, int]]:
+        return ((item, self.player) for item in self.items)
+
+    def _expression(self, constants: typing.Dict[str, typing.Any]) -> str:
+        if not self.items:
+            return "False"
+        return "(" + " or ".join(f"items[{_constant(constants, (item, self.player))}] >= 1"
+                                 for item in self.items) + ")"
+
+
+class Count(Rule):
+    """Has at least count of the items combined, like CollectionState.has_group."""
+    def __init__(self, items: typing.Iterable[str], player: int, count: int):
+        self.items = tuple(dict.fromkeys(items))
+        self.player = player
+        self.count = count
+
+    def simplify(self) -> Rule:
+        if self.count <= 0:
+            return Constant(True)
+        if not self.items:
+            return Constant(False)
+        if len(self.items) == 1:
+            return Has(self.items[0], self.player, self.count)
+        return self
+
+    def _key(self) -> typing.Tuple:
+        return self.items, self.player, self.count
+
+    def _items_read(self) -> typing.Iterable[typing.Tuple[str, int]]:
+        return ((item, self.player) for item in self.items)
+
+    def _expression(self, constants: typing.Dict[str, typing.Any]) -> str:
+        counts = " + ".join(f"items[{_constant(constants, (item, self.player))}]" for item in self.items)
+        return f"{counts} >= {int(self.count)}"
+
+
+class CanReach(Rule):
+    def __init__(self, spot: str, resolution_hint: str, player: int):
+        self.spot = spot
+        self.resolution_hint = resolution_hint
+        self.player = player
+
+    def _key(self) -> typing.Tuple:
+        return self.spot, self.resolution_hint, self.player
+
+    def _items_read(self) -> None:
+        return None
+
+    def _expression(self, constants: typing.Dict[str, typing.Any]) -> str:
+        return f"state.can_reach({_constant(constants, self.spot)}, " \
+               f"{_constant(constants, self.resolution_hint)}, {int(self.player)})"
+
+
+class _Combined(Rule):
+    short_circuit: bool
+    """the value of a rule that decides the combined rule on its own"""
+    operator: str
+
+    def __init__(self, *rules: Rule):
+        self.rules = rules
+
+    def _key(self) -> typing.Tuple:
+        return self.rules
+
+    def simplify(self) -> Rule:
+        rules: typing.List[Rule] = []
+        seen: typing.Set[Rule] = set()
+        has_index: typing.Dict[typing.Tuple[str, int], int] = {}
+        pending = [rule.simplify() for rule in reversed(self.rules)]
+        while pending:
+            rule = pending.pop()
+            if type(rule) is type(self):
+                pending.extend(reversed(rule.rules))
+            elif isinstance(rule, Constant):
+                if rule.value is self.short_circuit:
+                    return rule
+            elif isinstance(rule, Has):
+                index = has_index.get((rule.item, rule.player))
+                if index is None:
+                    has_index[rule.item, rule.player] = len(rules)
+                    rules.append(rule)
+                elif (rule.count > rules[index].count) is not self.short_circuit:
+                    # And needs the higher count, Or is already satisfied by the lower one
+                    rules[index] = rule
+            elif rule not in seen:
+                seen.add(rule)
+                rules.append(rule)
+        if not rules:
+            return Constant(not self.short_circuit)
+        if len(rules) == 1:
+            return rules[0]
+        return type(self)(*rules)
+
+    def _items_read(self) -> typing.Optional[typing.Iterable[typing.Tuple[str, int]]]:
+        read = []
+        for rule in self.rules:
+            rule_read = rule._items_read()
+            if rule_read is None:
+                return None
+            read.extend(rule_read)
+        return read
+
+    def _expression(self, constants: typing.Dict[str, typing.Any]) -> str:
+        return "(" + f" {self.operator} ".join(rule._expression(constants) for rule in self.rules) + ")"
+
+
+class And(_Combined):
+    short_circuit = False
+    operator = "and"
+
+
+class Or(_Combined):
+    short_circuit = True
+    operator = "or"
+
+
 def set_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule):
-    spot.access_rule = rule
+    spot.access_rule = rule.simplify() if isinstance(rule, Rule) else rule
 
 
 def add_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule, combine="and"):
     old_rule = spot.access_rule
     # empty rule, replace instead of add
     if old_rule is spot.__class__.access_rule:
-        spot.access_rule = rule if combine == "and" else old_rule
+        set_rule(spot, rule if combine == "and" else old_rule)
+    elif isinstance(rule, Rule) and isinstance(old_rule, Rule):
+        spot.access_rule = (And(rule, old_rule) if combine == "and" else Or(rule, old_rule)).simplify()
     else:
         if combine == "and":
             spot.access_rule = lambda state: rule(state) and old_rule(state)
@@ -142,9 +142,11 @@ class HKWorld(World):
     As the enigmatic Knight, you’ll traverse the depths, unravel its mysteries and conquer its evils.
     """  # from https://www.hollowknight.com
     game: str = "Hollow Knight"
+    parallel_generation = True
     option_definitions = hollow_knight_options
 
     web = HKWeb()
+    incremental_reachability = True
 
     item_name_to_id = {name: data.id for name, data in item_table.items()}
     location_name_to_id = {location_name: location_id for location_id, location_name in
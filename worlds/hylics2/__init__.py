@@ -25,6 +25,7 @@ class Hylics2World(World):
     """
     game: str = "Hylics 2"
     web = Hylics2Web()
+    incremental_reachability = True
 
     all_items = {**Items.item_table, **Items.gesture_item_table, **Items.party_item_table, 
         **Items.medallion_item_table}
@@ -40,7 +40,10 @@ class L2ACWorld(World):
     Jelly in the end. Can you beat it?
     """
     game: ClassVar[str] = "Lufia II Ancient Cave"
+    parallel_generation = True
+    output_attributes = ()
     web: ClassVar[WebWorld] = L2ACWeb()
+    incremental_reachability: ClassVar[bool] = True
 
     option_definitions: ClassVar[Dict[str, AssembleOptions]] = l2ac_option_definitions
     item_name_to_id: ClassVar[Dict[str, int]] = l2ac_item_name_to_id
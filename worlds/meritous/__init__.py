@@ -39,6 +39,7 @@ class MeritousWorld(World):
     topology_present: False
 
     web = MeritousWeb()
+    incremental_reachability = True
 
     item_name_to_id = item_table
     location_name_to_id = location_table
@@ -58,9 +58,11 @@ class MinecraftWorld(World):
     victory!
     """
     game: str = "Minecraft"
+    parallel_generation = True
     option_definitions = minecraft_options
     topology_present = True
     web = MinecraftWebWorld()
+    incremental_reachability = True
 
     item_name_to_id = {name: data.code for name, data in item_table.items()}
     location_name_to_id = {name: data.id for name, data in advancement_table.items()}
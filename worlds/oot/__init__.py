@@ -51,18 +51,21 @@ class OOTCollectionState(metaclass=AutoLogicRegister):
         self.age = {player: None for player in all_ids}
 
     def copy_mixin(self, ret) -> CollectionState:
-        ret.child_reachable_regions = {player: copy.copy(self.child_reachable_regions[player]) for player in
-                                       self.child_reachable_regions}
-        ret.adult_reachable_regions = {player: copy.copy(self.adult_reachable_regions[player]) for player in
-                                       self.adult_reachable_regions}
-        ret.child_blocked_connections = {player: copy.copy(self.child_blocked_connections[player]) for player in
-                                         self.child_blocked_connections}
-        ret.adult_blocked_connections = {player: copy.copy(self.adult_blocked_connections[player]) for player in
-                                         self.adult_blocked_connections}
-        ret.day_reachable_regions = {player: copy.copy(self.adult_reachable_regions[player]) for player in
-                                     self.day_reachable_regions}
-        ret.dampe_reachable_regions = {player: copy.copy(self.adult_reachable_regions[player]) for player in
-                                       self.dampe_reachable_regions}
+        # only Ocarina of Time slots ever fill these, the empty sets of every other slot can be shared
+        ret.child_reachable_regions = self.child_reachable_regions.copy()
+        ret.adult_reachable_regions = self.adult_reachable_regions.copy()
+        ret.child_blocked_connections = self.child_blocked_connections.copy()
+        ret.adult_blocked_connections = self.adult_blocked_connections.copy()
+        ret.day_reachable_regions = self.day_reachable_regions.copy()
+        ret.dampe_reachable_regions = self.dampe_reachable_regions.copy()
+        for player in self.child_reachable_regions:
+            if self.multiworld.game[player] == "Ocarina of Time":
+                ret.child_reachable_regions[player] = copy.copy(self.child_reachable_regions[player])
+                ret.adult_reachable_regions[player] = copy.copy(self.adult_reachable_regions[player])
+                ret.child_blocked_connections[player] = copy.copy(self.child_blocked_connections[player])
+                ret.adult_blocked_connections[player] = copy.copy(self.adult_blocked_connections[player])
+                ret.day_reachable_regions[player] = copy.copy(self.adult_reachable_regions[player])
+                ret.dampe_reachable_regions[player] = copy.copy(self.adult_reachable_regions[player])
         return ret
 
 
@@ -20,6 +20,7 @@ class OriBlindForest(World):
     option_definitions = options
 
     hidden = True
+    incremental_reachability = True
 
     def generate_early(self):
         logic_sets = {"casual-core"}
@@ -46,6 +46,7 @@ class Overcooked2World(World):
 
     game = "Overcooked! 2"
     web = Overcooked2Web()
+    incremental_reachability = True
     required_client_version = (0, 3, 4)
     option_definitions = overcooked_options
     topology_present: bool = False
@@ -52,6 +52,7 @@ class PokemonRedBlueWorld(World):
     item_name_groups = item_groups
 
     web = PokemonWebWorld()
+    incremental_reachability = True
 
     def __init__(self, world: MultiWorld, player: int):
         super().__init__(world, player)
@@ -32,6 +32,7 @@ class RaftWorld(World):
     """
     game: str = "Raft"
     web = RaftWeb()
+    incremental_reachability = True
 
     item_name_to_id = items_lookup_name_to_id.copy()
     lastItemId = max(filter(lambda val: val is not None, item_name_to_id.values()))
@@ -31,11 +31,13 @@ class RLWorld(World):
     But that's OK, because no one is perfect, and you don't have to be to succeed.
     """
     game = "Rogue Legacy"
+    parallel_generation = True
     option_definitions = rl_options
     topology_present = True
     data_version = 4
     required_client_version = (0, 3, 5)
     web = RLWeb()
+    incremental_reachability = True
 
     item_name_to_id = {name: data.code for name, data in item_table.items()}
     location_name_to_id = {name: data.code for name, data in location_table.items()}
@@ -29,6 +29,7 @@ class RiskOfRainWorld(World):
      first crash landing.
     """
     game: str = "Risk of Rain 2"
+    parallel_generation = True
     option_definitions = ror2_options
     topology_present = False
 
@@ -38,6 +39,7 @@ class RiskOfRainWorld(World):
     data_version = 4
     forced_auto_forfeit = True
     web = RiskOfWeb()
+    incremental_reachability = True
     total_revivals: int
 
     def generate_early(self) -> None:
@@ -50,6 +50,7 @@ class SA2BWorld(World):
     Sonic Adventure 2 Battle is an action platforming game. Play as Sonic, Tails, Knuckles, Shadow, Rouge, and Eggman across 31 stages and prevent the destruction of the earth.
     """
     game: str = "Sonic Adventure 2 Battle"
+    parallel_generation = True
     option_definitions = sa2b_options
     topology_present = False
     data_version = 4
@@ -68,6 +69,7 @@ class SA2BWorld(World):
     gate_costs: typing.Dict[int, int]
     gate_bosses: typing.Dict[int, int]
     web = SA2BWeb()
+    incremental_reachability = True
 
     def _get_slot_data(self):
         return {
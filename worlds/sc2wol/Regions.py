@@ -1,5 +1,7 @@
 from typing import List, Set, Dict, Tuple, Optional, Callable
 from BaseClasses import MultiWorld, Region, Entrance, Location, RegionType
+from ..generic.Rules import Count, Has
+from .Items import item_name_groups
 from .Locations import LocationData
 from .Options import get_option_value
 from .MissionTables import MissionInfo, mission_orders, vanilla_mission_req_table, alt_final_mission_locations
@@ -191,10 +193,8 @@ def create_regions(multiworld: MultiWorld, player: int, locations: Tuple[Locatio
                     connect(multiworld, player, names, "Menu", missions[i])
                 else:
                     connect(multiworld, player, names, missions[connection], missions[i],
-                            (lambda name, missions_req: (lambda state: state.has(f"Beat {name}", player) and
-                                                                       state._sc2wol_cleared_missions(multiworld, player,
-                                                                                                      missions_req)))
-                            (missions[connection], mission_order[i].number))
+                            Has(f"Beat {missions[connection]}", player) &
+                            Count(item_name_groups["Missions"], player, mission_order[i].number))
                     connections.append(connection + 1)
 
             mission_req_table.update({missions[i]: MissionInfo(
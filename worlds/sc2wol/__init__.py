@@ -41,6 +41,7 @@ class SC2WoLWorld(World):
     option_definitions = sc2wol_options
 
     item_name_groups = item_name_groups
+    compact_item_counts = True
     locked_locations: typing.List[str]
     location_cache: typing.List[Location]
     mission_req_table = {}
@@ -28,9 +28,12 @@ class SM64World(World):
     """
 
     game: str = "Super Mario 64"
+    parallel_generation = True
+    output_attributes = ()
     topology_present = False
 
     web = SM64Web()
+    incremental_reachability = True
 
     item_name_to_id = item_table
     location_name_to_id = location_table
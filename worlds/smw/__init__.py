@@ -43,12 +43,14 @@ class SMWWorld(World):
     topology_present = False
     data_version = 2
     required_client_version = (0, 3, 5)
+    output_attributes = ("rom_name",)
 
     item_name_to_id = {name: data.code for name, data in item_table.items()}
     location_name_to_id = all_locations
 
     active_level_dict: typing.Dict[int,int]
     web = SMWWeb()
+    incremental_reachability = True
     
     def __init__(self, world: MultiWorld, player: int):
         self.rom_name_available_event = threading.Event()
@@ -29,9 +29,11 @@ class SpireWorld(World):
 
     option_definitions = spire_options
     game = "Slay the Spire"
+    parallel_generation = True
     topology_present = False
     data_version = 1
     web = SpireWeb()
+    incremental_reachability = True
 
     item_name_to_id = {name: data.code for name, data in item_table.items()}
     location_name_to_id = location_table
@@ -35,7 +35,9 @@ class SubnauticaWorld(World):
     You must find a cure for yourself, build an escape rocket, and leave the planet.
     """
     game: str = "Subnautica"
+    parallel_generation = True
     web = SubnaticaWeb()
+    incremental_reachability = True
 
     item_name_to_id = {data["name"]: item_id for item_id, data in Items.item_table.items()}
     location_name_to_id = all_locations
@@ -45,6 +45,7 @@ class TimespinnerWorld(World):
     topology_present = True
     data_version = 10
     web = TimespinnerWebWorld()
+    incremental_reachability = True
 
     item_name_to_id = {name: data.code for name, data in item_table.items()}
     location_name_to_id = {location.name: location.code for location in get_locations(None, None)}
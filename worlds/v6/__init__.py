@@ -28,8 +28,11 @@ class V6World(World):
     """ #Lifted from Store Page
 
     game: str = "VVVVVV"
+    parallel_generation = True
+    output_attributes = ()
     topology_present = False
     web = V6Web()
+    incremental_reachability = True
 
     item_name_to_id = item_table
     location_name_to_id = location_table
@@ -44,6 +44,7 @@ class WitnessWorld(World):
     static_locat = StaticWitnessLocations()
     static_items = StaticWitnessItems()
     web = WitnessWebWorld()
+    incremental_reachability = True
     option_definitions = the_witness_options
 
     item_name_to_id = {